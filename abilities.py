@@ -19,6 +19,7 @@ Classes:
 - Axerang: A subclass representing an ability where an axe is thrown like a boomerang,
   causing damage and stunning the enemy.
 - MeatShot: A subclass representing an ability where the player shoots meat, causing damage.
+- DirtyTrick: A subclass representing the Goblin race's ability, a low blow that stuns the enemy.
 
 Usage:
 ------
@@ -234,3 +235,32 @@ class MeatShot(Abilities):
             damage_reduction=0,
             stun=0
         )
+
+
+class DirtyTrick(Abilities):
+    """
+    A class representing the 'Dirty Trick' ability of the Goblins, a low blow that leaves the enemy stunned.
+
+    Methods
+    -------
+    __init__()
+        Initializes the 'Dirty Trick' ability with its properties.
+    """
+
+    def __init__(self):
+        """
+        Initializes the 'Dirty Trick' ability with predefined attributes.
+
+        The 'Dirty Trick' ability causes 15 damage, stuns the enemy for 1 round, and has a cooldown of 4 rounds.
+        It does not apply damage over time or reduce damage.
+        """
+        super().__init__(
+            name="Dirty Trick",
+            damage=15,
+            cooldown=4,
+            description="Throw sand in Your enemy's eyes and strike while they can't see!",
+            d_o_t=0,
+            d_o_t_time=0,
+            damage_reduction=0,
+            stun=1
+        )
@@ -11,10 +11,12 @@ which are created in the `items` module.
 Imports:
 --------
 - `items`: The module where item classes like `SmallHealthPotion`, `BigHealthPotion`, etc., are defined.
+- `fixedpoint`: Provides `to_points`, converting the defence of a potion to the hundredths the defences are kept in.
 """
 
 
 import items
+from fixedpoint import to_points
 
 MAPPING = {
     "Small Health Potion": items.SmallHealthPotion(),
@@ -88,11 +90,10 @@ class Backpack:
             print("Backpack is empty!")
 
     @staticmethod
-    def use_item(character, item_name) -> None:
+    def apply_item(character, item_name) -> None:
         """
-        Uses an item from the backpack on the character.
+        Applies the effect of an item on the character, without any message.
 
-        The effect of the item depends on its type (health, attack, or defense).
         Health potions restore HP, while attack and defense potions modify the character's stats.
 
         Parameters
@@ -105,7 +106,6 @@ class Backpack:
         item = MAPPING.get(item_name)
         if item.group == "Health Potions":
             character.race.hp += item.how_much[0]
-            print(f"You just used {item.name}, you restored {item.how_much[0]} hp!")
         else:
             character.buff_time[0] = item.how_much[1]
             match item.group:
@@ -114,7 +114,27 @@ class Backpack:
                     character.race.damage += item.how_much[0]
                 case "Defence Potions":
                     character.buff_time[1] = "Defence"
-                    character.race.defence += item.how_much[0]
+                    character.race.defence_points += to_points(item.how_much[0])
+
+    @staticmethod
+    def use_item(character, item_name) -> None:
+        """
+        Uses an item from the backpack on the character.
+
+        The effect of the item depends on its type (health, attack, or defense), and is applied by `apply_item`.
+
+        Parameters
+        ----------
+        character
+            The character who will use the item.
+        item_name : str
+            The name of the item to be used.
+        """
+        Backpack.apply_item(character, item_name)
+        item = MAPPING.get(item_name)
+        if item.group == "Health Potions":
+            print(f"You just used {item.name}, you restored {item.how_much[0]} hp!")
+        else:
             print(
                 f"You just used {item.name}, your {character.buff_time[1]} is now enlarged by {character.buff_time[0]}"
             )
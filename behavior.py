@@ -0,0 +1,288 @@
+"""
+Module for the behavior trees of the enemies, declared in data and compiled into closures.
+
+An enemy with a behavior tree decides what to do on its turn: attack, defend (doubling its defence until its next
+turn), flee, or use one of its abilities. The trees are written in `behaviors.json` and compiled once, when the file is
+loaded, into nested closures: deciding is calling the root closure, with no lookup of node types or names. An enemy
+without a tree always attacks, as enemies always did.
+
+Every node returns a decision (an action and its argument, like the policies of `simulation`) or True when it
+succeeds, and None or False when it fails:
+
+- `selector`: tries its children in order, and returns the result of the first one that succeeds.
+- `sequence`: runs its children in order while they succeed, and returns the result of the last one.
+- `condition`: a test from `CONDITIONS`, with its `value`.
+- `action`: a decision from `ACTIONS`. The `ability` action fails while the ability is on cooldown.
+
+In battles with many enemies, a `Planner` evaluates the trees with a time budget per tick: the enemies it doesn't
+reach in time keep their last decision, and are the first evaluated on the next tick, so the loop never stalls
+however many enemies think.
+
+Imports:
+--------
+- `json`: Used to read the trees.
+- `os`: Used to locate the default tree file next to this module.
+- `random`: The default generator of the chance conditions.
+- `time`: Provides `perf_counter`, used to keep to the budget of the planner.
+- `functools`: Provides `lru_cache`, used to load the trees once.
+- `typing`: Provides `NamedTuple`, used for the enemy abilities.
+
+Classes:
+--------
+- EnemyAbility: An ability of an enemy.
+- Planner: Evaluates the trees of many enemies within a time budget per tick.
+
+Functions:
+----------
+- compile_behavior: Compiles a tree into a closure.
+- load_behaviors: Loads and compiles the trees of the enemies from a file, once.
+- decide: Returns the decision of an enemy.
+
+Example:
+--------
+enemy.behavior = load_behaviors()["bear"]
+action, argument = decide(enemy, character)
+"""
+
+import json
+import os
+import random
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+
+BEHAVIORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "behaviors.json")
+
+ATTACK = ("Attack", None)
+
+
+class EnemyAbility(NamedTuple):
+    """An ability of an enemy: the damage it deals, before the target's defence, and its cooldown in turns."""
+    name: str
+    damage: int
+    cooldown: int
+
+
+CONDITIONS = {
+    "hp_below": lambda value: lambda enemy, target, rng: enemy.hp < value,
+    "target_hp_below": lambda value: lambda enemy, target, rng: target.hp < value,
+    "chance": lambda value: lambda enemy, target, rng: rng.randint(0, 99) < value,
+}
+
+
+def _ability(node):
+    """
+    Compiles an `ability` action, failing while the ability is on cooldown.
+    """
+    name = node["name"]
+    decision = ("Ability", EnemyAbility(name, node["damage"], node["cooldown"]))
+    return lambda enemy, target, rng: decision if enemy.ability_cooldowns.get(name, 0) <= 0 else None
+
+
+def _constant(decision):
+    """
+    Compiles an action that always succeeds with the given decision.
+    """
+    return lambda enemy, target, rng: decision
+
+
+ACTIONS = {
+    "attack": lambda node: _constant(ATTACK),
+    "defend": lambda node: _constant(("Defend", None)),
+    "flee": lambda node: _constant(("Flee", None)),
+    "ability": _ability,
+}
+
+
+def compile_behavior(node, name="tree"):
+    """
+    Compiles a behavior tree into a closure receiving the enemy, its target and a random generator.
+
+    Parameters
+    ----------
+    node : dict
+        The root node of the tree.
+    name : str, optional
+        The name of the tree, used in the error messages (default is "tree").
+
+    Returns
+    -------
+    callable
+        The compiled tree, returning a decision, True, or a failure (None or False).
+
+    Raises
+    ------
+    ValueError
+        If a node, a condition or an action is unknown, or a composite node has no children.
+    """
+    for composite in ("selector", "sequence"):
+        if composite in node:
+            children = tuple(compile_behavior(child, name) for child in node[composite])
+            if not children:
+                raise ValueError(f"The {composite} of the behavior '{name}' has no children")
+            break
+    else:
+        if "condition" in node:
+            if node["condition"] not in CONDITIONS:
+                raise ValueError(f"Unknown condition '{node['condition']}' in the behavior '{name}'")
+            return CONDITIONS[node["condition"]](node.get("value"))
+        if "action" in node:
+            if node["action"] not in ACTIONS:
+                raise ValueError(f"Unknown action '{node['action']}' in the behavior '{name}'")
+            return ACTIONS[node["action"]](node)
+        raise ValueError(f"Unknown node {node} in the behavior '{name}'")
+
+    if composite == "selector":
+        def selector(enemy, target, rng):
+            for child in children:
+                if result := child(enemy, target, rng):
+                    return result
+            return None
+        return selector
+
+    def sequence(enemy, target, rng):
+        result = True
+        for child in children:
+            if not (result := child(enemy, target, rng)):
+                return None
+        return result
+    return sequence
+
+
+@lru_cache(maxsize=None)
+def load_behaviors(path=None) -> dict:
+    """
+    Loads and compiles the behavior trees of the enemies from a file. The trees are cached, so they are only compiled
+    once.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the tree file (default is `behaviors.json` next to this module).
+
+    Returns
+    -------
+    dict
+        The compiled tree of every enemy name.
+    """
+    with open(path or BEHAVIORS_PATH, encoding="utf-8") as behavior_file:
+        return {name: compile_behavior(tree, name) for name, tree in json.load(behavior_file).items()}
+
+
+def decide(enemy, target, rng=random) -> tuple:
+    """
+    Returns the decision of an enemy, from its behavior tree.
+
+    Parameters
+    ----------
+    enemy : Enemies
+        The enemy deciding.
+    target : Combatant
+        The combatant the enemy is fighting.
+    rng : random.Random, optional
+        The generator of the chance conditions (default is the `random` module).
+
+    Returns
+    -------
+    tuple
+        The action ("Attack", "Defend", "Flee" or "Ability") and its argument (the `EnemyAbility`, or None). An enemy
+        without a tree, or whose tree decides nothing, attacks.
+    """
+    if enemy.behavior is None:
+        return ATTACK
+    decision = enemy.behavior(enemy, target, rng)
+    return decision if isinstance(decision, tuple) else ATTACK
+
+
+class Planner:
+    """
+    A class evaluating the behavior trees of many enemies, within a time budget per tick.
+
+    The enemies are evaluated in turn, starting every tick with the first one that wasn't reached on the previous
+    tick. At least one enemy is evaluated per tick, so every enemy is eventually reached whatever the budget.
+
+    Attributes
+    ----------
+    budget : float
+        The time spent evaluating trees per tick, in seconds.
+    rng : random.Random
+        The generator of the chance conditions.
+    decisions : dict
+        The last decision of every enemy evaluated.
+    evaluated : int
+        The number of trees evaluated.
+    deferred : int
+        The number of evaluations put off to a later tick, for lack of time.
+    """
+
+    def __init__(self, budget=0.002, rng=random):
+        """
+        Initializes the planner.
+
+        Parameters
+        ----------
+        budget : float, optional
+            The time spent evaluating trees per tick, in seconds (default is 2 ms).
+        rng : random.Random, optional
+            The generator of the chance conditions (default is the `random` module).
+        """
+        self.budget = budget
+        self.rng = rng
+        self.decisions = {}
+        self.evaluated = 0
+        self.deferred = 0
+        self._cursor = 0
+
+    def think(self, enemies, target) -> None:
+        """
+        Evaluates the trees of the enemies until all of them are evaluated or the budget of the tick is spent.
+
+        Parameters
+        ----------
+        enemies : list
+            The living enemies, in a stable order.
+        target : Combatant
+            The combatant the enemies are fighting.
+        """
+        if not enemies:
+            return
+        count = len(enemies)
+        start = self._cursor % count
+        deadline = time.perf_counter() + self.budget
+        for offset in range(count):
+            enemy = enemies[(start + offset) % count]
+            self.decisions[enemy] = decide(enemy, target, self.rng)
+            self.evaluated += 1
+            if offset + 1 < count and time.perf_counter() >= deadline:
+                self._cursor = start + offset + 1
+                self.deferred += count - offset - 1
+                return
+        self._cursor = start
+
+    def decision(self, enemy) -> tuple:
+        """
+        Returns the last decision of an enemy.
+
+        Parameters
+        ----------
+        enemy : Enemies
+            The enemy.
+
+        Returns
+        -------
+        tuple
+            The last decision of the enemy, or an attack if it wasn't evaluated yet.
+        """
+        return self.decisions.get(enemy, ATTACK)
+
+    def forget(self, enemy) -> None:
+        """
+        Forgets the decision of an enemy that is dead or gone.
+
+        Parameters
+        ----------
+        enemy : Enemies
+            The enemy.
+        """
+        self.decisions.pop(enemy, None)
@@ -0,0 +1,250 @@
+"""
+Module for finding the best builds (race, weapon and starting potions) by simulating the campaign of the story.
+
+Simulating every build with a high precision wastes most of the simulations on builds that are clearly bad. The
+optimizer uses successive halving instead: every candidate build plays a few campaigns, the worse half is discarded,
+and the survivors play twice as many campaigns in the next round, their results accumulating, until few builds are
+left. The builds are then ranked by their mean score, with a confidence interval.
+
+Imports:
+--------
+- `math`: Provides `sqrt`, used by the confidence intervals.
+- `random`: Seeded, so that an optimization is reproducible.
+- `itertools`: Provides `combinations_with_replacement` and `product`, used to enumerate the builds.
+- `typing`: Provides `NamedTuple`, used for the builds.
+- `backpack`: Provides the names of the potions.
+- `characters`: Provides the names of the races and weapons, and the race factory, read for the maximum hp.
+- `simulation`: Provides the headless simulator of the campaign.
+
+Classes:
+--------
+- Build: A race, a weapon and the potions the character starts with.
+- BuildStats: The accumulated results of the campaigns played by a build.
+
+Functions:
+----------
+- loadouts: Enumerates the potion loadouts.
+- all_builds: Enumerates the candidate builds.
+- campaign_score: Scores the result of a campaign.
+- successive_halving: Ranks builds by successive halving.
+
+Example:
+--------
+ranking, simulations = successive_halving(all_builds())
+for build, stats in ranking[:5]:
+    print(build, stats.mean, stats.bounds())
+"""
+
+import math
+import random
+from itertools import combinations_with_replacement, product
+from typing import NamedTuple
+
+from backpack import MAPPING as ITEMS
+from characters import MAPPING, RACE_FACTORY
+from simulation import simulate_campaign
+
+
+POTIONS = tuple(ITEMS)
+
+
+class Build(NamedTuple):
+    """A race, a weapon and the potions the character starts with."""
+    race: str
+    weapon: str
+    items: tuple = ()
+
+    def __str__(self) -> str:
+        article = "an" if self.weapon[0] in "AEIOU" else "a"
+        return f"{self.race} with {article} {self.weapon}" + (f" and {', '.join(self.items)}" if self.items else "")
+
+
+class BuildStats:
+    """
+    A class accumulating the results of the campaigns played by a build.
+
+    Attributes
+    ----------
+    runs : int
+        The number of campaigns played.
+    wins : int
+        The number of campaigns won.
+    total : float
+        The sum of the scores.
+    total_squares : float
+        The sum of the squared scores, used for the variance.
+    """
+
+    def __init__(self):
+        """
+        Initializes the statistics, with no campaign played.
+        """
+        self.runs = 0
+        self.wins = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def add(self, score, won) -> None:
+        """
+        Adds the result of a campaign.
+
+        Parameters
+        ----------
+        score : float
+            The score of the campaign.
+        won : bool
+            Whether the campaign was won.
+        """
+        self.runs += 1
+        self.wins += won
+        self.total += score
+        self.total_squares += score * score
+
+    @property
+    def mean(self) -> float:
+        """
+        The mean score of the campaigns played.
+        """
+        return self.total / self.runs if self.runs else 0.0
+
+    def bounds(self, z=1.96) -> tuple:
+        """
+        Returns the confidence interval of the mean score.
+
+        Parameters
+        ----------
+        z : float, optional
+            The quantile of the normal distribution for the confidence level (default is 1.96, for 95%).
+
+        Returns
+        -------
+        tuple
+            The lower and upper bounds of the mean score.
+        """
+        if self.runs < 2:
+            return 0.0, 1.0
+        variance = max(0.0, (self.total_squares - self.total * self.mean) / (self.runs - 1))
+        margin = z * math.sqrt(variance / self.runs)
+        return self.mean - margin, self.mean + margin
+
+
+def loadouts(max_potions=2):
+    """
+    Enumerates the potion loadouts, from no potion to `max_potions` potions.
+
+    Parameters
+    ----------
+    max_potions : int, optional
+        The maximum number of potions of a loadout (default is 2).
+
+    Yields
+    ------
+    tuple
+        The names of the potions of the loadout.
+    """
+    for size in range(max_potions + 1):
+        yield from combinations_with_replacement(POTIONS, size)
+
+
+def all_builds(max_potions=2) -> list:
+    """
+    Enumerates the candidate builds: every race, with every weapon and every potion loadout.
+
+    Parameters
+    ----------
+    max_potions : int, optional
+        The maximum number of potions of a loadout (default is 2).
+
+    Returns
+    -------
+    list
+        The builds.
+    """
+    return [
+        Build(race, weapon, items)
+        for race, weapon, items in product(MAPPING["race"], MAPPING["weapon"], loadouts(max_potions))
+    ]
+
+
+def campaign_score(build, result) -> float:
+    """
+    Scores the result of a campaign between 0 and 1: 0 for a loss, and from 0.5 to 1 for a win, depending on the
+    share of their hp the character kept.
+
+    Parameters
+    ----------
+    build : Build
+        The build that played the campaign.
+    result : CampaignResult
+        The result of the campaign.
+
+    Returns
+    -------
+    float
+        The score of the campaign.
+    """
+    if not result.won:
+        return 0.0
+    max_hp = RACE_FACTORY[build.race.lower()]().max_hp
+    return 0.5 + 0.5 * min(1.0, result.hp_left / max_hp)
+
+
+def successive_halving(builds, initial_runs=4, keep=0.5, survivors=4, score=campaign_score, seed=0) -> tuple:
+    """
+    Ranks builds by successive halving: all the builds play a few campaigns, then the worse half is discarded and the
+    survivors play twice as many campaigns, until `survivors` builds are left.
+
+    Parameters
+    ----------
+    builds : iterable
+        The candidate builds.
+    initial_runs : int, optional
+        The number of campaigns played by every build in the first round (default is 4).
+    keep : float, optional
+        The share of the builds kept after every round (default is 0.5).
+    survivors : int, optional
+        The number of builds of the last round (default is 4).
+    score : callable, optional
+        Scores a campaign, given the build and the result (default is `campaign_score`).
+    seed : int, optional
+        The seed of the random rolls (default is 0).
+
+    Returns
+    -------
+    tuple
+        The ranking, a list of (build, stats) pairs from the best to the worst (the builds discarded earlier being
+        ranked after the survivors of later rounds), and the number of campaigns simulated.
+    """
+    random.seed(seed)
+    stats = {build: BuildStats() for build in builds}
+    alive = list(stats)
+    discarded = []
+    runs = initial_runs
+    simulations = 0
+    while True:
+        for build in alive:
+            build_stats = stats[build]
+            for _ in range(runs):
+                result = simulate_campaign(*build)
+                build_stats.add(score(build, result), result.won)
+            simulations += runs
+        alive.sort(key=lambda build: stats[build].mean, reverse=True)
+        if len(alive) <= survivors:
+            break
+        cut = max(survivors, int(len(alive) * keep))
+        discarded = alive[cut:] + discarded
+        alive = alive[:cut]
+        runs *= 2
+    return [(build, stats[build]) for build in alive + discarded], simulations
+
+
+if __name__ == "__main__":
+    candidates = all_builds()
+    ranking, used = successive_halving(candidates)
+    final_runs = ranking[0][1].runs
+    print(f"{len(candidates)} builds, {used} campaigns simulated "
+          f"(an exhaustive sweep with {final_runs} campaigns per build would need {len(candidates) * final_runs})")
+    for rank, (best, best_stats) in enumerate(ranking[:10], 1):
+        low, high = best_stats.bounds()
+        print(f"{rank:>2}. {best}: score {best_stats.mean:.3f} [{low:.3f}, {high:.3f}], "
+              f"won {best_stats.wins}/{best_stats.runs}")
@@ -7,19 +7,24 @@ The module provides functionalities such as:
 - Validating user input for various character attributes.
 - Displaying text with a typewriter effect for better user experience.
 - Starting the character's race and weapon using corresponding factories.
+- Creating the main character through the active input provider.
 
 Imports:
 --------
 - `Sword`, `Bow`, `Axe`, `Slingshot`: Weapon classes imported from the `weapons` module.
 - `Ork`, `Goblin`, `Elf`, `Human`: Race classes imported from the `races` module.
 - `Backpack`: The player's backpack class imported from the `backpack` module.
+- `ask`, `pause`, `get_provider`: Functions of the `inputs` module, used for prompts and pauses.
+- `CommandTable`: Used to match the player's answers against the valid options.
+- `CooldownManager`: Tracks the cooldowns of the character's abilities.
 """
 
-import time
-
 from weapons import Sword, Bow, Axe, Slingshot
 from races import Ork, Goblin, Elf, Human
 from backpack import Backpack
+from inputs import ask, pause, get_provider
+from commands import CommandTable
+from cooldowns import CooldownManager
 
 
 MAPPING = {
@@ -64,6 +69,14 @@ class Character:
         A list containing information about the character's buffs.
     violence : int
         The character's violence score, increasing with aggressive actions.
+    abilities : list
+        All the abilities the character can use, from their weapon, race and items.
+    cooldowns : CooldownManager
+        Tracks which of the character's abilities are ready.
+
+    The character implements the `combatant.Combatant` protocol: its combat stats (`hp`, `attack_damage`,
+    `defence_points`, `critical`, `dodge`, `speed`) are read from its race and weapon through flat properties, so
+    the fights resolve its attacks like those of an enemy.
 
     Methods
     -------
@@ -71,8 +84,13 @@ class Character:
         Returns a string representation of the character's details.
     start():
         Initializes the character's race and weapon using the respective factory.
+    add_ability(ability):
+        Gives a new ability to the character.
     """
 
+    side = "player"
+    dodge = 0
+
     def __init__(self, name, gender, race, weapon):
         """
         Initializes the character with the provided attributes.
@@ -95,6 +113,8 @@ class Character:
         self.backpack = Backpack()
         self.buff_time = [0, ""]
         self.violence = 0
+        self.abilities = []
+        self.cooldowns = CooldownManager()
 
     def __str__(self) -> str:
         """
@@ -112,7 +132,8 @@ class Character:
         Initializes the character's race and weapon using the respective factory.
 
         This method is called to assign a specific instance of the race and weapon classes
-        to the character based on the provided race and weapon strings.
+        to the character based on the provided race and weapon strings. The abilities of the weapon
+        and the race are given to the character.
 
         Returns
         -------
@@ -120,11 +141,60 @@ class Character:
         """
         self.race = RACE_FACTORY.get(self.race.lower())()
         self.weapon = WEAPON_FACTORY.get(self.weapon.lower())()
+        for ability in [self.weapon.ability, *self.race.abilities]:
+            self.add_ability(ability)
+
+    def add_ability(self, ability) -> None:
+        """
+        Gives a new ability to the character, ready to be used.
+
+        Parameters
+        ----------
+        ability : Abilities
+            The ability to give, for example granted by an item.
+
+        Returns
+        -------
+        None
+        """
+        self.abilities.append(ability)
+        self.cooldowns.add(ability)
+
+    @property
+    def hp(self) -> float:
+        """The current health points, kept by the race."""
+        return self.race.hp
+
+    @hp.setter
+    def hp(self, value) -> None:
+        self.race.hp = value
+
+    @property
+    def attack_damage(self) -> float:
+        """The damage of a basic attack: the race's damage and the weapon's attack."""
+        return self.race.damage + self.weapon.attack
+
+    @property
+    def defence_points(self) -> int:
+        """The defence, in hundredths."""
+        return self.race.defence_points
+
+    @property
+    def critical(self) -> int:
+        """The chance of a critical hit, in percent, given by the weapon."""
+        return self.weapon.critical
+
+    @property
+    def speed(self) -> int:
+        """The initiative, given by the race."""
+        return self.race.speed
 
 
 def input_validation(var, validator) -> str:
     """
-    Validates the input by checking if it exists in the provided list of valid options.
+    Validates the input by checking if it matches one of the provided valid options.
+
+    The input is matched case insensitively, and any unambiguous prefix of an option is accepted.
 
     Parameters
     ----------
@@ -136,13 +206,14 @@ def input_validation(var, validator) -> str:
     Returns
     -------
     str
-        The validated input.
+        The valid option matching the input.
     """
     validator_str = "/".join(validator)
-    while var.capitalize() not in validator:
+    options = CommandTable(validator)
+    while (option := options.resolve(var)) is None:
         print(f"{var} is not a valid argument!")
-        var = input(f"Please input correct option : ({validator_str}) ")
-    return var
+        var = ask(f"Please input correct option : ({validator_str}) ")
+    return option
 
 
 def typewriter_effect(text, delay=0.04) -> None:
@@ -160,9 +231,12 @@ def typewriter_effect(text, delay=0.04) -> None:
     -------
     None
     """
+    if not get_provider().pauses:
+        print(text)
+        return
     for char in text:
         print(char, end="", flush=True)
-        time.sleep(delay)
+        pause(delay)
     print()
 
 
@@ -175,26 +249,36 @@ def choose_stats() -> dict:
     -------
     dict
         A dictionary containing the chosen character stats (name, gender, race, weapon).
+
+    The player is asked again, in the same loop, until they confirm their statistics.
     """
     typewriter_effect("Welcome to the magical world! Choose your statistics!")
-    name = input("But first, what is Your name: ")
-    gender = input("What's your gender? (M/F) ")
-    gender = input_validation(gender, MAPPING["gender"])
-    race = input("Now, what race are You? (Ork/Goblin/Elf/Human) ")
-    race = input_validation(race, MAPPING["race"])
-    weapon = input("Lastly, what weapon will You choose? (Sword/Bow/Axe/Slingshot) ")
-    weapon = input_validation(weapon, MAPPING["weapon"])
-
-    print(f"Name = {name}, Gender = {gender}, Race = {race}, Weapon = {weapon}.")
-    option = input("Is this correct? (Yes/No) ")
-    option = input_validation(option, MAPPING["option"])
-    if option == "No":
-        choose_stats()
-    return {"name": name, "gender": gender, "race": race, "weapon": weapon}
-
-
-# Start of the main character creation process
-stats = choose_stats()
-
-main_character = Character(stats["name"], stats["gender"], stats["race"], stats["weapon"])
-main_character.start()
+    while True:
+        name = ask("But first, what is Your name: ")
+        gender = ask("What's your gender? (M/F) ")
+        gender = input_validation(gender, MAPPING["gender"])
+        race = ask("Now, what race are You? (Ork/Goblin/Elf/Human) ")
+        race = input_validation(race, MAPPING["race"])
+        weapon = ask("Lastly, what weapon will You choose? (Sword/Bow/Axe/Slingshot) ")
+        weapon = input_validation(weapon, MAPPING["weapon"])
+
+        print(f"Name = {name}, Gender = {gender}, Race = {race}, Weapon = {weapon}.")
+        option = ask("Is this correct? (Yes/No) ")
+        option = input_validation(option, MAPPING["option"])
+        if option == "Yes":
+            return {"name": name, "gender": gender, "race": race, "weapon": weapon}
+
+
+def create_main_character() -> Character:
+    """
+    Starts the main character creation process, asking the player for their statistics.
+
+    Returns
+    -------
+    Character
+        The started main character.
+    """
+    stats = choose_stats()
+    main_character = Character(stats["name"], stats["gender"], stats["race"], stats["weapon"])
+    main_character.start()
+    return main_character
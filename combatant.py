@@ -0,0 +1,199 @@
+"""
+Module for the `Combatant` protocol, the flat stats through which every fighter is read, and for duels between any
+two of them.
+
+A character keeps its stats on its race and its weapon, while an enemy keeps them on itself. Both now expose the same
+flat stats (`hp`, `attack_damage`, `defence_points`, `critical`, `dodge`, `speed`) and the `side` they fight for, so
+`fight.resolve_attack` resolves every basic attack with the same code: a character against an enemy, an enemy against
+a character, and just as well a character against a character or an enemy against an enemy, as in `duel`.
+
+Running this module benchmarks `resolve_attack` against the two attacks it replaced, on the same rolls.
+
+Imports:
+--------
+- `random`: Seeds the rolls of the benchmark.
+- `sys`: Reads the number of attacks of the benchmark from the command line.
+- `time`: Provides `perf_counter`, used to time the benchmark.
+- `typing`: Provides `Protocol`, used to declare the combatant interface.
+- `events`: Provides the events published by the replaced attacks.
+- `fight`: Provides `resolve_attack`.
+- `formulas`: Provides the damage formulas used by the replaced attacks.
+- `simulation`: Builds the fighters of the benchmark.
+
+Classes:
+--------
+- Combatant: The stats of a fighter, implemented by `characters.Character` and `enemies.Enemies`.
+
+Functions:
+----------
+- duel: Fights two combatants against each other until one falls.
+- benchmark: Times `resolve_attack` against the replaced attacks.
+
+Example:
+--------
+winner = duel(build_enemy("bear"), build_enemy("werewolf"))
+"""
+
+import random
+import sys
+import time
+from typing import Protocol, runtime_checkable
+
+from events import BUS, Critical, Defeat, Dodge, Hit, Victory
+from fight import resolve_attack
+from formulas import get_formulas
+from simulation import build_character, build_enemy
+
+
+@runtime_checkable
+class Combatant(Protocol):
+    """
+    The stats of a fighter, as read by `fight.resolve_attack`.
+
+    Attributes
+    ----------
+    side : str
+        The side of the fighter ("player" or "enemy"), deciding its rolls, its critical hit formula and the outcome
+        of its defeat (see `fight.SIDES`).
+    hp : float
+        The current health points, written when the fighter is hit.
+    attack_damage : float
+        The damage of a basic attack, before a critical hit and the target's defence.
+    defence_points : int
+        The defence, in hundredths (see `fixedpoint`).
+    critical : int
+        The chance of a critical hit, in percent.
+    dodge : int
+        The chance of dodging an attack, in percent (0 if the fighter never dodges, and then it isn't rolled).
+    speed : int
+        The initiative, deciding who acts first.
+    """
+    side: str
+    hp: float
+    attack_damage: float
+    defence_points: int
+    critical: int
+    dodge: int
+    speed: int
+
+
+def duel(first, second, max_turns=500) -> Combatant | None:
+    """
+    Fights two combatants against each other with basic attacks, the fastest one attacking first, until one falls.
+
+    Parameters
+    ----------
+    first : Combatant
+        A combatant, attacking first if the speeds are equal.
+    second : Combatant
+        The other combatant.
+    max_turns : int, optional
+        The number of attacks after which the duel is a draw (default is 500).
+
+    Returns
+    -------
+    Combatant | None
+        The winner, or None if nobody fell in time.
+    """
+    fighters = (first, second) if first.speed >= second.speed else (second, first)
+    for turn in range(max_turns):
+        attacker, target = fighters[turn % 2], fighters[1 - turn % 2]
+        resolve_attack(attacker, target)
+        if target.hp <= 0:
+            return attacker
+    return None
+
+
+def _replaced_basic_attack(character, enemy) -> str | None:
+    """
+    The basic attack of the character, as `fight.basic_attack` resolved it before `resolve_attack`.
+    """
+    my_dmg = character.race.damage + character.weapon.attack
+    my_crit = list(range(character.weapon.critical))
+    dodged = list(range(enemy.dodge))
+    if random.randint(0, 99) in dodged:
+        BUS.publish(Dodge("player"))
+        return "Dodge"
+    formulas = get_formulas()
+    if random.randint(0, 99) in my_crit:
+        my_dmg = formulas.player_critical(my_dmg)
+        BUS.publish(Critical("player"))
+    dealt = formulas.hit(my_dmg, enemy.defence_points)
+    enemy.hp = enemy.hp - dealt if enemy.hp > dealt else 0
+    BUS.publish(Hit("player", dealt, enemy.hp))
+    if enemy.hp == 0:
+        BUS.publish(Victory())
+        return "Won"
+    return None
+
+
+def _replaced_enemy_attack(character, enemy) -> str | None:
+    """
+    The attack of the enemy, as `fight.enemy_attack` resolved it before `resolve_attack`.
+    """
+    formulas = get_formulas()
+    enemy_dmg = enemy.damage
+    chance = list(range(enemy.critical))
+    if random.randint(0, 99) in chance:
+        enemy_dmg = formulas.enemy_critical(enemy_dmg)
+        BUS.publish(Critical("enemy"))
+    dealt = formulas.hit(enemy_dmg, character.race.defence_points)
+    if dealt < character.race.hp:
+        character.race.hp -= dealt
+    else:
+        character.race.hp = 0
+    BUS.publish(Hit("enemy", dealt, character.race.hp))
+    if character.race.hp == 0:
+        BUS.publish(Defeat())
+        return "Lost"
+    return None
+
+
+def benchmark(attacks=200_000, race="Human", weapon="Sword", enemy="bear") -> dict:
+    """
+    Times `resolve_attack` against the attacks it replaced, on the same fighters and the same rolls. The hp of the
+    fighters is restored after every exchange, so nobody falls.
+
+    Parameters
+    ----------
+    attacks : int, optional
+        The number of exchanges (a character's attack and an enemy's attack) timed (default is 200 000).
+    race : str, optional
+        The race of the character (default is "Human").
+    weapon : str, optional
+        The weapon of the character (default is "Sword").
+    enemy : str, optional
+        The name of the enemy (default is "bear").
+
+    Returns
+    -------
+    dict
+        The time of an exchange in nanoseconds, by implementation, and whether both dealt the same damage.
+    """
+    character, foe = build_character(race, weapon), build_enemy(enemy)
+    start_hp, foe_hp = character.race.hp, foe.hp
+    results = {}
+    for name, exchange in (
+        ("replaced", lambda: (_replaced_basic_attack(character, foe), _replaced_enemy_attack(character, foe))),
+        ("resolve_attack", lambda: (resolve_attack(character, foe), resolve_attack(foe, character))),
+    ):
+        random.seed(0)
+        damage = 0
+        start = time.perf_counter()
+        for _ in range(attacks):
+            exchange()
+            damage += start_hp - character.race.hp + foe_hp - foe.hp
+            character.race.hp, foe.hp = start_hp, foe_hp
+        results[name] = ((time.perf_counter() - start) / attacks * 1e9, damage)
+    return {
+        "replaced_ns": results["replaced"][0],
+        "resolve_attack_ns": results["resolve_attack"][0],
+        "same_damage": results["replaced"][1] == results["resolve_attack"][1],
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
+    print(f"replaced attacks: {report['replaced_ns']:.0f} ns per exchange")
+    print(f"resolve_attack:   {report['resolve_attack_ns']:.0f} ns per exchange")
+    print(f"same damage dealt: {report['same_damage']}")
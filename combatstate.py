@@ -0,0 +1,500 @@
+"""
+Module for an immutable representation of a fight, for snapshots, rewinds and searches that never copy objects.
+
+The live fight mutates the character's race, the enemy and the abilities in place. A `CombatState` is instead made of
+small frozen records (named tuples, so they are also hashable): the state of the character, of the enemy and of the
+weapon's ability. The rules of a round are pure functions returning a new state, built with `_replace`, so every
+record that didn't change is shared with the previous state rather than copied. Taking a snapshot is keeping a
+reference to a state, in O(1), and a `Timeline` of the states of every round rewinds to any earlier round by
+indexing.
+
+The pure rules follow the rules of the `fight` module, without touching the live objects or publishing any event.
+The enemy's turn is decided by its behavior tree, kept in its state, as in `fight.enemy_attack`: it may attack,
+defend, flee or use an ability, its guard and ability cooldowns being part of the state. The rolls are drawn from one
+generator in the order of the live fight (the dodge roll, then the critical roll of a basic attack, then the chance
+conditions of the enemy's tree and the critical roll of its attack), but not from the same streams, so a search or a
+what-if analysis is an estimate of the fight, not the fight the player will play. `CombatState.capture` and
+`CombatState.apply` convert between a state and the live objects, which is how the practice mode of the game rewinds a
+fight.
+
+Imports:
+--------
+- `typing`: Provides `NamedTuple`, used for the frozen records.
+- `backpack`: Provides the item `MAPPING`, used to apply items and restore the backpack.
+- `behavior`: Provides `decide`, used to play the decisions of the enemy's behavior tree.
+- `commands`: Provides `CommandTable`, used for the practice mode commands.
+- `fight`: Provides the combat commands, extended by the practice mode.
+- `fixedpoint`: Provides `to_points`, converting the defence of a potion to hundredths.
+- `formulas`: Provides the damage formulas, the same as the live fight's.
+
+Classes:
+--------
+- AbilityState: The stats of an ability.
+- CharacterState: The state of the character.
+- EnemyState: The state of the enemy.
+- CombatState: The state of a whole fight.
+- Timeline: The states of the rounds of a fight, for rewinds.
+
+Functions:
+----------
+- start_round: Applies the effects of the start of a round (cooldowns, buffs, damage over time).
+- act: Plays the action of the character, and the enemy's answer.
+- play_round: Plays a whole round.
+- legal_actions: Returns the actions the character can choose.
+- practice_commands: Returns the combat commands of the practice mode, with a Rewind command.
+
+Example:
+--------
+state = CombatState.capture(character, enemy)
+timeline = Timeline(state)
+state = timeline.record(play_round(state, ("Attack", None), random.Random(1)))
+state = timeline.rewind()
+"""
+
+from typing import NamedTuple
+
+from backpack import MAPPING
+from behavior import ATTACK, decide
+from commands import CommandTable
+from fight import COMBAT_COMMANDS
+from fixedpoint import to_points
+from formulas import get_formulas
+
+
+class AbilityState(NamedTuple):
+    """The stats of an ability, shared by all the states of a fight."""
+    name: str
+    damage: int
+    cooldown: int
+    d_o_t: int
+    d_o_t_time: int
+    damage_reduction: int
+    stun: int
+
+
+class CharacterState(NamedTuple):
+    """
+    The state of the character: their race's stats, weapon, buff, items and ability cooldown. The cooldowns of their
+    other abilities (from their race or items), which the pure rules don't play, are kept in the order of
+    `Character.abilities` so a rewind restores them.
+    """
+    hp: float
+    max_hp: float
+    damage: float
+    max_damage: float
+    defence_points: int
+    max_defence_points: int
+    attack: int
+    critical: int
+    ability: AbilityState
+    cooldown_left: int = 0
+    buff_time: int = 0
+    buff_stat: str = ""
+    items: tuple = ()
+    other_cooldowns: tuple = ()
+
+
+class EnemyState(NamedTuple):
+    """
+    The state of the enemy, its ability cooldowns being the sorted `(ability name, turns left)` pairs, and its behavior
+    tree the compiled tree of the live enemy (None for an enemy that always attacks).
+    """
+    hp: float
+    damage: float
+    defence_points: int
+    critical: int
+    dodge: int
+    d_o_t: int = 0
+    d_o_t_time: int = 0
+    stun: int = 0
+    guarding: bool = False
+    ability_cooldowns: tuple = ()
+    behavior: object = None
+
+
+class CombatState(NamedTuple):
+    """
+    The state of a whole fight, at the start of a round or after an action.
+
+    Attributes
+    ----------
+    turn : int
+        The number of rounds played.
+    character : CharacterState
+        The state of the character.
+    enemy : EnemyState
+        The state of the enemy.
+    outcome : str | None
+        "Won", "Lost" or "Fled" once the fight is over, "Stunned" or "Dodge" after such an action, None otherwise.
+    """
+    turn: int
+    character: CharacterState
+    enemy: EnemyState
+    outcome: str | None = None
+
+    @classmethod
+    def capture(cls, character, enemy, turn=0) -> "CombatState":
+        """
+        Captures the state of a live fight.
+
+        Parameters
+        ----------
+        character
+            The live character, already started.
+        enemy
+            The live enemy.
+        turn : int, optional
+            The number of rounds played (default is 0).
+
+        Returns
+        -------
+        CombatState
+            The state of the fight.
+        """
+        race, weapon, ability = character.race, character.weapon, character.weapon.ability
+        return cls(
+            turn,
+            CharacterState(
+                race.hp, race.max_hp, race.damage, race.max_damage, race.defence_points, race.max_defence_points,
+                weapon.attack, weapon.critical,
+                AbilityState(
+                    ability.name, ability.damage, ability.cooldown, ability.d_o_t, ability.d_o_t_time,
+                    ability.damage_reduction, ability.stun
+                ),
+                character.cooldowns.remaining(ability), character.buff_time[0], character.buff_time[1],
+                tuple(item.name for item in character.backpack.items),
+                tuple(character.cooldowns.remaining(other) for other in character.abilities if other is not ability),
+            ),
+            EnemyState(
+                enemy.hp, enemy.damage, enemy.defence_points, enemy.critical, enemy.dodge, enemy.d_o_t,
+                enemy.d_o_t_time, enemy.stun, enemy.guarding, tuple(sorted(enemy.ability_cooldowns.items())),
+                enemy.behavior,
+            ),
+        )
+
+    def apply(self, character, enemy) -> None:
+        """
+        Restores the live fight to this state.
+
+        Parameters
+        ----------
+        character
+            The live character.
+        enemy
+            The live enemy.
+        """
+        state = self.character
+        race = character.race
+        race.hp, race.damage, race.defence_points = state.hp, state.damage, state.defence_points
+        character.buff_time[0], character.buff_time[1] = state.buff_time, state.buff_stat
+        character.backpack.items = [MAPPING[name] for name in state.items]
+        character.cooldowns.set_remaining(character.weapon.ability, state.cooldown_left)
+        others = [ability for ability in character.abilities if ability is not character.weapon.ability]
+        for ability, turns in zip(others, state.other_cooldowns):
+            character.cooldowns.set_remaining(ability, turns)
+        for stat, value in self.enemy._asdict().items():
+            setattr(enemy, stat, value)
+        enemy.ability_cooldowns = dict(self.enemy.ability_cooldowns)
+
+
+class _TreeView(NamedTuple):
+    """The enemy as its behavior tree reads it, its ability cooldowns as a dict."""
+    behavior: object
+    hp: float
+    ability_cooldowns: dict
+
+
+def _enemy_turn(state, rng, defence_factor=1) -> CombatState:
+    """
+    The enemy's turn, as in `fight.enemy_attack`: the enemy decides with its behavior tree (an enemy without one
+    attacks), then its guard is lowered and its ability cooldowns advance, and it acts as in `fight.enemy_act`.
+    """
+    character, enemy = state.character, state.enemy
+    action, argument = ATTACK
+    if enemy.behavior is not None:
+        action, argument = decide(_TreeView(enemy.behavior, enemy.hp, dict(enemy.ability_cooldowns)), character, rng)
+    if enemy.guarding or enemy.ability_cooldowns:
+        enemy = enemy._replace(
+            defence_points=enemy.defence_points // 2 if enemy.guarding else enemy.defence_points, guarding=False,
+            ability_cooldowns=tuple((name, turns - 1) for name, turns in enemy.ability_cooldowns),
+        )
+        state = state._replace(enemy=enemy)
+    if action == "Defend":
+        enemy = enemy._replace(defence_points=enemy.defence_points * 2, guarding=True)
+        return state._replace(enemy=enemy, outcome=None)
+    if action == "Flee":
+        return state._replace(outcome="Fled")
+    formulas = get_formulas()
+    cooldowns = dict(enemy.ability_cooldowns)
+    if action == "Ability" and cooldowns.get(argument.name, 0) <= 0:
+        cooldowns[argument.name] = argument.cooldown
+        state = state._replace(enemy=enemy._replace(ability_cooldowns=tuple(sorted(cooldowns.items()))))
+        damage = argument.damage
+    else:
+        damage = enemy.damage
+        if rng.randint(0, 99) < enemy.critical:
+            damage = formulas.enemy_critical(damage)
+    dealt = formulas.hit(damage, character.defence_points * defence_factor)
+    hp = character.hp - dealt if dealt < character.hp else 0
+    return state._replace(character=character._replace(hp=hp), outcome="Lost" if hp == 0 else None)
+
+
+def _basic_attack(state, rng) -> CombatState:
+    """
+    The character's basic attack, as in `fight.basic_attack`.
+    """
+    character, enemy = state.character, state.enemy
+    if rng.randint(0, 99) < enemy.dodge:
+        return state._replace(outcome="Dodge")
+    damage = character.damage + character.attack
+    formulas = get_formulas()
+    if rng.randint(0, 99) < character.critical:
+        damage = formulas.player_critical(damage)
+    dealt = formulas.hit(damage, enemy.defence_points)
+    hp = enemy.hp - dealt if enemy.hp > dealt else 0
+    return state._replace(enemy=enemy._replace(hp=hp), outcome="Won" if hp == 0 else None)
+
+
+def _use_ability(state) -> CombatState:
+    """
+    The character's ability, as in `fight.use_ability`, the ability being put on cooldown.
+    """
+    character, enemy = state.character, state.enemy
+    ability = character.ability
+    dealt = get_formulas().hit(ability.damage, enemy.defence_points)
+    hp = enemy.hp - dealt if enemy.hp > dealt else 0
+    enemy = enemy._replace(hp=hp, d_o_t=ability.d_o_t, d_o_t_time=ability.d_o_t_time, stun=ability.stun)
+    state = state._replace(character=character._replace(cooldown_left=ability.cooldown), enemy=enemy)
+    if hp == 0:
+        return state._replace(outcome="Won")
+    if ability.damage_reduction > 0:
+        state = state._replace(enemy=enemy._replace(damage=enemy.damage - ability.damage_reduction))
+    return state._replace(outcome="Stunned" if enemy.stun > 0 else None)
+
+
+def _use_item(state, item_name) -> CombatState:
+    """
+    The character's item, as in `backpack.Backpack.use_item`, the item leaving the backpack.
+    """
+    character = state.character
+    items = list(character.items)
+    items.remove(item_name)
+    item = MAPPING[item_name]
+    amount, duration = item.how_much
+    match item.group:
+        case "Health Potions":
+            character = character._replace(hp=character.hp + amount)
+        case "Attack Potions":
+            character = character._replace(buff_time=duration, buff_stat="Attack", damage=character.damage + amount)
+        case "Defence Potions":
+            character = character._replace(
+                buff_time=duration, buff_stat="Defence", defence_points=character.defence_points + to_points(amount)
+            )
+    return state._replace(character=character._replace(items=tuple(items)))
+
+
+def start_round(state) -> CombatState:
+    """
+    Applies the effects of the start of a round, as in `main.fighting_sequence`: the cooldown and the buff run down,
+    the damage over time hits the enemy, and an expired buff is removed.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state at the end of the previous round.
+
+    Returns
+    -------
+    CombatState
+        The state before the character's action, with the "Won" outcome if the damage over time defeated the enemy.
+    """
+    character, enemy = state.character, state.enemy
+    character = character._replace(
+        cooldown_left=max(0, character.cooldown_left - 1), buff_time=character.buff_time - 1,
+        other_cooldowns=tuple(max(0, turns - 1) for turns in character.other_cooldowns),
+    )
+    if enemy.d_o_t_time > 0:
+        tick = get_formulas().dot_tick(enemy.d_o_t, enemy.d_o_t_time, enemy.hp)
+        hp = enemy.hp - tick if enemy.hp > tick else 0
+        enemy = enemy._replace(hp=hp, d_o_t_time=enemy.d_o_t_time - 1)
+        if hp == 0:
+            return CombatState(state.turn + 1, character, enemy, "Won")
+    if character.buff_time == 0 and character.buff_stat:
+        if character.buff_stat == "Attack":
+            character = character._replace(damage=character.max_damage)
+        elif character.buff_stat == "Defence":
+            character = character._replace(defence_points=character.max_defence_points)
+        character = character._replace(buff_stat="")
+    return CombatState(state.turn + 1, character, enemy)
+
+
+def act(state, action, rng) -> CombatState:
+    """
+    Plays the action of the character, and the enemy's answer, as the combat commands of the `fight` module do.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state before the action.
+    action : tuple
+        The action ("Attack", "Defend", "Ability" or "Item") and its argument (the item name, or None).
+    rng : random.Random
+        The generator of the rolls.
+
+    Returns
+    -------
+    CombatState
+        The state after the action.
+
+    Raises
+    ------
+    ValueError
+        If the ability is on cooldown, or the item is not in the backpack.
+    """
+    name, argument = action
+    if name == "Attack":
+        state = _basic_attack(state, rng)
+        return state if state.outcome == "Won" else _enemy_turn(state, rng)
+    if name == "Defend":
+        return _enemy_turn(state, rng, defence_factor=2)
+    if name == "Ability":
+        if state.character.cooldown_left > 0:
+            raise ValueError(f"The {state.character.ability.name} ability is on cooldown.")
+        state = _use_ability(state)
+        return state if state.outcome else _enemy_turn(state, rng)
+    if name == "Item":
+        if argument not in state.character.items:
+            raise ValueError(f"{argument} - You don't have this item!")
+        return _enemy_turn(_use_item(state, argument), rng)
+    raise ValueError(f"Unknown action: {name}")
+
+
+def play_round(state, action, rng) -> CombatState:
+    """
+    Plays a whole round: the start of the round, then the character's action unless the fight is already over.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state at the end of the previous round.
+    action : tuple
+        The action of the character and its argument.
+    rng : random.Random
+        The generator of the rolls.
+
+    Returns
+    -------
+    CombatState
+        The state at the end of the round.
+    """
+    state = start_round(state)
+    return state if state.outcome == "Won" else act(state, action, rng)
+
+
+def legal_actions(state) -> list:
+    """
+    Returns the actions the character can choose.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state before the action.
+
+    Returns
+    -------
+    list
+        The (action, argument) pairs: Attack, Defend, Ability if it is ready, and every different item.
+    """
+    actions = [("Attack", None), ("Defend", None)]
+    if state.character.cooldown_left <= 0:
+        actions.append(("Ability", None))
+    actions += [("Item", name) for name in dict.fromkeys(state.character.items)]
+    return actions
+
+
+class Timeline:
+    """
+    A class keeping the states of the rounds of a fight, for rewinds.
+
+    The states share their unchanged records, so keeping all of them costs little more than the records that changed.
+
+    Attributes
+    ----------
+    states : list
+        The states at the start of every round, the oldest first.
+    """
+
+    def __init__(self, state):
+        """
+        Initializes the timeline with the state at the start of the fight.
+
+        Parameters
+        ----------
+        state : CombatState
+            The state at the start of the fight.
+        """
+        self.states = [state]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of states recorded.
+        """
+        return len(self.states)
+
+    def record(self, state) -> CombatState:
+        """
+        Records the state at the start of a new round.
+
+        Parameters
+        ----------
+        state : CombatState
+            The state.
+
+        Returns
+        -------
+        CombatState
+            The same state, for chaining.
+        """
+        self.states.append(state)
+        return state
+
+    def rewind(self, rounds=1) -> CombatState:
+        """
+        Goes back a number of rounds, forgetting the later states.
+
+        Parameters
+        ----------
+        rounds : int, optional
+            The number of rounds to go back, stopping at the start of the fight (default is 1).
+
+        Returns
+        -------
+        CombatState
+            The state at the start of the round gone back to, which is still the last one recorded.
+        """
+        del self.states[max(1, len(self.states) - rounds):]
+        return self.states[-1]
+
+
+def practice_commands(timeline) -> CommandTable:
+    """
+    Returns the combat commands of the practice mode: the usual commands, and Rewind, which restores the fight to the
+    start of the previous round.
+
+    Parameters
+    ----------
+    timeline : Timeline
+        The timeline of the fight, with the state at the start of the current round last.
+
+    Returns
+    -------
+    CommandTable
+        The commands.
+    """
+    def rewind_command(character, enemy, weapon_ability) -> str:
+        timeline.rewind().apply(character, enemy)
+        print("You rewind the fight to the start of the previous round.")
+        return "Rewind"
+
+    commands = {name: COMBAT_COMMANDS.resolve(name) for name in COMBAT_COMMANDS.names()}
+    return CommandTable({**commands, "Rewind": rewind_command})
@@ -0,0 +1,139 @@
+"""
+Module that provides the command tables used to dispatch the player's answers.
+
+A command table maps the names of the commands the player can type to their actions. The answer is matched case
+insensitively, and any unambiguous prefix of a command name is accepted ("att" for "Attack"). Every accepted spelling
+is indexed when the command is registered, so resolving an answer is a single dictionary lookup, however many
+commands the table holds.
+
+Imports:
+--------
+- `ask` (from the `inputs` module): Used to prompt the player until a valid command is given.
+
+Classes:
+--------
+- CommandTable: A table of commands, resolved by case-insensitive prefix.
+
+Functions:
+----------
+- ask_choice: Prompts the player until their answer resolves to a command of a table.
+
+Example:
+--------
+# Ask for a yes/no answer
+answer = ask_choice("Continue? (Yes/No) ", CommandTable(["Yes", "No"]), "Please input Yes or No ")
+# Duplicated names are a single command
+CommandTable(["Small Health Potion", "Small Health Potion", "Big Health Potion"]).resolve("small")
+"""
+
+from inputs import ask
+
+
+class CommandTable:
+    """
+    A class representing a table of commands, resolved by case-insensitive prefix.
+
+    Attributes
+    ----------
+    actions : dict
+        The action of every command, by command name, in registration order.
+    prefixes : dict
+        The command name resolved by every accepted spelling, lowercased. Ambiguous prefixes resolve to None.
+    """
+
+    def __init__(self, commands=None):
+        """
+        Initializes the table with the given commands.
+
+        Parameters
+        ----------
+        commands : dict | iterable, optional
+            The commands, either as a mapping of names to actions, or as names alone, in which case every command's
+            action is its name.
+        """
+        self.actions = {}
+        self.prefixes = {}
+        if isinstance(commands, dict):
+            for name, action in commands.items():
+                self.register(name, action)
+        elif commands is not None:
+            for name in commands:
+                self.register(name)
+
+    def register(self, name, action=None) -> None:
+        """
+        Registers a command in the table. Registering a name already in the table only replaces its action, so a
+        table built from a list with duplicates (like the items of a backpack) resolves them like a single command.
+
+        Parameters
+        ----------
+        name : str
+            The name of the command.
+        action : optional
+            The action of the command (default is the name itself).
+        """
+        registered = name in self.actions
+        self.actions[name] = name if action is None else action
+        if registered:
+            return
+        lowered = name.lower()
+        for end in range(1, len(lowered)):
+            prefix = lowered[:end]
+            if prefix not in self.prefixes:
+                self.prefixes[prefix] = name
+            elif (owner := self.prefixes[prefix]) is not None and owner.lower() != prefix:
+                self.prefixes[prefix] = None
+        self.prefixes[lowered] = name
+
+    def resolve(self, answer):
+        """
+        Resolves the player's answer to the action of a command.
+
+        Parameters
+        ----------
+        answer : str
+            The answer typed by the player.
+
+        Returns
+        -------
+        object | None
+            The action of the matching command, or None if no command (or more than one) matches.
+        """
+        if name := self.prefixes.get(answer.strip().lower()):
+            return self.actions[name]
+        return None
+
+    def names(self) -> list:
+        """
+        Returns the names of the commands.
+
+        Returns
+        -------
+        list
+            The names of the commands, in registration order.
+        """
+        return list(self.actions)
+
+
+def ask_choice(prompt, table, retry_prompt):
+    """
+    Prompts the player until their answer resolves to a command of the table.
+
+    Parameters
+    ----------
+    prompt : str
+        The first question shown to the player.
+    table : CommandTable
+        The commands the player can choose from.
+    retry_prompt : str
+        The question shown after an invalid answer.
+
+    Returns
+    -------
+    object
+        The action of the chosen command.
+    """
+    answer = ask(prompt)
+    while (action := table.resolve(answer)) is None:
+        answer = ask(retry_prompt)
+    return action
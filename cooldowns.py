@@ -0,0 +1,169 @@
+"""
+Module that keeps track of the cooldowns of the abilities of a combatant.
+
+A combatant can carry several abilities (from their weapon, their race, their items, ...). The `CooldownManager`
+keeps the abilities that are cooling down in a heap ordered by the turn they become ready again, so advancing a turn
+only touches the abilities that just became ready, and listing the ready abilities costs O(k) for the k ready ones,
+instead of scanning every ability of the combatant.
+
+Imports:
+--------
+- `heapq`: Provides the heap of the abilities cooling down.
+- `itertools`: Provides `count`, used to order the abilities becoming ready on the same turn.
+
+Classes:
+--------
+- CooldownManager: Tracks the readiness of a set of abilities, turn after turn.
+
+Example:
+--------
+triple_cut, burning_arrow = TripleCut(), BurningArrow()
+cooldowns = CooldownManager([triple_cut, burning_arrow])
+cooldowns.trigger(triple_cut)
+cooldowns.tick()
+print(cooldowns.ready())
+"""
+
+import heapq
+from itertools import count
+
+
+class CooldownManager:
+    """
+    A class tracking the readiness of a set of abilities, turn after turn.
+
+    The `current_cooldown` of an ability is set to its cooldown when it is triggered, and back to 0 when it is ready
+    again. In between, `remaining` gives the exact number of turns left.
+
+    Attributes
+    ----------
+    turn : int
+        The current turn.
+    ready_turns : dict
+        The turn at which every ability cooling down becomes ready.
+    """
+
+    def __init__(self, abilities=()):
+        """
+        Initializes the manager with the given abilities, all of them ready.
+
+        Parameters
+        ----------
+        abilities : iterable, optional
+            The abilities of the combatant.
+        """
+        self.turn = 0
+        self.ready_turns = {}
+        self._ready = {}
+        self._waiting = []
+        self._order = count()
+        for ability in abilities:
+            self.add(ability)
+
+    def add(self, ability) -> None:
+        """
+        Adds an ability to the manager, ready to be used.
+
+        Parameters
+        ----------
+        ability
+            The ability to add.
+        """
+        ability.current_cooldown = 0
+        self._ready[ability] = None
+
+    def trigger(self, ability) -> None:
+        """
+        Puts an ability on cooldown, after it has been used. An ability without cooldown stays ready.
+
+        Parameters
+        ----------
+        ability
+            The ability used.
+        """
+        self.set_remaining(ability, ability.cooldown)
+
+    def set_remaining(self, ability, turns) -> None:
+        """
+        Sets the number of turns before an ability is ready again, for example when a saved state is restored.
+
+        Parameters
+        ----------
+        ability
+            The ability.
+        turns : int
+            The number of turns left, 0 (or less) for a ready ability.
+        """
+        if turns <= 0:
+            self.ready_turns.pop(ability, None)
+            ability.current_cooldown = 0
+            self._ready[ability] = None
+            return
+        self._ready.pop(ability, None)
+        ability.current_cooldown = turns
+        self.ready_turns[ability] = self.turn + turns
+        heapq.heappush(self._waiting, (self.turn + turns, next(self._order), ability))
+
+    def tick(self) -> list:
+        """
+        Advances to the next turn.
+
+        Returns
+        -------
+        list
+            The abilities that became ready on this turn.
+        """
+        self.turn += 1
+        became_ready = []
+        while self._waiting and self._waiting[0][0] <= self.turn:
+            ready_turn, _, ability = heapq.heappop(self._waiting)
+            if self.ready_turns.get(ability) != ready_turn:
+                continue
+            del self.ready_turns[ability]
+            ability.current_cooldown = 0
+            self._ready[ability] = None
+            became_ready.append(ability)
+        return became_ready
+
+    def ready(self) -> list:
+        """
+        Returns the abilities that can be used on this turn.
+
+        Returns
+        -------
+        list
+            The ready abilities, in the order they became ready.
+        """
+        return list(self._ready)
+
+    def is_ready(self, ability) -> bool:
+        """
+        Checks if an ability can be used on this turn.
+
+        Parameters
+        ----------
+        ability
+            The ability to check.
+
+        Returns
+        -------
+        bool
+            True if the ability is ready, False if it is cooling down.
+        """
+        return ability in self._ready
+
+    def remaining(self, ability) -> int:
+        """
+        Returns the number of turns before an ability is ready again, without changing the ability.
+
+        Parameters
+        ----------
+        ability
+            The ability to check.
+
+        Returns
+        -------
+        int
+            The number of turns left, 0 if the ability is ready.
+        """
+        return self.ready_turns.get(ability, self.turn) - self.turn
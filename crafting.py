@@ -0,0 +1,249 @@
+"""
+Module for crafting: recipes turning combinations of backpack items into a new item.
+
+A recipe needs a multiset of items (two Small Health Potions, or one of each small potion), whatever their order in
+the backpack. Every recipe is indexed by the canonical key of its multiset, the sorted `(item name, count)` pairs, so
+finding the recipe of a combination of items is a single dictionary lookup, however many recipes there are.
+
+Finding every recipe the backpack can make looks up the keys of the sub-multisets of the backpack, up to the size of
+the largest recipe, which are few for a backpack of five items. When the backpack has more sub-multisets than there
+are recipes, the recipes are checked against the backpack instead, so the search costs the smaller of the two.
+
+Imports:
+--------
+- `json`: Used to read the recipes.
+- `os`: Used to locate the default recipe file next to this module.
+- `collections`: Provides `Counter`, used to count the items.
+- `functools`: Provides `lru_cache`, used to load the recipes once.
+- `math`: Provides `prod`, used to count the sub-multisets of the backpack.
+- `typing`: Provides `NamedTuple`, used for the recipes.
+- `backpack`: Provides the item `MAPPING`, used to check the items of the recipes.
+
+Classes:
+--------
+- Recipe: A recipe.
+- RecipeBook: The recipes, indexed by the multiset of their ingredients.
+
+Functions:
+----------
+- recipe_key: Returns the canonical key of a multiset of items.
+- compile_recipes: Builds a recipe book from its data.
+- load_recipes: Loads and builds the recipe book from a file, once.
+- craft: Crafts a recipe from the items of a backpack.
+
+Data format:
+------------
+The recipe file is a list of recipes, each with the `ingredients` it needs, mapping item names to counts, and the
+name of its `result`.
+
+Example:
+--------
+book = load_recipes()
+for recipe in book.craftable(item.name for item in character.backpack.items):
+    print(recipe)
+"""
+
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+from math import prod
+from typing import NamedTuple
+
+from backpack import MAPPING
+
+
+RECIPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json")
+
+
+def recipe_key(names) -> tuple:
+    """
+    Returns the canonical key of a multiset of items, the same whatever the order of the items.
+
+    Parameters
+    ----------
+    names : iterable
+        The names of the items, repeated as many times as there are items.
+
+    Returns
+    -------
+    tuple
+        The sorted `(item name, count)` pairs.
+    """
+    return tuple(sorted(Counter(names).items()))
+
+
+class Recipe(NamedTuple):
+    """A recipe: the `(item name, count)` pairs of its ingredients, as in `recipe_key`, and the name of its result."""
+    ingredients: tuple
+    result: str
+
+    def __str__(self) -> str:
+        return " + ".join(f"{count} {name}" for name, count in self.ingredients) + f" -> {self.result}"
+
+
+class RecipeBook:
+    """
+    A class indexing recipes by the multiset of their ingredients.
+
+    Attributes
+    ----------
+    index : dict
+        The recipes of every ingredient key.
+    max_size : int
+        The number of ingredients of the largest recipe.
+    """
+
+    def __init__(self, recipes):
+        """
+        Indexes the recipes.
+
+        Parameters
+        ----------
+        recipes : iterable
+            The recipes.
+        """
+        self.index = {}
+        self.max_size = 0
+        for recipe in recipes:
+            self.index.setdefault(recipe.ingredients, []).append(recipe)
+            self.max_size = max(self.max_size, sum(count for _, count in recipe.ingredients))
+
+    def __len__(self) -> int:
+        return sum(len(recipes) for recipes in self.index.values())
+
+    def recipes_for(self, names) -> list:
+        """
+        Returns the recipes needing exactly the given items.
+
+        Parameters
+        ----------
+        names : iterable
+            The names of the items.
+
+        Returns
+        -------
+        list
+            The recipes, empty if no recipe needs these items.
+        """
+        return self.index.get(recipe_key(names), [])
+
+    def craftable(self, names) -> list:
+        """
+        Returns the recipes that can be made from some of the given items.
+
+        Parameters
+        ----------
+        names : iterable
+            The names of the available items, like the items of a backpack.
+
+        Returns
+        -------
+        list
+            The recipes whose ingredients are all available.
+        """
+        counts = recipe_key(names)
+        if prod(min(count, self.max_size) + 1 for _, count in counts) > len(self.index):
+            available = dict(counts)
+            return [
+                recipe for key, recipes in self.index.items()
+                if all(available.get(name, 0) >= count for name, count in key) for recipe in recipes
+            ]
+        return [recipe for key in self._subsets(counts) for recipe in self.index.get(key, ())]
+
+    def _subsets(self, counts) -> list:
+        """
+        Returns the keys of the non-empty sub-multisets of a multiset, up to the size of the largest recipe.
+
+        Parameters
+        ----------
+        counts : tuple
+            The key of the multiset, as returned by `recipe_key`.
+
+        Returns
+        -------
+        list
+            The keys of the sub-multisets, canonical as the pairs keep the order of the multiset.
+        """
+        partial = [((), 0)]
+        for name, count in counts:
+            partial = [
+                (key + ((name, taken),) if taken else key, size + taken)
+                for key, size in partial for taken in range(min(count, self.max_size - size) + 1)
+            ]
+        return [key for key, size in partial if size]
+
+
+def compile_recipes(data) -> RecipeBook:
+    """
+    Builds a recipe book from its data.
+
+    Parameters
+    ----------
+    data : list
+        The recipes, each with its `ingredients` counts and its `result`.
+
+    Returns
+    -------
+    RecipeBook
+        The recipe book.
+
+    Raises
+    ------
+    ValueError
+        If an ingredient or a result is not a known item, or a recipe has no ingredient.
+    """
+    recipes = []
+    for recipe in data:
+        ingredients = {name: count for name, count in recipe["ingredients"].items() if count > 0}
+        for name in [*ingredients, recipe["result"]]:
+            if name not in MAPPING:
+                raise ValueError(f"Unknown item '{name}' in the recipe of '{recipe['result']}'")
+        if not ingredients:
+            raise ValueError(f"The recipe of '{recipe['result']}' has no ingredient")
+        recipes.append(Recipe(tuple(sorted(ingredients.items())), recipe["result"]))
+    return RecipeBook(recipes)
+
+
+@lru_cache(maxsize=None)
+def load_recipes(path=None) -> RecipeBook:
+    """
+    Loads and builds the recipe book from a file. The book is cached, so it is only built once.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the recipe file (default is `recipes.json` next to this module).
+
+    Returns
+    -------
+    RecipeBook
+        The recipe book.
+    """
+    with open(path or RECIPES_PATH, encoding="utf-8") as recipe_file:
+        return compile_recipes(json.load(recipe_file))
+
+
+def craft(backpack, recipe) -> bool:
+    """
+    Crafts a recipe from the items of a backpack: its ingredients are taken out, and its result put in.
+
+    Parameters
+    ----------
+    backpack : Backpack
+        The backpack holding the ingredients.
+    recipe : Recipe
+        The recipe.
+
+    Returns
+    -------
+    bool
+        True if the item was crafted, False if the backpack misses some ingredients.
+    """
+    available = Counter(item.name for item in backpack.items)
+    if any(available[name] < count for name, count in recipe.ingredients):
+        return False
+    for name, count in recipe.ingredients:
+        for _ in range(count):
+            backpack.delete_item(name)
+    return backpack.add_item(recipe.result)
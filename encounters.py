@@ -0,0 +1,289 @@
+"""
+Module for encounters between a party of characters and a horde of enemies.
+
+Every round, the living combatants act in the order of their speed: they are put in a priority queue keyed by their
+initiative, and popped one by one. Each side keeps a `TargetIndex` of the other side, a heap ordered by the targeting
+criterion (lowest hp, highest threat) in which stale entries are discarded lazily. Picking a target and updating it
+after a hit both cost O(log n), so a round with n combatants resolves in O(n log n).
+
+The characters and the enemies are read through the flat stats of the `combatant.Combatant` protocol, and every
+basic attack, whichever side makes it, is resolved by `fight.resolve_attack`.
+
+Imports:
+--------
+- `heapq`: Provides the priority queues of the turn order and of the targets.
+- `itertools`: Provides `count`, used to break ties between combatants in a stable way.
+- `events`: Provides the event bus `BUS`, flushed at the end of every round.
+- `fight`: Provides the combat functions used by the combatants on their turn.
+
+Classes:
+--------
+- TargetIndex: Indexes the combatants of one side by a targeting criterion.
+- Encounter: A fight between a party of characters and a horde of enemies.
+
+Example:
+--------
+encounter = Encounter([first_character, second_character], [Enemy1(), Enemy1(), Enemy2()])
+outcome = encounter.fight()
+"""
+
+import heapq
+from itertools import count
+
+from events import BUS
+from fight import resolve_attack, enemy_act, enemy_attack, use_ability, is_d_o_t_active
+
+
+TARGETING = {
+    "lowest_hp": lambda combatant: combatant.hp,
+    "highest_threat": lambda combatant: -combatant.attack_damage,
+}
+
+
+class TargetIndex:
+    """
+    A class indexing the living combatants of one side by a targeting criterion.
+
+    The combatants are kept in a heap of (key, order, combatant) entries. When a combatant's key changes, a new entry
+    is pushed, and the outdated entries are discarded when they reach the top of the heap.
+
+    Attributes
+    ----------
+    key : callable
+        The targeting criterion, the best target having the smallest key.
+    keys : dict
+        The current key of every living combatant.
+    """
+
+    def __init__(self, combatants, key):
+        """
+        Initializes the index with the given combatants.
+
+        Parameters
+        ----------
+        combatants : iterable
+            The combatants of the side.
+        key : callable | str
+            The targeting criterion, or its name in `TARGETING`.
+        """
+        self.key = TARGETING[key] if isinstance(key, str) else key
+        self.keys = {}
+        self._order = count()
+        self._heap = []
+        for combatant in combatants:
+            self.keys[combatant] = self.key(combatant)
+            self._heap.append((self.keys[combatant], next(self._order), combatant))
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of living combatants in the index.
+        """
+        return len(self.keys)
+
+    def update(self, combatant) -> None:
+        """
+        Updates a combatant after their stats changed, removing them if they are dead.
+
+        Parameters
+        ----------
+        combatant
+            The combatant whose stats changed.
+        """
+        if combatant.hp <= 0:
+            self.keys.pop(combatant, None)
+            return
+        key = self.key(combatant)
+        if self.keys.get(combatant) != key:
+            self.keys[combatant] = key
+            heapq.heappush(self._heap, (key, next(self._order), combatant))
+            if len(self._heap) > 4 * len(self.keys) + 16:
+                self._heap = [entry for entry in self._heap if self.keys.get(entry[2]) == entry[0]]
+                heapq.heapify(self._heap)
+
+    def best(self):
+        """
+        Returns the best target.
+
+        Returns
+        -------
+        object | None
+            The living combatant with the smallest key, or None if the whole side is dead.
+        """
+        while self._heap:
+            key, _, combatant = self._heap[0]
+            if self.keys.get(combatant) == key:
+                return combatant
+            heapq.heappop(self._heap)
+        return None
+
+    def remove(self, combatant) -> None:
+        """
+        Removes a combatant that left the fight, like an enemy that fled.
+
+        Parameters
+        ----------
+        combatant
+            The combatant.
+        """
+        self.keys.pop(combatant, None)
+
+
+class Encounter:
+    """
+    A class representing a fight between a party of characters and a horde of enemies.
+
+    The characters use the first of their abilities that is ready, or a basic attack. The enemies suffer their damage
+    over time, skip their turn while stunned, and otherwise act as their behavior tree decides. With a `Planner`, the
+    trees of the horde are evaluated once per round, within the planner's time budget.
+
+    Attributes
+    ----------
+    party : list
+        The characters of the party.
+    horde : list
+        The enemies of the horde.
+    party_targets : TargetIndex
+        The living characters, as targeted by the enemies.
+    horde_targets : TargetIndex
+        The living enemies, as targeted by the characters.
+    rounds : int
+        The number of rounds played.
+    planner : Planner | None
+        Evaluates the behavior trees of the horde, or None to evaluate every enemy's tree on its turn.
+    """
+
+    def __init__(self, party, horde, party_targeting="lowest_hp", horde_targeting="highest_threat", planner=None):
+        """
+        Initializes the encounter.
+
+        Parameters
+        ----------
+        party : list
+            The characters of the party, already started.
+        horde : list
+            The enemies of the horde.
+        party_targeting : str | callable, optional
+            How the characters choose the enemy they attack (default is "lowest_hp").
+        horde_targeting : str | callable, optional
+            How the enemies choose the character they attack (default is "highest_threat").
+        planner : Planner, optional
+            Evaluates the behavior trees of the horde within a time budget per round (default is none).
+        """
+        self.party = list(party)
+        self.horde = list(horde)
+        self.horde_targets = TargetIndex(self.horde, party_targeting)
+        self.party_targets = TargetIndex(self.party, horde_targeting)
+        self.rounds = 0
+        self.planner = planner
+
+    def turn_order(self) -> list:
+        """
+        Builds the priority queue of the living combatants for a new round.
+
+        Returns
+        -------
+        list
+            A heap of (negative speed, order, combatant, is character) entries.
+        """
+        order = count()
+        queue = [(-member.speed, next(order), member, True) for member in self.party_targets.keys]
+        queue += [(-enemy.speed, next(order), enemy, False) for enemy in self.horde_targets.keys]
+        heapq.heapify(queue)
+        return queue
+
+    def character_turn(self, character) -> None:
+        """
+        Plays the turn of a character: an ability if one is ready, a basic attack otherwise.
+
+        Parameters
+        ----------
+        character
+            The character whose turn it is.
+        """
+        character.cooldowns.tick()
+        target = self.horde_targets.best()
+        if ready := character.cooldowns.ready():
+            character.cooldowns.trigger(ready[0])
+            use_ability(ready[0], target)
+        else:
+            resolve_attack(character, target)
+        self.horde_targets.update(target)
+
+    def enemy_turn(self, enemy) -> None:
+        """
+        Plays the turn of an enemy: damage over time, then its decision unless the enemy is stunned.
+
+        Parameters
+        ----------
+        enemy
+            The enemy whose turn it is.
+        """
+        is_d_o_t_active(enemy)
+        self.horde_targets.update(enemy)
+        if enemy.hp <= 0:
+            return
+        if enemy.stun > 0:
+            enemy.stun -= 1
+            return
+        target = self.party_targets.best()
+        if self.planner:
+            outcome = enemy_act(enemy, target, self.planner.decision(enemy))
+        else:
+            outcome = enemy_attack(target, enemy)
+        if outcome == "Fled":
+            self.horde_targets.remove(enemy)
+            if self.planner:
+                self.planner.forget(enemy)
+        self.party_targets.update(target)
+
+    def play_round(self) -> str | None:
+        """
+        Plays one round, every living combatant acting once in the order of their speed. The events published during
+        the round are delivered to the subscribers of the event bus at its end.
+
+        Returns
+        -------
+        str | None
+            "Won" once no enemy is left and at least one was defeated, "Fled" if all of them ran away, "Lost" if the
+            party is defeated, or None if the fight continues.
+        """
+        self.rounds += 1
+        if self.planner:
+            self.planner.think(list(self.horde_targets.keys), self.party_targets.best())
+        queue = self.turn_order()
+        outcome = None
+        while queue and outcome is None:
+            _, _, combatant, is_character = heapq.heappop(queue)
+            if combatant.hp <= 0 or combatant not in (self.party_targets if is_character else self.horde_targets).keys:
+                continue
+            if is_character:
+                self.character_turn(combatant)
+            else:
+                self.enemy_turn(combatant)
+            if not self.horde_targets:
+                outcome = "Won" if any(enemy.hp <= 0 for enemy in self.horde) else "Fled"
+            elif not self.party_targets:
+                outcome = "Lost"
+        BUS.flush()
+        return outcome
+
+    def fight(self, max_rounds=1000) -> str | None:
+        """
+        Plays rounds until one side is defeated.
+
+        Parameters
+        ----------
+        max_rounds : int, optional
+            The maximum number of rounds played (default is 1000).
+
+        Returns
+        -------
+        str | None
+            "Won", "Fled" or "Lost", as returned by `play_round`, or None if the fight was not over after `max_rounds`
+            rounds.
+        """
+        while self.rounds < max_rounds:
+            if outcome := self.play_round():
+                return outcome
+        return None
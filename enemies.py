@@ -26,6 +26,8 @@ zombie = Zombie()
 print(zombie.hp)  # Output: 110
 """
 
+from fixedpoint import FixedPointStat
+
 
 class Enemies:
     """
@@ -38,7 +40,7 @@ class Enemies:
     damage : int
         The base damage the enemy deals.
     defence : float
-        The defense value that reduces damage taken.
+        The defense value that reduces damage taken, stored as integer hundredths (see `fixedpoint`).
     critical : int
         The chance of a critical hit in percentage.
     dodge : int
@@ -49,13 +51,30 @@ class Enemies:
         The duration for which damage over time is applied.
     noises : list
         A list of strings representing noises the enemy makes.
+    speed : int
+        The initiative of the enemy, deciding who acts first in a round.
+    stun : int
+        The number of rounds the enemy is still stunned for.
+    behavior : callable | None
+        The compiled behavior tree deciding the enemy's actions (see `behavior`), or None if it always attacks.
+    guarding : bool
+        Whether the enemy's defence is doubled until its next turn.
+    ability_cooldowns : dict
+        The number of turns before every ability the enemy used is ready again, by ability name.
+
+    The enemy implements the `combatant.Combatant` protocol, its stats being its own attributes.
 
     Methods
     -------
-    __init__(self, hp, damage, defence, critical, dodge, d_o_t, d_o_t_time, noises)
+    __init__(self, hp, damage, defence, critical, dodge, d_o_t, d_o_t_time, noises, speed=10)
         Initializes the enemy with specified attributes.
     """
-    def __init__(self, hp, damage, defence, critical, dodge, d_o_t, d_o_t_time, noises):
+
+    defence = FixedPointStat()
+    side = "enemy"
+    behavior = None
+
+    def __init__(self, hp, damage, defence, critical, dodge, d_o_t, d_o_t_time, noises, speed=10):
         self.hp = hp
         self.damage = damage
         self.defence = defence
@@ -64,6 +83,15 @@ class Enemies:
         self.d_o_t = d_o_t
         self.d_o_t_time = d_o_t_time
         self.noises = noises
+        self.speed = speed
+        self.stun = 0
+        self.guarding = False
+        self.ability_cooldowns = {}
+
+    @property
+    def attack_damage(self) -> int:
+        """The damage of a basic attack."""
+        return self.damage
 
 
 class Enemy1(Enemies):
@@ -87,7 +115,8 @@ class Enemy1(Enemies):
             dodge=15,
             d_o_t=0,
             d_o_t_time=0,
-            noises=["*growls at you*", "*loud squealing*", "*grunts*"]
+            noises=["*growls at you*", "*loud squealing*", "*grunts*"],
+            speed=11
         )
 
 
@@ -112,7 +141,8 @@ class Enemy2(Enemies):
             dodge=5,
             d_o_t=0,
             d_o_t_time=0,
-            noises=["*huffs at you*", "*loud growl*", "*roars*"]
+            noises=["*huffs at you*", "*loud growl*", "*roars*"],
+            speed=7
         )
 
 
@@ -140,7 +170,8 @@ class Enemy3(Enemies):
             dodge=20,
             d_o_t=0,
             d_o_t_time=0,
-            noises=["*screams*", "*loudly hisses*", "*growls silently*"]
+            noises=["*screams*", "*loudly hisses*", "*growls silently*"],
+            speed=6
         )
 
     @staticmethod
@@ -180,7 +211,8 @@ class Enemy4(Enemies):
             dodge=20,
             d_o_t=0,
             d_o_t_time=0,
-            noises=["*howls*", "*screams loudly*", "*growls painfully*"]
+            noises=["*howls*", "*screams loudly*", "*growls painfully*"],
+            speed=13
         )
 
     @staticmethod
@@ -201,3 +233,10 @@ Boar = Enemy1()
 Bear = Enemy2()
 Zombie = Enemy3()
 Werewolf = Enemy4()
+
+ENEMY_FACTORY = {
+    "boar": Enemy1,
+    "bear": Enemy2,
+    "zombie": Enemy3,
+    "werewolf": Enemy4
+}
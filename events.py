@@ -0,0 +1,537 @@
+"""
+Module that provides the combat event bus and the typed combat events.
+
+The combat functions in `fight` don't print anything about the outcome of an action. Instead, they publish small
+typed events (hits, criticals, dodges, ...) to the event bus, and the subscribers registered on the bus (console UI,
+logging, analytics, replay, ...) decide what to do with them. Events are only queued for the subscribers interested
+in their type, and they are delivered in batches when the bus is flushed, once per combat round. Formatting a message
+is the job of the subscribers, so the combat code never pays for output that nobody consumes.
+
+Subscribers are either called directly on flush, or run in their own thread with a bounded queue of batches. When the
+queue of a threaded subscriber is full, the bus either drops the batch (counting it) or blocks until there is room.
+
+Imports:
+--------
+- `logging`: Used by the logging subscriber.
+- `queue`: Provides the bounded queues of the threaded subscribers.
+- `threading`: Used to run the threaded subscribers.
+- `typing`: Provides `NamedTuple`, used to define the events.
+- `inputs`: Provides `pause`, used by the console subscriber to pace the fight.
+
+Classes:
+--------
+- Hit, Critical, Dodge, DotTick, BuffExpired, Stun, Victory, Defeat, AbilityUsed, DamageReduced, Defended, Noise,
+  EnemyAbilityUsed, EnemyDefended, Fled, ItemUsed: The combat events.
+- Subscription: A subscriber registered on the bus, with its pending events.
+- EventBus: The bus to which the combat code publishes events.
+- ConsoleSubscriber: Prints the events for the player, like the game always did.
+- LogSubscriber: Logs the events with the `logging` module.
+- EventRecorder: Records the events, for replays and analytics.
+
+Example:
+--------
+# Show the fights on the console
+BUS.subscribe(ConsoleSubscriber())
+"""
+
+import logging
+import queue
+import threading
+from typing import NamedTuple
+
+from inputs import pause
+
+
+class Hit(NamedTuple):
+    """Someone was hit. The attacker is "player" or "enemy", ability is the name of the ability used, if any."""
+    attacker: str
+    damage: float
+    hp_left: float
+    ability: str | None = None
+
+
+class Critical(NamedTuple):
+    """The attacker ("player" or "enemy") landed a critical hit."""
+    attacker: str
+
+
+class Dodge(NamedTuple):
+    """The attack of the attacker ("player" or "enemy") was dodged."""
+    attacker: str
+
+
+class DotTick(NamedTuple):
+    """The enemy suffered from damage over time."""
+    damage: int
+    hp_left: float
+
+
+class BuffExpired(NamedTuple):
+    """The buff of the character on the given stat ("Attack" or "Defence") ended."""
+    stat: str
+
+
+class Stun(NamedTuple):
+    """The enemy is stunned for the given number of rounds."""
+    rounds: int
+
+
+class Victory(NamedTuple):
+    """The enemy was defeated."""
+
+
+class Defeat(NamedTuple):
+    """The character was defeated."""
+
+
+class AbilityUsed(NamedTuple):
+    """The character used the named ability."""
+    name: str
+
+
+class DamageReduced(NamedTuple):
+    """The damage of the enemy was reduced by the given amount."""
+    amount: int
+
+
+class Defended(NamedTuple):
+    """The character decided to defend themselves."""
+
+
+class Noise(NamedTuple):
+    """The enemy made a noise."""
+    text: str
+
+
+class EnemyAbilityUsed(NamedTuple):
+    """The enemy used the named ability."""
+    name: str
+
+
+class EnemyDefended(NamedTuple):
+    """The enemy decided to defend itself."""
+
+
+class Fled(NamedTuple):
+    """The enemy ran away."""
+
+
+class ItemUsed(NamedTuple):
+    """The character used the named item from their backpack."""
+    name: str
+
+
+# Queued to stop the thread of a threaded subscriber.
+_STOP = None
+
+
+class Subscription:
+    """
+    A class representing a subscriber registered on the bus.
+
+    Attributes
+    ----------
+    handler : callable
+        The subscriber, called with a list of events.
+    event_types : tuple | None
+        The event types the subscriber wants, or None for all of them.
+    pending : list
+        The events published since the last flush.
+    batches : queue.Queue | None
+        The bounded queue of batches of a threaded subscriber, or None if the subscriber is called directly.
+    thread : threading.Thread | None
+        The thread of a threaded subscriber, until it is stopped.
+    overflow : str
+        What happens when the queue is full: "drop" the batch or "block" until there is room.
+    dropped : int
+        The number of batches dropped because the queue was full.
+    """
+
+    def __init__(self, handler, event_types=None, queue_size=None, overflow="drop"):
+        """
+        Initializes the subscription, starting the subscriber's thread if it has a queue.
+
+        Parameters
+        ----------
+        handler : callable
+            The subscriber, called with a list of events.
+        event_types : iterable, optional
+            The event types the subscriber wants (default is all of them).
+        queue_size : int, optional
+            The number of batches the subscriber's queue can hold. If given, the subscriber runs in its own thread.
+        overflow : str, optional
+            "drop" or "block", what happens when the queue is full (default is "drop").
+        """
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.handler = handler
+        self.event_types = tuple(event_types) if event_types is not None else None
+        self.pending = []
+        self.overflow = overflow
+        self.dropped = 0
+        self.batches = None
+        self.thread = None
+        if queue_size is not None:
+            self.batches = queue.Queue(maxsize=queue_size)
+            self.thread = threading.Thread(target=self._consume, daemon=True)
+            self.thread.start()
+
+    def deliver(self) -> None:
+        """
+        Delivers the pending events to the subscriber, as one batch.
+        """
+        batch, self.pending = self.pending, []
+        if self.batches is None:
+            self.handler(batch)
+        elif self.overflow == "block":
+            self.batches.put(batch)
+        else:
+            try:
+                self.batches.put_nowait(batch)
+            except queue.Full:
+                self.dropped += 1
+
+    def join(self) -> None:
+        """
+        Waits until a threaded subscriber has handled all the batches delivered to it.
+        """
+        if self.batches is not None:
+            self.batches.join()
+
+    def stop(self) -> None:
+        """
+        Stops the thread of a threaded subscriber, once it has handled all the batches delivered to it.
+        """
+        if self.thread is not None:
+            self.batches.put(_STOP)
+            self.thread.join()
+            self.thread = None
+
+    def _consume(self) -> None:
+        """
+        Hands the delivered batches to the subscriber, in the subscriber's thread, until it is stopped.
+        """
+        while True:
+            batch = self.batches.get()
+            try:
+                if batch is _STOP:
+                    return
+                self.handler(batch)
+            finally:
+                self.batches.task_done()
+
+
+class EventBus:
+    """
+    A class representing the bus to which the combat code publishes events.
+
+    Attributes
+    ----------
+    subscriptions : list
+        The registered subscriptions.
+    routes : dict
+        The subscriptions interested in every event type.
+    """
+
+    def __init__(self):
+        """
+        Initializes the bus with no subscriber.
+        """
+        self.subscriptions = []
+        self.routes = {}
+
+    def subscribe(self, handler, event_types=None, queue_size=None, overflow="drop") -> Subscription:
+        """
+        Registers a subscriber on the bus.
+
+        Parameters
+        ----------
+        handler : callable
+            The subscriber, called with a list of events.
+        event_types : iterable, optional
+            The event types the subscriber wants (default is all of them).
+        queue_size : int, optional
+            The number of batches the subscriber's queue can hold. If given, the subscriber runs in its own thread.
+        overflow : str, optional
+            "drop" or "block", what happens when the queue is full (default is "drop").
+
+        Returns
+        -------
+        Subscription
+            The subscription, which can be passed to `unsubscribe`.
+        """
+        subscription = Subscription(handler, event_types, queue_size, overflow)
+        self.subscriptions.append(subscription)
+        self._build_routes()
+        return subscription
+
+    def unsubscribe(self, subscription) -> None:
+        """
+        Removes a subscriber from the bus. The thread of a threaded subscriber is stopped, once it has handled the
+        batches already delivered to it.
+
+        Parameters
+        ----------
+        subscription : Subscription
+            The subscription returned by `subscribe`.
+        """
+        self.subscriptions.remove(subscription)
+        self._build_routes()
+        subscription.stop()
+
+    def _build_routes(self) -> None:
+        """
+        Rebuilds the subscriptions interested in every event type.
+        """
+        self.routes = {}
+        for event_type in EVENT_TYPES:
+            self.routes[event_type] = tuple(
+                subscription for subscription in self.subscriptions
+                if subscription.event_types is None or event_type in subscription.event_types
+            )
+
+    def wants(self, event_type) -> bool:
+        """
+        Checks if any subscriber is interested in the given event type.
+
+        Parameters
+        ----------
+        event_type : type
+            The event type.
+
+        Returns
+        -------
+        bool
+            True if at least one subscriber wants the events of this type, False otherwise.
+        """
+        return bool(self.routes.get(event_type))
+
+    def publish(self, event) -> None:
+        """
+        Queues an event for the subscribers interested in its type.
+
+        Parameters
+        ----------
+        event
+            The event to publish.
+        """
+        for subscription in self.routes.get(type(event), ()):
+            subscription.pending.append(event)
+
+    def flush(self) -> None:
+        """
+        Delivers the events published since the last flush, one batch per subscriber.
+        """
+        for subscription in self.subscriptions:
+            if subscription.pending:
+                subscription.deliver()
+
+    def join(self) -> None:
+        """
+        Flushes the bus and waits until the threaded subscribers have handled everything.
+        """
+        self.flush()
+        for subscription in self.subscriptions:
+            subscription.join()
+
+
+EVENT_TYPES = (
+    Hit, Critical, Dodge, DotTick, BuffExpired, Stun, Victory, Defeat, AbilityUsed, DamageReduced, Defended, Noise,
+    EnemyAbilityUsed, EnemyDefended, Fled, ItemUsed,
+)
+
+
+class ConsoleSubscriber:
+    """
+    A subscriber printing the events for the player, with the pauses the game always had.
+    """
+
+    def __call__(self, batch) -> None:
+        """
+        Prints a batch of events.
+
+        Parameters
+        ----------
+        batch : list
+            The events to print.
+        """
+        for event in batch:
+            if (message := self.format(event)) is not None:
+                print(message)
+            if seconds := self.delay(event):
+                pause(seconds)
+
+    @staticmethod
+    def delay(event) -> float:
+        """
+        Returns the pause after an event, giving the player time to read it.
+
+        Parameters
+        ----------
+        event
+            The event shown.
+
+        Returns
+        -------
+        float
+            The pause, in seconds.
+        """
+        match event:
+            case Hit(attacker="player", ability=None) | Critical(attacker="player") | Dodge() | Victory() | Defeat():
+                return 2
+            case Defended():
+                return 2
+            case Hit(attacker="player") | Critical() | AbilityUsed() | DamageReduced() | BuffExpired():
+                return 1
+            case EnemyAbilityUsed() | EnemyDefended() | Fled():
+                return 1
+        return 0
+
+    @staticmethod
+    def format(event) -> str | None:
+        """
+        Formats an event as the message shown to the player.
+
+        Parameters
+        ----------
+        event
+            The event to format.
+
+        Returns
+        -------
+        str | None
+            The message, or None if the event isn't shown (the backpack already tells which item was used).
+        """
+        match event:
+            case Hit(attacker="enemy"):
+                return f"They hit you with {event.damage} dmg, Your hp is now {event.hp_left}."
+            case Hit(ability=None):
+                return f"You hit the enemy with {event.damage} DMG, enemy hp left: {event.hp_left}"
+            case Hit():
+                return f"You hit the enemy for {event.damage} damage, their hp is now {event.hp_left}"
+            case Critical(attacker="enemy"):
+                return "Your enemy hits you with a critical!"
+            case Critical():
+                return "YOU CRITICALLY HIT THE ENEMY"
+            case Dodge():
+                return "ENEMY dodged the attack"
+            case DotTick():
+                return f"Enemy is suffering, They lost {event.damage} hp, Their hp is now {event.hp_left}"
+            case BuffExpired():
+                return "Your buff just ended!"
+            case Stun():
+                return "Your enemy is stunned!"
+            case Victory():
+                return "YOU WON!"
+            case Defeat():
+                return "YOU LOST"
+            case AbilityUsed():
+                return f"You chose to use {event.name}"
+            case DamageReduced():
+                return f"Your ability reduces enemy dmg! It's now {event.amount} less"
+            case Defended():
+                return "You decided to defend Yourself against your opponents attack. Great choice!"
+            case Noise():
+                return event.text
+            case EnemyAbilityUsed():
+                return f"Your enemy uses {event.name}!"
+            case EnemyDefended():
+                return "Your enemy braces itself for your next attack!"
+            case Fled():
+                return "Your enemy runs away!"
+            case ItemUsed():
+                return None
+        return str(event)
+
+
+class LogSubscriber:
+    """
+    A subscriber logging the events with the `logging` module.
+
+    Attributes
+    ----------
+    logger : logging.Logger
+        The logger used.
+    """
+
+    def __init__(self, logger=None):
+        """
+        Initializes the subscriber.
+
+        Parameters
+        ----------
+        logger : logging.Logger, optional
+            The logger used (default is the "combat" logger).
+        """
+        self.logger = logger or logging.getLogger("combat")
+
+    def __call__(self, batch) -> None:
+        """
+        Logs a batch of events.
+
+        Parameters
+        ----------
+        batch : list
+            The events to log.
+        """
+        for event in batch:
+            self.logger.info("%s", event)
+
+
+class EventRecorder:
+    """
+    A subscriber recording the events, for replays and analytics.
+
+    Attributes
+    ----------
+    rounds : list
+        The batches of events received, one per round.
+    """
+
+    def __init__(self):
+        """
+        Initializes the recorder with no round.
+        """
+        self.rounds = []
+
+    def __call__(self, batch) -> None:
+        """
+        Records a batch of events.
+
+        Parameters
+        ----------
+        batch : list
+            The events to record.
+        """
+        self.rounds.append(batch)
+
+    def count(self, event_type) -> int:
+        """
+        Counts the recorded events of the given type.
+
+        Parameters
+        ----------
+        event_type : type
+            The event type.
+
+        Returns
+        -------
+        int
+            The number of recorded events of this type.
+        """
+        return sum(isinstance(event, event_type) for batch in self.rounds for event in batch)
+
+    def replay(self, subscriber) -> None:
+        """
+        Replays the recorded rounds to another subscriber.
+
+        Parameters
+        ----------
+        subscriber : callable
+            The subscriber, called with every recorded batch.
+        """
+        for batch in self.rounds:
+            subscriber(batch)
+
+
+BUS = EventBus()
@@ -6,26 +6,180 @@ Imports:
 --------
 - `random`: Provides various functions for generating random numbers. Used to simulate randomness in the combat system,
 such as determining if an attack is dodged, critical, or if the enemy suffers from damage over time (DoT).
+All the rolls go through the active random number generators, which `set_rng` can replace (with seeded
+`random.Random`, for example), so simulations can control the roll streams.
 
-- `time`: Provides time-related functions, such as `sleep()`, used to create delays between different combat actions to
-make the experience feel more realistic and interactive.
+- `ask`, `pause` (from the `inputs` module): Prompt the active input provider for the player's decisions and create
+delays between different combat actions to make the experience feel more realistic and interactive.
+
+- `CommandTable`, `ask_choice` (from the `commands` module): Dispatch the player's answers to the combat commands.
 
 - `Backpack` (from the `backpack` module): The `Backpack` class is used to manage the player's inventory and allows the
 character to choose and use items from their backpack during combat.
+
+- `events`: The combat outcomes are published as typed events to the event bus `BUS`, instead of being printed. The
+subscribers registered on the bus decide how (and if) they are shown.
+
+- `load_recipes`, `craft` (from the `crafting` module): The recipes of the Craft command.
+
+- `decide` (from the `behavior` module): The decisions of the enemies, from their behavior trees.
+
+- `get_formulas` (from the `formulas` module): Returns the compiled damage formulas (critical hits, the reduction by
+the defence and the damage over time ticks), declared in `formulas.json`.
 """
 
 import random
-import time
-import sys
 from backpack import Backpack
+from inputs import ask, pause
+from commands import CommandTable, ask_choice
+from events import (
+    BUS, Hit, Critical, Dodge, DotTick, BuffExpired, Stun, Victory, Defeat, AbilityUsed, DamageReduced, Defended,
+    Noise, EnemyAbilityUsed, EnemyDefended, Fled, ItemUsed
+)
+from behavior import decide
+from crafting import craft, load_recipes
+from formulas import get_formulas
+
+YES_NO = CommandTable(["Yes", "No"])
+
+_rngs = (random, random)
+
+
+def set_rng(rng, enemy_rng=None) -> tuple:
+    """
+    Installs new random number generators for the combat rolls.
+
+    The rolls of the player's attacks and of the enemies' attacks can come from separate generators, so that two
+    simulations sharing the same seeds give the same rolls to the same attacks, even if they don't act alike.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The generator used for the rolls of the player's attacks (the `random` module for the global generator).
+    enemy_rng : random.Random, optional
+        The generator used for the rolls of the enemies' attacks (default is `rng`).
+
+    Returns
+    -------
+    tuple
+        The previously active generators, so they can be restored with `set_rng(*previous)`.
+    """
+    global _rngs  # pylint: disable=global-statement
+    previous, _rngs = _rngs, (rng, rng if enemy_rng is None else enemy_rng)
+    return previous
+
+
+# The roll stream, the critical hit formula and the outcome of a defeat of the combatants of every side. Outcomes are
+# told from the player's side: beating an enemy is "Won", a character being beaten is "Lost".
+SIDES = {
+    "player": (0, "player_critical", "Lost"),
+    "enemy": (1, "enemy_critical", "Won"),
+}
+
+
+def resolve_attack(attacker, target) -> str | None:
+    """
+    Resolves a basic attack between any two combatants: player against enemy, enemy against player, player against
+    player or enemy against enemy.
+
+    Both implement the `combatant.Combatant` protocol, so the same code reads their stats. The attack can be dodged
+    (the dodge is only rolled when the target can dodge) or critically hit, the rolls coming from the generator of the
+    attacker's side, and the damage is reduced by the target's defence.
+
+    Parameters
+    ----------
+    attacker : Combatant
+        The combatant attacking.
+    target : Combatant
+        The combatant attacked.
+
+    Returns
+    -------
+    str | None
+        "Dodge" if the attack was dodged, "Won" if the target was an enemy and is defeated, "Lost" if it was a player
+        character and is defeated, or None if the battle continues.
+    """
+    side = attacker.side
+    stream, critical_formula, defeat = SIDES[side]
+    rng = _rngs[stream]
+    if target.dodge and rng.randint(0, 99) < target.dodge:
+        BUS.publish(Dodge(side))
+        return "Dodge"
+    formulas = get_formulas()
+    damage = attacker.attack_damage
+    if rng.randint(0, 99) < attacker.critical:
+        damage = getattr(formulas, critical_formula)(damage)
+        BUS.publish(Critical(side))
+    return _deal(side, target, formulas.hit(damage, target.defence_points))
+
+
+def _deal(side, target, dealt, ability=None) -> str | None:
+    """
+    Deals damage to a target, publishing the hit, and its defeat if it falls.
+
+    Returns
+    -------
+    str | None
+        "Won" or "Lost" if the target is defeated, as in `resolve_attack`, or None if the battle continues.
+    """
+    hp = target.hp - dealt if target.hp > dealt else 0
+    target.hp = hp
+    BUS.publish(Hit(side, dealt, hp, ability))
+    if hp == 0:
+        outcome = SIDES[target.side][2]
+        BUS.publish(Victory() if outcome == "Won" else Defeat())
+        return outcome
+    return None
 
 
-def enemy_attack(character, enemy) -> None:
+def enemy_act(enemy, target, decision) -> str | None:
     """
-    Simulates an attack from the enemy on the character.
+    Plays the turn of an enemy, following its decision (see `behavior`).
 
-    This function calculates the damage based on the enemy's stats, including critical hits,
-    and updates the character's health accordingly.
+    The guard of the enemy's previous turn is lowered and the cooldowns of its abilities advance first. An ability
+    still on cooldown (a decision made a few ticks earlier can be outdated) is replaced by a basic attack.
+
+    Parameters
+    ----------
+    enemy
+        The enemy acting.
+    target : Combatant
+        The combatant the enemy is fighting.
+    decision : tuple
+        The action ("Attack", "Defend", "Flee" or "Ability") and its argument (the `EnemyAbility`, or None).
+
+    Returns
+    -------
+    str | None
+        "Fled" if the enemy ran away, "Lost" if the target is a character and is defeated, "Won" if it is an enemy and
+        is defeated, "Dodge" if the attack was dodged, or None if the battle continues.
+    """
+    if enemy.guarding:
+        enemy.defence_points //= 2
+        enemy.guarding = False
+    cooldowns = enemy.ability_cooldowns
+    for name, turns in cooldowns.items():
+        cooldowns[name] = turns - 1
+    action, argument = decision
+    if action == "Defend":
+        BUS.publish(EnemyDefended())
+        enemy.defence_points *= 2
+        enemy.guarding = True
+        return None
+    if action == "Flee":
+        BUS.publish(Fled())
+        return "Fled"
+    if action == "Ability" and cooldowns.get(argument.name, 0) <= 0:
+        cooldowns[argument.name] = argument.cooldown
+        BUS.publish(EnemyAbilityUsed(argument.name))
+        return _deal(enemy.side, target, get_formulas().hit(argument.damage, target.defence_points), argument.name)
+    return resolve_attack(enemy, target)
+
+
+def enemy_attack(character, enemy) -> str | None:
+    """
+    Plays the turn of the enemy against the character: the enemy decides with its behavior tree, and attacks if it
+    has none.
 
     Parameters
     ----------
@@ -36,31 +190,17 @@ def enemy_attack(character, enemy) -> None:
 
     Returns
     -------
-    None
+    str | None
+        "Lost" if the character is defeated, "Fled" if the enemy ran away, or None if the battle continues.
     """
-    enemy_dmg = enemy.damage
-    chance = list(range(enemy.critical))
-    if random.randint(0, 99) in chance:
-        enemy_dmg *= 1.5
-        print("Your enemy hits you with a critical!")
-        time.sleep(1)
-    if enemy_dmg // character.race.defence < character.race.hp:
-        character.race.hp -= enemy_dmg // character.race.defence
-    else:
-        character.race.hp = 0
-    print(f"They hit you with {enemy_dmg // character.race.defence} dmg, Your hp is now {character.race.hp}.")
-    if character.race.hp == 0:
-        print("YOU LOST")
-        time.sleep(2)
-        sys.exit(0)
+    return enemy_act(enemy, character, decide(enemy, character, _rngs[1]))
 
 
 def basic_attack(character, enemy) -> str | None:
     """
-    Performs a basic attack from the character to the enemy.
+    Performs a basic attack from the character to the enemy, with `resolve_attack`.
 
-    The attack can be dodged or critically hit. The function calculates the damage based
-    on the character's stats and updates the enemy's health.
+    The attack can be dodged or critically hit, and the enemy's health is updated.
 
     Parameters
     ----------
@@ -72,28 +212,10 @@ def basic_attack(character, enemy) -> str | None:
     Returns
     -------
     str | None
-        A string indicating the result of the attack ("Won" if the enemy is defeated),
-        or None if the battle continues.
-    """
-    my_dmg = character.race.damage + character.weapon.attack
-    my_crit = list(range(character.weapon.critical))
-    dodged = list(range(enemy.dodge))
-    if random.randint(0, 99) in dodged:
-        print("ENEMY dodged the attack")
-        time.sleep(2)
-        return "Dodge"
-    if random.randint(0, 99) in my_crit:
-        my_dmg *= 2
-        print("YOU CRITICALLY HIT THE ENEMY")
-        time.sleep(2)
-    enemy.hp = enemy.hp - my_dmg // enemy.defence if enemy.hp > my_dmg // enemy.defence else 0
-    print(f"You hit the enemy with {my_dmg // enemy.defence} DMG, enemy hp left: {enemy.hp}")
-    time.sleep(2)
-    if enemy.hp == 0:
-        print("YOU WON!")
-        time.sleep(2)
-        return "Won"
-    return None
+        A string indicating the result of the attack ("Won" if the enemy is defeated, "Dodge" if the attack was
+        dodged), or None if the battle continues.
+    """
+    return resolve_attack(character, enemy)
 
 
 def choosing_ability(weapon_ability) -> bool:
@@ -111,18 +233,19 @@ def choosing_ability(weapon_ability) -> bool:
         True if the player wants to use the ability, False otherwise.
     """
     print(weapon_ability)
-    time.sleep(2)
-    option = input("Do you want to use this ability? (Yes/No)  ")
-    while option.lower() not in ["yes", "no"]:
-        option = input("Please input the correct option. (Yes/No)  ")
-    return option.lower() == "yes"
+    pause(2)
+    option = ask_choice(
+        "Do you want to use this ability? (Yes/No)  ", YES_NO, "Please input the correct option. (Yes/No)  "
+    )
+    return option == "Yes"
 
 
 def use_ability(ability, enemy) -> str | None:
     """
     Uses the selected ability against the enemy.
 
-    This method applies the ability's damage, debuffs, and applies the cooldown to the ability.
+    This method applies the ability's damage and debuffs. Putting the ability on cooldown is left to the
+    cooldown manager of its owner.
 
     Parameters
     ----------
@@ -136,24 +259,21 @@ def use_ability(ability, enemy) -> str | None:
     str | None
         "Won" if the enemy is defeated, "Stunned" if the enemy is stunned, or None if the battle continues.
     """
-    print(f"You chose to use {ability.name}")
-    enemy.hp = enemy.hp - ability.damage // enemy.defence if enemy.hp > ability.damage // enemy.defence else 0
+    BUS.publish(AbilityUsed(ability.name))
+    dealt = get_formulas().hit(ability.damage, enemy.defence_points)
+    enemy.hp = enemy.hp - dealt if enemy.hp > dealt else 0
     enemy.d_o_t = ability.d_o_t
     enemy.d_o_t_time = ability.d_o_t_time
     enemy.stun = ability.stun
-    ability.current_cooldown = ability.cooldown
-    time.sleep(1)
-    print(f"You hit the enemy for {ability.damage // enemy.defence} damage, their hp is now {enemy.hp}")
-    time.sleep(1)
+    BUS.publish(Hit("player", dealt, enemy.hp, ability.name))
     if enemy.hp == 0:
-        print("YOU WON!")
+        BUS.publish(Victory())
         return "Won"
     if ability.damage_reduction > 0:
         enemy.damage -= ability.damage_reduction
-        print(f"Your ability reduces enemy dmg! It's now {ability.damage_reduction} less")
-        time.sleep(1)
+        BUS.publish(DamageReduced(ability.damage_reduction))
     if enemy.stun > 0:
-        print("Your enemy is stunned!")
+        BUS.publish(Stun(enemy.stun))
         return "Stunned"
     return None
 
@@ -175,18 +295,19 @@ def is_d_o_t_active(enemy) -> str | None:
         "Won" if the enemy is defeated, or None if the DoT is still active.
     """
     if enemy.d_o_t_time > 0:
-        enemy.hp = enemy.hp - enemy.d_o_t if enemy.hp > enemy.d_o_t else 0
-        print(f"Enemy is suffering, They lost {enemy.d_o_t} hp, Their hp is now {enemy.hp}")
+        tick = get_formulas().dot_tick(enemy.d_o_t, enemy.d_o_t_time, enemy.hp)
+        enemy.hp = enemy.hp - tick if enemy.hp > tick else 0
+        BUS.publish(DotTick(tick, enemy.hp))
         enemy.d_o_t_time -= 1
         if enemy.hp == 0:
-            print("YOU WON!")
+            BUS.publish(Victory())
             return "Won"
     return None
 
 
 def is_buff_over(character) -> bool | None:
     """
-    Checks if a character's buff has expired and resets their stats.
+    Checks if a character's buff has expired and resets their stats, publishing a `BuffExpired` event if so.
 
     Parameters
     ----------
@@ -204,13 +325,14 @@ def is_buff_over(character) -> bool | None:
         if character.buff_time[1] == "Attack":
             character.race.damage = character.race.max_damage
         elif character.buff_time[1] == "Defence":
-            character.race.defence = character.race.max_defence
+            character.race.defence_points = character.race.max_defence_points
+        BUS.publish(BuffExpired(character.buff_time[1]))
         character.buff_time[1] = ""
         return True
     return None
 
 
-def is_ability_cooldown(ability) -> bool:
+def is_ability_cooldown(ability, cooldowns) -> bool:
     """
     Checks if an ability is on cooldown.
 
@@ -218,16 +340,16 @@ def is_ability_cooldown(ability) -> bool:
     ----------
     ability
         The ability being checked for cooldown.
+    cooldowns
+        The cooldown manager of the ability's owner.
 
     Returns
     -------
     bool
         True if the ability is on cooldown, False otherwise.
     """
-    if ability.current_cooldown > 0:
-        print(
-            f"The {ability.name} ability is on cooldown, You need to wait {ability.current_cooldown} turns to use it"
-        )
+    if remaining := cooldowns.remaining(ability):
+        print(f"The {ability.name} ability is on cooldown, You need to wait {remaining} turns to use it")
         return True
     return False
 
@@ -248,19 +370,54 @@ def choose_item(character, enemy, weapon_ability) -> bool:
     Returns
     -------
     bool
-        True if an item was used, False otherwise.
+        True if an item was used, False if the player doesn't want to use any or doesn't have the item.
     """
     character.backpack.show_items()
-    pick = input("Type your item of choice, or 'No' if you don't want to use any item (Item name/No)")
-    if pick == "No":
-        choose_and_use(character, enemy, weapon_ability)
-    for item in character.backpack.items:
-        if pick == item.name:
-            Backpack.use_item(character, pick)
-            Backpack.delete_item(character.backpack, pick)
-            return True
-    print(f"{pick} - You don't have this item!")
-    return False
+    pick = ask("Type your item of choice, or 'No' if you don't want to use any item (Item name/No)")
+    choices = CommandTable([item.name for item in character.backpack.items] + ["No"])
+    if (item_name := choices.resolve(pick)) == "No":
+        return False
+    if item_name is None:
+        print(f"{pick} - You don't have this item!")
+        return False
+    Backpack.use_item(character, item_name)
+    Backpack.delete_item(character.backpack, item_name)
+    BUS.publish(ItemUsed(item_name))
+    return True
+
+
+def choose_ability(character, weapon_ability):
+    """
+    Allows the character to choose one of their abilities. A character with only their weapon's ability is asked
+    whether to use it, while a character with several abilities (from their race or items) picks one by name.
+
+    Parameters
+    ----------
+    character
+        The character choosing.
+    weapon_ability
+        The weapon's ability.
+
+    Returns
+    -------
+    Abilities | None
+        The chosen ability, or None if it is on cooldown, unknown, or the player doesn't want to use any.
+    """
+    if len(character.abilities) <= 1:
+        if is_ability_cooldown(weapon_ability, character.cooldowns) or not choosing_ability(weapon_ability):
+            return None
+        return weapon_ability
+    for ability in character.abilities:
+        print(ability)
+    pause(2)
+    pick = ask("Type your ability of choice, or 'No' if you don't want to use any (Ability name/No)")
+    choices = CommandTable({**{ability.name: ability for ability in character.abilities}, "No": "No"})
+    if (ability := choices.resolve(pick)) == "No":
+        return None
+    if ability is None:
+        print(f"{pick} - You don't have this ability!")
+        return None
+    return None if is_ability_cooldown(ability, character.cooldowns) else ability
 
 
 def ability_action(character, enemy, weapon_ability) -> str | None:
@@ -274,23 +431,23 @@ def ability_action(character, enemy, weapon_ability) -> str | None:
     enemy
         The enemy being attacked.
     weapon_ability
-        The weapon's ability being used.
+        The weapon's ability, the only one offered unless the character has others (see `choose_ability`).
 
     Returns
     -------
     str | None
-        "Won" if the enemy is defeated, or None if the battle continues.
-    """
-    if is_ability_cooldown(weapon_ability):
-        choose_and_use(character, enemy, weapon_ability)
-    elif choosing_ability(weapon_ability):
-        if output := use_ability(weapon_ability, enemy):
-            return output
-        return enemy_attack(character, enemy)
-    return None
+        "Won" if the enemy is defeated, "Lost" if the character is defeated, "Stunned" if the enemy is stunned,
+        "Retry" if the ability is on cooldown or the player decided not to use it, or None if the battle continues.
+    """
+    if (ability := choose_ability(character, weapon_ability)) is None:
+        return "Retry"
+    character.cooldowns.trigger(ability)
+    if output := use_ability(ability, enemy):
+        return output
+    return enemy_attack(character, enemy)
 
 
-def defend_action(character, enemy) -> None:
+def defend_action(character, enemy) -> str | None:
     """
     Handles the defend action where the character increases their defense temporarily.
 
@@ -303,11 +460,11 @@ def defend_action(character, enemy) -> None:
 
     Returns
     -------
-    None
+    str | None
+        "Lost" if the character is defeated, or None if the battle continues.
     """
-    print("You decided to defend Yourself against your opponents attack. Great choice!")
-    character.race.defence *= 2
-    time.sleep(2)
+    BUS.publish(Defended())
+    character.race.defence_points *= 2
     return enemy_attack(character, enemy)
 
 
@@ -324,8 +481,8 @@ def noises_action(enemy) -> None:
     -------
     None
     """
-    if random.randint(0, 99) < 50:
-        print(enemy.noises[random.randint(0, 2)])
+    if _rngs[1].randint(0, 99) < 50:
+        BUS.publish(Noise(enemy.noises[_rngs[1].randint(0, 2)]))
 
 
 def spare_or_kill(character) -> None:
@@ -341,7 +498,7 @@ def spare_or_kill(character) -> None:
     -------
     None
     """
-    choose = input("Would you like to SPARE Their life, or KILL them for all the harm They've done? ")
+    choose = ask("Would you like to SPARE Their life, or KILL them for all the harm They've done? ")
     if choose.lower() == "spare":
         print("You decided to walk further, Your enemy thanks you.")
     elif choose.lower() == "kill":
@@ -363,18 +520,133 @@ def worst_fight(enemy) -> None:
     None
     """
     for voice in enemy.get_voices():
-        input("ATTACK ")
+        ask("ATTACK ")
         print("YOU ARE DOING THE RIGHT THING.")
-        time.sleep(1)
+        pause(1)
         print(voice)
-        time.sleep(2)
+        pause(2)
     print("AS YOU DEALT THE FINAL BLOW, YOU FEEL MORE PEACEFUL.")
-    time.sleep(3)
+    pause(3)
 
 
-def choose_and_use(character, enemy, weapon_ability) -> str | None:
+def attack_command(character, enemy, weapon_ability) -> str | None:
     """
-    Prompts the user to choose between different actions: Attack, Defend, Ability, or Item.
+    Handles the Attack command: a basic attack, followed by the enemy's attack if the enemy survived.
+
+    Parameters
+    ----------
+    character
+        The character performing the action.
+    enemy
+        The enemy being attacked.
+    weapon_ability
+        The weapon's ability, unused by this command.
+
+    Returns
+    -------
+    str | None
+        "Won" if the enemy is defeated, "Lost" if the character is defeated, or None if the battle continues.
+    """
+    if basic_attack(character, enemy) == "Won":
+        return "Won"
+    return enemy_attack(character, enemy)
+
+
+def defend_command(character, enemy, weapon_ability) -> str | None:
+    """
+    Handles the Defend command: the character's defence is doubled during the enemy's attack.
+
+    Parameters
+    ----------
+    character
+        The character defending.
+    enemy
+        The enemy attacking.
+    weapon_ability
+        The weapon's ability, unused by this command.
+
+    Returns
+    -------
+    str | None
+        "Lost" if the character is defeated, or None if the battle continues.
+    """
+    outcome = defend_action(character, enemy)
+    character.race.defence_points //= 2
+    return outcome
+
+
+def item_command(character, enemy, weapon_ability) -> str | None:
+    """
+    Handles the Item command: the character uses an item, followed by the enemy's attack.
+
+    Parameters
+    ----------
+    character
+        The character using the item.
+    enemy
+        The enemy attacking.
+    weapon_ability
+        The weapon's ability, unused by this command.
+
+    Returns
+    -------
+    str | None
+        "Retry" if no item was used, "Lost" if the character is defeated, or None if the battle continues.
+    """
+    if not choose_item(character, enemy, weapon_ability):
+        return "Retry"
+    return enemy_attack(character, enemy)
+
+
+def craft_command(character, enemy, weapon_ability) -> str:
+    """
+    Handles the Craft command: the character crafts an item from the items of their backpack. Crafting doesn't take
+    the turn, so the player is prompted again for their action.
+
+    Parameters
+    ----------
+    character
+        The character crafting.
+    enemy
+        The enemy, unused by this command.
+    weapon_ability
+        The weapon's ability, unused by this command.
+
+    Returns
+    -------
+    str
+        "Retry", as the turn isn't over.
+    """
+    recipes = load_recipes().craftable(item.name for item in character.backpack.items)
+    if not recipes:
+        print("You can't craft anything with the items in your backpack!")
+        return "Retry"
+    for number, recipe in enumerate(recipes, 1):
+        print(f"  {number}. {recipe}")
+    pick = ask("Type the number of your recipe of choice, or 'No' if you don't want to craft anything (Number/No)")
+    choices = CommandTable([str(number) for number in range(1, len(recipes) + 1)] + ["No"])
+    if (choice := choices.resolve(pick)) is None:
+        print(f"{pick} - There is no such recipe!")
+    elif choice != "No":
+        craft(character.backpack, recipes[int(choice) - 1])
+    return "Retry"
+
+
+COMBAT_COMMANDS = CommandTable({
+    "Attack": attack_command,
+    "Defend": defend_command,
+    "Ability": ability_action,
+    "Item": item_command,
+    "Craft": craft_command
+})
+
+
+def choose_and_use(character, enemy, weapon_ability, commands=COMBAT_COMMANDS, hint=None) -> str | None:
+    """
+    Prompts the user to choose between different actions: Attack, Defend, Ability, Item, or Craft.
+
+    The answer is dispatched through the command table (`COMBAT_COMMANDS` by default), and the player is prompted
+    again, in the same loop, until an action is actually carried out.
 
     Parameters
     ----------
@@ -384,24 +656,24 @@ def choose_and_use(character, enemy, weapon_ability) -> str | None:
         The enemy being interacted with.
     weapon_ability
         The weapon's ability to be used.
+    commands : CommandTable, optional
+        The commands the player can choose from (default is `COMBAT_COMMANDS`).
+    hint : callable, optional
+        Called before every prompt, returns a text shown before the options (empty when there is nothing to show).
+        It must not block.
 
     Returns
     -------
     str | None
-        The outcome of the action ("Won" if the enemy is defeated, or None if the battle continues).
-    """
-    choose = input("Attack  /  Defend  /  Ability  /  Item")
-    if choose.lower() == "attack":
-        did_won = basic_attack(character, enemy)
-        return did_won if did_won == "Won" else enemy_attack(character, enemy)
-    if choose.lower() == "defend":
-        defend_action(character, enemy)
-        character.race.defence *= 0.5
-        return None
-    if choose.lower() == "ability" and (outcome := ability_action(character, enemy, weapon_ability)):
-        return outcome
-    if choose.lower() == "item" and choose_item(character, enemy, weapon_ability):
-        return enemy_attack(character, enemy)
-    print("Wrong input, please input correctly one of the options.")
-    choose_and_use(character, enemy, weapon_ability)
-    return None
+        The outcome of the action ("Won" if the enemy is defeated, "Lost" if the character is defeated, or None if
+        the battle continues).
+    """
+    prompt = "  /  ".join(commands.names())
+    while True:
+        BUS.flush()
+        command = commands.resolve(ask((hint() if hint else "") + prompt))
+        if command is None:
+            print("Wrong input, please input correctly one of the options.")
+            continue
+        if (outcome := command(character, enemy, weapon_ability)) != "Retry":
+            return outcome
@@ -0,0 +1,138 @@
+"""
+Module for the fixed-point representation of the fractional stats (the defence), stored as integers.
+
+A defence of 1.1 is stored as the integer 110, in hundredths (`SCALE`). Adding a potion or doubling the defence works
+on the integer, so the defence always comes back exactly to its base value, and comparing two defences is exact. The
+integer is a plain `<name>_points` attribute, which the code of every turn (the hits, the Defend command and the guard
+of the enemies, the potions and their expiry, the pure rules of `combatstate`) reads and writes directly.
+`FixedPointStat` is a descriptor that also gives the stat its float interface, for the code setting up a fight (the
+templates, the balancing tools) and for display: it reads and writes the value as a float, rounded to the nearest
+hundredth, at the cost of a Python call, so it is kept out of the turns.
+
+Dividing the damage by the defence is done on integers by `floor_divide`, with a rounding chosen to match the float
+division the game always used: `damage // defence` is the floor of the damage divided by the double closest to the
+defence. That double is slightly above the decimal defence for some values (1.1, 1.3, 1.8, 2.2, ...), and slightly
+below for others (1.2, 1.4, ...). The result only differs from the exact decimal division when the damage is an exact
+multiple of a defence whose double is above it, in which case it is one less: `33 // 1.1 == 29.0`, not 30. Any other
+quotient is at least 1 / `SCALE` away from an integer, far more than the error of the double, so the floor is the same.
+`floor_divide` reproduces this, so fights play exactly as before.
+
+Imports:
+--------
+- `fractions`: Provides `Fraction`, used to compare a double with its decimal value exactly.
+- `functools`: Provides `lru_cache`, used to remember the rounding direction of every defence.
+
+Classes:
+--------
+- FixedPointStat: A descriptor storing a stat as an integer number of hundredths.
+
+Functions:
+----------
+- to_points: Converts a value to hundredths.
+- from_points: Converts hundredths to a value.
+- rounds_up: Checks if the double closest to a value is above it.
+- floor_divide: Divides a damage by a defence given in hundredths, as the float division did.
+
+Example:
+--------
+floor_divide(33, to_points(1.1))  # 29.0, like 33 // 1.1
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+
+
+SCALE = 100
+
+
+def to_points(value) -> int:
+    """
+    Converts a value to hundredths.
+
+    Parameters
+    ----------
+    value : float
+        The value.
+
+    Returns
+    -------
+    int
+        The value in hundredths, rounded to the nearest one.
+    """
+    return round(value * SCALE)
+
+
+def from_points(points) -> float:
+    """
+    Converts hundredths to a value.
+
+    Parameters
+    ----------
+    points : int
+        The value in hundredths.
+
+    Returns
+    -------
+    float
+        The value.
+    """
+    return points / SCALE
+
+
+@lru_cache(maxsize=4096)
+def rounds_up(points) -> bool:
+    """
+    Checks if the double closest to a value is above its exact decimal value.
+
+    Parameters
+    ----------
+    points : int
+        The value in hundredths.
+
+    Returns
+    -------
+    bool
+        True if the double is above the decimal value (1.1, 1.3, ...), False otherwise.
+    """
+    return Fraction(points / SCALE) > Fraction(points, SCALE)
+
+
+def floor_divide(damage, points) -> float:
+    """
+    Divides a damage by a defence given in hundredths, rounding down like `damage // defence` on floats.
+
+    Parameters
+    ----------
+    damage : float
+        The damage, a multiple of 1 / `SCALE` (damage values are integers or halves).
+    points : int
+        The defence, in hundredths.
+
+    Returns
+    -------
+    float
+        The damage dealt.
+    """
+    scaled = damage * SCALE
+    quotient = scaled // points
+    if quotient and scaled == quotient * points and rounds_up(points):
+        quotient -= 1
+    return float(quotient)
+
+
+class FixedPointStat:
+    """
+    A descriptor storing a stat as an integer number of hundredths, in the `<name>_points` attribute, while reading
+    and writing it as a float.
+    """
+
+    def __set_name__(self, owner, name):
+        self.points = f"{name}_points"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.points) / SCALE
+
+    def __set__(self, instance, value):
+        setattr(instance, self.points, round(value * SCALE))
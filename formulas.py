@@ -0,0 +1,216 @@
+"""
+Module for the combat formulas, declared in a data file and compiled once into Python functions.
+
+The damage rules (the critical hits of the player and of the enemies, the reduction of a hit by the defence and the
+damage of a damage over time tick) are written in `formulas.json` as expressions of a small language, so they can be
+changed without touching the code. Every expression is parsed once, checked against a whitelist of the syntax it may
+use, and compiled into a function taking the parameters of its formula, so the fight only calls plain functions and
+never parses anything.
+
+The language is the arithmetic subset of Python expressions: numbers, the parameters of the formula, `+ - * / // %`,
+comparisons, `and`, `or`, `not`, `x if condition else y`, and calls to the functions of `FUNCTIONS`. Anything else
+(attributes, subscripts, other names, keyword arguments, lambdas, powers, ...) is rejected when the formula is
+compiled, and the compiled functions run without any builtins, so a formula can't reach anything but its parameters.
+
+Imports:
+--------
+- `ast`: Parses the expressions and builds the compiled functions.
+- `json`: Used to read the formulas.
+- `math`: Provides `floor` and `ceil`, usable in the formulas.
+- `os`: Used to locate the default formula file next to this module.
+- `typing`: Provides `NamedTuple`, used for the compiled formulas.
+- `fixedpoint`: Provides `floor_divide`, usable in the formulas.
+
+Classes:
+--------
+- Formulas: The compiled combat formulas.
+
+Functions:
+----------
+- compile_formula: Compiles an expression into a function.
+- compile_formulas: Compiles the combat formulas.
+- load_formulas: Loads and compiles the combat formulas from a file.
+- set_formulas: Installs the formulas used by the fights.
+- get_formulas: Returns the formulas used by the fights.
+
+Data format:
+------------
+The formula file maps the name of every formula of `PARAMETERS` to its expression, for example
+`"enemy_critical": "damage * 1.5"`. The expression can use the parameters of its formula, listed in `PARAMETERS`.
+"""
+
+import ast
+import json
+import math
+import os
+from typing import NamedTuple
+
+from fixedpoint import floor_divide
+
+
+FORMULAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "formulas.json")
+
+# The functions a formula can call.
+FUNCTIONS = {
+    "min": min, "max": max, "abs": abs, "round": round, "floor": math.floor, "ceil": math.ceil,
+    "floor_divide": floor_divide,
+}
+
+# The syntax a formula can use.
+ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Call, ast.IfExp,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.UnaryOp, ast.UAdd, ast.USub, ast.Not, ast.BoolOp, ast.And, ast.Or,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+
+class Formulas(NamedTuple):
+    """The compiled combat formulas."""
+    player_critical: callable  # The damage of a critical hit of the player.
+    enemy_critical: callable  # The damage of a critical hit of an enemy.
+    hit: callable  # The damage dealt by a hit, reduced by the defence (in hundredths, see `fixedpoint`).
+    dot_tick: callable  # The damage of a tick of damage over time.
+
+
+# The parameters of every formula, in the order the fight passes them.
+PARAMETERS = {
+    "player_critical": ("damage",),
+    "enemy_critical": ("damage",),
+    "hit": ("damage", "defence_points"),
+    "dot_tick": ("d_o_t", "d_o_t_time", "hp"),
+}
+
+
+def compile_formula(name, expression, parameters):
+    """
+    Compiles an expression into a function taking the given parameters.
+
+    Parameters
+    ----------
+    name : str
+        The name of the formula, used in the error messages and as the name of the function.
+    expression : str
+        The expression.
+    parameters : tuple
+        The names of the parameters of the function, in order.
+
+    Returns
+    -------
+    callable
+        The compiled function.
+
+    Raises
+    ------
+    ValueError
+        If the expression isn't valid, or uses a syntax, a name or a call the language doesn't allow.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as error:
+        raise ValueError(f"The formula '{name}' is not a valid expression: {error.msg}") from error
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"The formula '{name}' uses a forbidden syntax: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, bool):
+            raise ValueError(f"The formula '{name}' uses a forbidden constant: {node.value!r}")
+        if isinstance(node, ast.Name) and node.id not in parameters and node.id not in FUNCTIONS:
+            raise ValueError(f"The formula '{name}' uses an unknown name: {node.id}")
+        if isinstance(node, ast.Call) and (
+            not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords
+            or any(isinstance(argument, ast.Starred) for argument in node.args)
+        ):
+            raise ValueError(f"The formula '{name}' calls something other than a function: {ast.unparse(node)}")
+    function = ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[], args=[ast.arg(parameter) for parameter in parameters], kwonlyargs=[], kw_defaults=[],
+            defaults=[],
+        ),
+        body=tree.body,
+    )
+    code = compile(ast.fix_missing_locations(ast.Expression(function)), f"<formula {name}>", "eval")
+    compiled = eval(code, {"__builtins__": {}, **FUNCTIONS})  # pylint: disable=eval-used
+    compiled.__name__ = compiled.__qualname__ = name
+    return compiled
+
+
+def compile_formulas(data) -> Formulas:
+    """
+    Compiles the combat formulas.
+
+    Parameters
+    ----------
+    data : dict
+        The expression of every formula, by name.
+
+    Returns
+    -------
+    Formulas
+        The compiled formulas.
+
+    Raises
+    ------
+    ValueError
+        If a formula is missing, unknown or invalid.
+    """
+    for name in data:
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown formula: {name}")
+    for name in PARAMETERS:
+        if name not in data:
+            raise ValueError(f"The formula '{name}' is missing")
+    return Formulas(**{name: compile_formula(name, data[name], PARAMETERS[name]) for name in PARAMETERS})
+
+
+def load_formulas(path=None) -> Formulas:
+    """
+    Loads and compiles the combat formulas from a file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the formula file (default is `formulas.json` next to this module).
+
+    Returns
+    -------
+    Formulas
+        The compiled formulas.
+    """
+    with open(path or FORMULAS_PATH, encoding="utf-8") as formula_file:
+        return compile_formulas(json.load(formula_file))
+
+
+_formulas = None
+
+
+def set_formulas(formulas) -> Formulas | None:
+    """
+    Installs the formulas used by the fights.
+
+    Parameters
+    ----------
+    formulas : Formulas
+        The compiled formulas.
+
+    Returns
+    -------
+    Formulas | None
+        The previously installed formulas, so they can be restored.
+    """
+    global _formulas  # pylint: disable=global-statement
+    previous, _formulas = _formulas, formulas
+    return previous
+
+
+def get_formulas() -> Formulas:
+    """
+    Returns the formulas used by the fights, loading the default ones the first time.
+
+    Returns
+    -------
+    Formulas
+        The installed formulas.
+    """
+    if _formulas is None:
+        set_formulas(load_formulas())
+    return _formulas
@@ -0,0 +1,263 @@
+"""
+Module that provides the input providers used to drive the game.
+
+Every prompt and every dramatic pause in the game goes through the active input provider instead of calling
+`input()` and `time.sleep()` directly. This makes it possible to play the game from the console, replay a
+playthrough from a script file, or drive it programmatically (for example to load-test thousands of runs of the
+story) without touching the game code itself.
+
+Imports:
+--------
+- `time`: Used to introduce delays (pauses) in the game flow when pauses are enabled.
+
+Classes:
+--------
+- InputProvider: A base class defining the interface shared by all input providers.
+- ConsoleInput: A provider that reads answers from the console, used by default.
+- ScriptedInput: A provider that reads answers, one per line, from a script file.
+- ProgrammaticInput: A provider that takes answers from a sequence or a callable.
+
+Functions:
+----------
+- set_provider: Installs a new active provider and returns the previous one.
+- get_provider: Returns the active provider.
+- ask: Prompts the active provider for an answer.
+- pause: Pauses the game flow, unless the active provider skips pauses.
+
+Example:
+--------
+# Play the whole story from a script file with no pauses
+set_provider(ScriptedInput("playthrough.txt"))
+"""
+
+import time
+
+
+class InputProvider:
+    """
+    A base class for all input providers.
+
+    Attributes
+    ----------
+    pauses : bool
+        Whether the game should actually wait when a pause is requested.
+
+    Methods
+    -------
+    ask(prompt)
+        Returns the answer to the given prompt.
+    pause(seconds)
+        Waits for the given amount of seconds if pauses are enabled.
+    """
+
+    def __init__(self, pauses=True):
+        """
+        Initializes the provider.
+
+        Parameters
+        ----------
+        pauses : bool, optional
+            Whether pauses are enabled (default is True).
+        """
+        self.pauses = pauses
+
+    def ask(self, prompt) -> str:
+        """
+        Returns the answer to the given prompt.
+
+        Parameters
+        ----------
+        prompt : str
+            The question shown to the player.
+
+        Returns
+        -------
+        str
+            The answer given by the player.
+        """
+        raise NotImplementedError
+
+    def pause(self, seconds) -> None:
+        """
+        Waits for the given amount of seconds if pauses are enabled.
+
+        Parameters
+        ----------
+        seconds : float
+            The amount of seconds to wait.
+        """
+        if self.pauses:
+            time.sleep(seconds)
+
+
+class ConsoleInput(InputProvider):
+    """
+    An input provider that reads the answers from the console.
+
+    This is the default provider, used when a human plays the game.
+    """
+
+    def ask(self, prompt) -> str:
+        """
+        Reads the answer to the given prompt from the console.
+
+        Parameters
+        ----------
+        prompt : str
+            The question shown to the player.
+
+        Returns
+        -------
+        str
+            The answer typed by the player.
+        """
+        return input(prompt)
+
+
+class ProgrammaticInput(InputProvider):
+    """
+    An input provider that takes its answers from a sequence or a callable.
+
+    Pauses are skipped by default, so a whole playthrough runs at full speed.
+
+    Attributes
+    ----------
+    answers : iterator | callable
+        Either an iterator over the answers, or a callable receiving the prompt and returning the answer.
+    echo : bool
+        Whether the prompt and the answer are printed, like they would be in the console.
+    """
+
+    def __init__(self, answers, pauses=False, echo=False):
+        """
+        Initializes the provider with its answers.
+
+        Parameters
+        ----------
+        answers : iterable | callable
+            The answers given in order, or a callable receiving the prompt and returning the answer.
+        pauses : bool, optional
+            Whether pauses are enabled (default is False).
+        echo : bool, optional
+            Whether the prompt and the answer are printed (default is False).
+        """
+        super().__init__(pauses)
+        self.answers = answers if callable(answers) else iter(answers)
+        self.echo = echo
+
+    def ask(self, prompt) -> str:
+        """
+        Returns the next answer.
+
+        Parameters
+        ----------
+        prompt : str
+            The question shown to the player.
+
+        Returns
+        -------
+        str
+            The next answer.
+
+        Raises
+        ------
+        EOFError
+            If there are no answers left, just like `input()` at the end of the input.
+        """
+        if callable(self.answers):
+            answer = self.answers(prompt)
+        else:
+            answer = next(self.answers, None)
+        if answer is None:
+            raise EOFError(f"No answer left for the prompt: {prompt}")
+        if self.echo:
+            print(f"{prompt}{answer}")
+        return answer
+
+
+class ScriptedInput(ProgrammaticInput):
+    """
+    An input provider that reads its answers, one per line, from a script file.
+
+    Empty lines are kept as empty answers, and lines starting with '#' are treated as comments.
+    """
+
+    def __init__(self, path, pauses=False, echo=False):
+        """
+        Loads the answers from the script file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the script file.
+        pauses : bool, optional
+            Whether pauses are enabled (default is False).
+        echo : bool, optional
+            Whether the prompt and the answer are printed (default is False).
+        """
+        with open(path, encoding="utf-8") as script:
+            answers = [line.rstrip("\n") for line in script if not line.startswith("#")]
+        super().__init__(answers, pauses, echo)
+
+
+_provider = ConsoleInput()
+
+
+def set_provider(provider) -> InputProvider:
+    """
+    Installs a new active input provider.
+
+    Parameters
+    ----------
+    provider : InputProvider
+        The provider used for all the following prompts and pauses.
+
+    Returns
+    -------
+    InputProvider
+        The previously active provider, so it can be restored.
+    """
+    global _provider  # pylint: disable=global-statement
+    previous, _provider = _provider, provider
+    return previous
+
+
+def get_provider() -> InputProvider:
+    """
+    Returns the active input provider.
+
+    Returns
+    -------
+    InputProvider
+        The provider currently used for prompts and pauses.
+    """
+    return _provider
+
+
+def ask(prompt="") -> str:
+    """
+    Prompts the active input provider for an answer.
+
+    Parameters
+    ----------
+    prompt : str, optional
+        The question shown to the player.
+
+    Returns
+    -------
+    str
+        The answer given by the provider.
+    """
+    return _provider.ask(prompt)
+
+
+def pause(seconds) -> None:
+    """
+    Pauses the game flow, unless the active input provider skips pauses.
+
+    Parameters
+    ----------
+    seconds : float
+        The amount of seconds to wait.
+    """
+    _provider.pause(seconds)
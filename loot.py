@@ -0,0 +1,297 @@
+"""
+Module for the loot tables of the enemies and of the scenes, sampled in constant time with the alias method.
+
+A loot table gives every possible drop a weight (the drop `None` meaning that nothing is found). Drawing from it with
+a linear scan of the cumulative weights costs a time proportional to the size of the table; Walker's alias method
+instead prebuilds, once, two columns for the table: every column holds one outcome with a probability, and an alias
+outcome taking the rest of the column. A draw picks a column and keeps its outcome or its alias, so it costs one
+random number and two lookups whatever the size of the table.
+
+The tables are declared in `loot.json` and built once when the file is loaded. Simulations drawing many drops at once
+can count them with `AliasTable.counts`, which draws them all in a few array operations when given a NumPy generator.
+
+Imports:
+--------
+- `json`: Used to read the loot tables.
+- `os`: Used to locate the default loot file next to this module.
+- `random`: The default generator of the draws.
+- `functools`: Provides `lru_cache`, used to load the loot tables once.
+- `typing`: Provides `NamedTuple`, used for the loaded tables.
+- `backpack`: Provides the item `MAPPING`, used to check the items of the tables.
+
+Classes:
+--------
+- AliasTable: A weighted table drawn from in constant time.
+- LootTables: The loot tables of the enemies and of the scenes.
+
+Functions:
+----------
+- compile_loot: Builds the loot tables from their data.
+- load_loot: Loads and builds the loot tables from a file, once.
+- roll_loot: Draws from a loot table and puts the drop in the character's backpack.
+
+Data format:
+------------
+The loot file has an `enemies` mapping, from enemy names to their tables, and a `scenes` mapping, from table names to
+the tables used by the `loot` steps of the story. A table is a list of `[item name, weight]` pairs, the item name
+being `null` for nothing.
+
+Example:
+--------
+table = load_loot().enemies["bear"]
+print(table.draw(), table.counts(100_000))
+"""
+
+import json
+import os
+import random
+from functools import lru_cache
+from typing import NamedTuple
+
+from backpack import MAPPING
+
+
+LOOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loot.json")
+
+
+class AliasTable:
+    """
+    A class drawing weighted outcomes in constant time, with Walker's alias method.
+
+    Attributes
+    ----------
+    outcomes : tuple
+        The outcomes of the table.
+    weights : tuple
+        The weight of every outcome.
+    probabilities : tuple
+        The probability of keeping the outcome of every column rather than its alias.
+    aliases : tuple
+        The index of the alias outcome of every column.
+    """
+
+    def __init__(self, outcomes, weights):
+        """
+        Builds the columns of the table, with Vose's construction in linear time.
+
+        Parameters
+        ----------
+        outcomes : iterable
+            The outcomes.
+        weights : iterable
+            The weight of every outcome, not negative.
+
+        Raises
+        ------
+        ValueError
+            If the outcomes and the weights don't match, a weight is negative or all the weights are zero.
+        """
+        self.outcomes = tuple(outcomes)
+        self.weights = tuple(weights)
+        size = len(self.outcomes)
+        if size != len(self.weights) or not size:
+            raise ValueError("A table needs one weight for every outcome, and at least one outcome.")
+        if min(self.weights) < 0 or not sum(self.weights):
+            raise ValueError("The weights of a table must not be negative, nor all zero.")
+        total = sum(self.weights)
+        scaled = [weight * size / total for weight in self.weights]
+        small = [index for index, share in enumerate(scaled) if share < 1]
+        large = [index for index, share in enumerate(scaled) if share >= 1]
+        probabilities = [1.0] * size
+        aliases = list(range(size))
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # What is left is a full column, up to rounding errors.
+        self.probabilities = tuple(probabilities)
+        self.aliases = tuple(aliases)
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def draw(self, rng=random):
+        """
+        Draws an outcome, in constant time.
+
+        Parameters
+        ----------
+        rng : random.Random, optional
+            The generator of the draw (default is the `random` module).
+
+        Returns
+        -------
+        object
+            The outcome drawn.
+        """
+        # The integer part of the number picks the column, its fractional part decides between the outcome and its
+        # alias. The product stays below the number of columns, as `random()` is below 1.
+        column = rng.random() * len(self.outcomes)
+        index = int(column)
+        if column - index < self.probabilities[index]:
+            return self.outcomes[index]
+        return self.outcomes[self.aliases[index]]
+
+    def sample(self, count, rng=random) -> list:
+        """
+        Draws several outcomes.
+
+        Parameters
+        ----------
+        count : int
+            The number of outcomes drawn.
+        rng : random.Random, optional
+            The generator of the draws (default is the `random` module).
+
+        Returns
+        -------
+        list
+            The outcomes drawn.
+        """
+        outcomes, probabilities, aliases, size = self.outcomes, self.probabilities, self.aliases, len(self.outcomes)
+        uniform = rng.random
+        drawn = []
+        for _ in range(count):
+            column = uniform() * size
+            index = int(column)
+            drawn.append(outcomes[index] if column - index < probabilities[index] else outcomes[aliases[index]])
+        return drawn
+
+    def counts(self, count, rng=random) -> dict:
+        """
+        Draws several outcomes and counts them. With a NumPy generator, the draws are made on arrays.
+
+        Parameters
+        ----------
+        count : int
+            The number of outcomes drawn.
+        rng : random.Random | numpy.random.Generator, optional
+            The generator of the draws (default is the `random` module).
+
+        Returns
+        -------
+        dict
+            The number of times every outcome was drawn, in the order of the outcomes.
+        """
+        if hasattr(rng, "integers"):
+            import numpy  # pylint: disable=import-outside-toplevel
+
+            if self._arrays is None:
+                self._arrays = (numpy.array(self.probabilities), numpy.array(self.aliases))
+            probabilities, aliases = self._arrays
+            columns = rng.integers(0, len(self.outcomes), count)
+            indexes = numpy.where(rng.random(count) < probabilities[columns], columns, aliases[columns])
+            totals = numpy.bincount(indexes, minlength=len(self.outcomes)).tolist()
+        else:
+            index = {outcome: number for number, outcome in enumerate(self.outcomes)}
+            totals = [0] * len(self.outcomes)
+            for outcome in self.sample(count, rng):
+                totals[index[outcome]] += 1
+        return dict(zip(self.outcomes, totals))
+
+
+class LootTables(NamedTuple):
+    """The loot tables of the enemies, by enemy name, and of the scenes, by table name."""
+    enemies: dict
+    scenes: dict
+
+
+def _compile_table(name, pairs) -> AliasTable:
+    """
+    Builds a loot table from its `[item name, weight]` pairs.
+
+    Parameters
+    ----------
+    name : str
+        The name of the table, used in the error messages.
+    pairs : list
+        The item names (None for nothing) and their weights.
+
+    Returns
+    -------
+    AliasTable
+        The loot table.
+
+    Raises
+    ------
+    ValueError
+        If an item is unknown or the weights are invalid.
+    """
+    for item_name, _ in pairs:
+        if item_name is not None and item_name not in MAPPING:
+            raise ValueError(f"Unknown item '{item_name}' in the loot table '{name}'")
+    try:
+        return AliasTable((item_name for item_name, _ in pairs), (weight for _, weight in pairs))
+    except ValueError as error:
+        raise ValueError(f"Invalid loot table '{name}': {error}") from error
+
+
+def compile_loot(data) -> LootTables:
+    """
+    Builds the loot tables from their data.
+
+    Parameters
+    ----------
+    data : dict
+        The `enemies` and `scenes` tables.
+
+    Returns
+    -------
+    LootTables
+        The loot tables.
+
+    Raises
+    ------
+    ValueError
+        If an item of a table is unknown or the weights of a table are invalid.
+    """
+    return LootTables(
+        {name: _compile_table(name, pairs) for name, pairs in data.get("enemies", {}).items()},
+        {name: _compile_table(name, pairs) for name, pairs in data.get("scenes", {}).items()},
+    )
+
+
+@lru_cache(maxsize=None)
+def load_loot(path=None) -> LootTables:
+    """
+    Loads and builds the loot tables from a file. The tables are cached, so they are only built once.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the loot file (default is `loot.json` next to this module).
+
+    Returns
+    -------
+    LootTables
+        The loot tables.
+    """
+    with open(path or LOOT_PATH, encoding="utf-8") as loot_file:
+        return compile_loot(json.load(loot_file))
+
+
+def roll_loot(character, table, rng=random) -> str | None:
+    """
+    Draws from a loot table and puts the drop, if any, in the character's backpack.
+
+    Parameters
+    ----------
+    character
+        The character finding the loot.
+    table : AliasTable
+        The loot table.
+    rng : random.Random, optional
+        The generator of the draw (default is the `random` module).
+
+    Returns
+    -------
+    str | None
+        The name of the item found, or None if nothing was found.
+    """
+    item_name = table.draw(rng)
+    if item_name is not None:
+        character.backpack.add_item(item_name)
+    return item_name
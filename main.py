@@ -3,25 +3,58 @@ This module is part of a text-based adventure game where the player controls a c
 combat encounters with different enemies.
 
 Imports:
-- `time`: Used for delaying actions and simulating a typewriter effect.
-- `main_character`: The main character controlled by the player in the game.
-- `Boar`, `Bear`, `Zombie`, `Werewolf`: Various enemy types that the character will face in battle.
+- `pause`, `get_provider`, `set_provider`, `ScriptedInput`: The input providers, used for delaying actions,
+simulating a typewriter effect and playing the story from a script file.
+- `create_main_character`: Creates the main character controlled by the player in the game.
+- `ENEMY_FACTORY`: The various enemy types that the character will face in battle.
+- `load_campaign`: Loads the scene graph of the story from `story.json` and `story.txt`.
+- `load_loot`, `roll_loot`: The loot tables of the enemies and of the scenes, from `loot.json`.
+- `load_behaviors`: The behavior trees deciding the actions of the enemies, from `behaviors.json`.
+- `BUS`, `ConsoleSubscriber`: The combat event bus, and the subscriber showing the fights on the console.
+- `CombatState`, `Timeline`, `practice_commands`: The snapshots of the fights, rewound in practice mode.
+- `WinPredictor`: Estimates the win chance of every action in the background, shown in the action prompt.
+- `ProfileStore`, `RunRecorder`: Save the profile, the run and the summary of every fight in a local database.
+- `play_realtime`: Plays the optional real-time battle of the arena.
+- `survival` (from `waves`, imported only with `--survival`): Plays the endless survival mode.
 - `is_d_o_t_active`, `is_buff_over`, `choose_and_use`, `noises_action`, `spare_or_kill`, `worst_fight`: Functions that
-handle different aspects of combat and decision-making.
+handle different aspects of combat and decision-making, with `COMBAT_COMMANDS`, the commands of a combat round.
 
 The gameplay involves fighting various enemies in sequential encounters, using different combat actions,
-and advancing through a series of narrative events.
+and advancing through a series of narrative events. The narrative itself is data: the scene graph is played by
+`scenes.Campaign`, calling the step handlers defined here.
 """
 
-import time
 import sys
-
-from characters import main_character
-from enemies import Boar, Bear, Zombie, Werewolf
-from fight import is_d_o_t_active, is_buff_over, choose_and_use, noises_action, spare_or_kill, worst_fight
-
-
-def fighting_sequence(character, enemy, weapon_ability) -> str | None:
+from functools import partial
+
+from characters import create_main_character
+from enemies import ENEMY_FACTORY
+from inputs import pause, get_provider, set_provider, ScriptedInput
+from scenes import load_campaign
+from loot import load_loot, roll_loot
+from behavior import load_behaviors
+from events import BUS, ConsoleSubscriber
+from fight import (
+    is_d_o_t_active, is_buff_over, choose_and_use, noises_action, spare_or_kill, worst_fight, COMBAT_COMMANDS
+)
+from combatstate import CombatState, Timeline, practice_commands
+from predictor import WinPredictor
+from profiles import ProfileStore, RunRecorder
+from realtime import play_realtime
+
+# In practice mode, the player can rewind a fight to the start of the previous round.
+PRACTICE_MODE = False
+# When set, the win chance of every action is estimated while the player is choosing.
+PREDICTOR = None
+# When set, the fights and the ending of the run are saved to the profile database.
+RECORDER = None
+# The enemies of the real-time battle of the arena, played instead of the story with `--realtime`.
+ARENA_ENEMIES = ("boar", "bear")
+# The number of batches of events the console can lag behind in the real-time battle.
+REALTIME_CONSOLE_QUEUE = 256
+
+
+def fighting_sequence(character, enemy, weapon_ability, commands=COMBAT_COMMANDS) -> str | None:
     """
     Handles the sequence of actions for a single combat round between the character and an enemy.
 
@@ -33,51 +66,83 @@ def fighting_sequence(character, enemy, weapon_ability) -> str | None:
         The enemy that the character is fighting.
     weapon_ability
         The weapon ability currently being used by the character.
+    commands : CommandTable, optional
+        The commands the player can choose from (default is `COMBAT_COMMANDS`).
 
     Returns
     -------
     str or None
-        A string indicating the result of the fight ("Won" or "Lost"), or None if the fight is ongoing.
+        A string indicating the result of the fight ("Won", "Lost", or "Fled" if the enemy ran away), "Rewind" if the
+        player rewound the fight, or None if the fight is ongoing.
 
-    This function manages the cooldown of weapon abilities, checks whether the enemy has a damage-over-time
+    This function advances the cooldowns of the character's abilities, checks whether the enemy has a damage-over-time
     (DOT) effect active, checks if the character's buff has expired, triggers enemy actions, and performs
-    the appropriate combat action.
+    the appropriate combat action. If the `PREDICTOR` is set, it starts estimating the win chance of every action,
+    shown in the prompt once ready.
     """
 
-    weapon_ability.current_cooldown -= 1
+    character.cooldowns.tick()
     character.buff_time[0] -= 1
     if over := is_d_o_t_active(enemy):
         return over
-    if is_buff_over(character):
-        print("Your buff just ended!")
-        time.sleep(1)
+    is_buff_over(character)
+    hint = None
+    if PREDICTOR:
+        state = CombatState.capture(character, enemy)
+        PREDICTOR.request(state)
+        hint = partial(PREDICTOR.hint, state)
     noises_action(enemy)
-    return choose_and_use(character, enemy, weapon_ability)
+    return choose_and_use(character, enemy, weapon_ability, commands, hint)
 
 
-def every_fight(enemy) -> str | None:
+def every_fight(character, enemy) -> str:
     """
     Runs the entire fight sequence with a given enemy until the fight is resolved.
 
     Parameters
     ----------
+    character
+        The character who is engaging in combat.
     enemy
         The enemy to fight against.
 
     Returns
     -------
-    None
-        This function does not return any value.
-
-    This function repeatedly calls the `fighting_sequence` function until the result of the fight is "Won"
-    or "Lost", and then it handles whether the character spares or kills the enemy after the fight.
+    str
+        The result of the fight: "Won", "Lost" or "Fled".
+
+    This function repeatedly calls the `fighting_sequence` function until the result of the fight is "Won", "Lost"
+    or "Fled". Once the fight is won, it handles whether the character spares or kills the enemy. The combat events
+    of every round are delivered to the subscribers of the event bus once the round is over. In practice mode, the
+    state at the start of every round is kept in a `Timeline`, and the Rewind command restores the previous one. If
+    the `RECORDER` is set, the summary of the fight is saved once it is over, counting only the rounds, damage and
+    potions that were not rewound.
     """
-    time.sleep(2)
+    pause(2)
+    timeline = Timeline(CombatState.capture(character, enemy)) if PRACTICE_MODE else None
+    commands = practice_commands(timeline) if timeline else COMBAT_COMMANDS
+    # The tallies of the recorder at the start of every round of the timeline, restored with the rounds rewound.
+    tallies = [RECORDER.tally()] if timeline and RECORDER else None
     is_over = True
-    while is_over not in ["Won", "Lost"]:
-        is_over = fighting_sequence(main_character, enemy, main_character.weapon.ability)
-
-    spare_or_kill(main_character)
+    rounds = 0
+    while is_over not in ["Won", "Lost", "Fled"]:
+        is_over = fighting_sequence(character, enemy, character.weapon.ability, commands)
+        BUS.flush()
+        # A rewind plays no round, and takes back the last one played.
+        rounds = max(0, rounds - 1) if is_over == "Rewind" else rounds + 1
+        if timeline and is_over != "Rewind":
+            timeline.record(CombatState.capture(character, enemy, len(timeline)))
+        if tallies and is_over == "Rewind":
+            del tallies[len(timeline):]
+            RECORDER.restore(tallies[-1])
+        elif tallies:
+            tallies.append(RECORDER.tally())
+
+    if RECORDER:
+        RECORDER.end_fight(is_over, rounds)
+    if is_over == "Won":
+        spare_or_kill(character)
+    return is_over
 
 
 def print_info(msg) -> None:
@@ -139,103 +204,217 @@ def typewriter_effect(text, delay=0.04) -> None:
 
     This function mimics the sound and appearance of a typewriter by printing each character one at a time
     with a small delay between each one, making it ideal for displaying in-game dialogue or narration.
+    When the active input provider skips pauses, the whole text is printed at once.
     """
+    if not get_provider().pauses:
+        print(text)
+        return
     for char in text:
         print(char, end="", flush=True)
-        time.sleep(delay)
+        pause(delay)
     print()
 
 
+def text_step(character, text, delay=0.04, wait=0) -> None:
+    """
+    Scene step displaying a text block with the typewriter effect, line by line.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    text : tuple
+        The lines of the text block.
+    delay : float, optional
+        The time delay between each character (default is 0.04 seconds).
+    wait : float, optional
+        The pause after each line, in seconds (default is 0).
+    """
+    for line in text:
+        typewriter_effect(line, delay)
+        if wait:
+            pause(wait)
+
+
+def print_step(character, text) -> None:
+    """
+    Scene step printing a text block at once.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    text : tuple
+        The lines of the text block.
+    """
+    print("\n".join(text))
+
+
+def box_step(character, text) -> None:
+    """
+    Scene step displaying a text block inside a box frame.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    text : tuple
+        The lines of the text block.
+    """
+    box(" ".join(text))
+
+
+def item_step(character, name) -> None:
+    """
+    Scene step adding an item to the character's backpack.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    name : str
+        The name of the item found.
+    """
+    character.backpack.add_item(name)
+
+
+def loot_step(character, table) -> None:
+    """
+    Scene step drawing an item from a loot table into the character's backpack.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    table : str
+        The name of the scene's loot table, in `loot.json`.
+    """
+    roll_loot(character, load_loot().scenes[table])
+
+
+def fight_step(character, enemy) -> str | None:
+    """
+    Scene step fighting a new enemy of the given type, deciding its actions with its behavior tree, which may drop an
+    item from its loot table once beaten.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    enemy : str
+        The type of the enemy, as found in `ENEMY_FACTORY`.
+
+    Returns
+    -------
+    str | None
+        "Lost" if the fight was lost, which ends the story, or None if the story goes on.
+    """
+    opponent = ENEMY_FACTORY[enemy]()
+    opponent.behavior = load_behaviors().get(enemy)
+    if RECORDER:
+        RECORDER.start_fight(enemy)
+    if every_fight(character, opponent) == "Lost":
+        return "Lost"
+    if opponent.hp == 0 and (table := load_loot().enemies.get(enemy)):
+        roll_loot(character, table)
+    return None
+
+
+def worst_fight_step(character, enemy) -> None:
+    """
+    Scene step finishing off an enemy of the given type.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+    enemy : str
+        The type of the enemy, as found in `ENEMY_FACTORY`.
+    """
+    worst_fight(ENEMY_FACTORY[enemy]())
+
+
+STEP_HANDLERS = {
+    "text": text_step,
+    "print": print_step,
+    "box": box_step,
+    "item": item_step,
+    "loot": loot_step,
+    "fight": fight_step,
+    "worst_fight": worst_fight_step
+}
+
+
+def play_story(character) -> str:
+    """
+    Plays the whole story with the given character, from the forest to one of the endings.
+
+    The story is the scene graph from `story.json`, with its texts loaded from `story.txt` as scenes are visited.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+
+    Returns
+    -------
+    str
+        The ending that was reached ("Good ending" or "Bad ending"), or "Lost" if the character was defeated.
+    """
+    return load_campaign(STEP_HANDLERS).play(character)
+
+
+def play_arena(character) -> str | None:
+    """
+    Plays a real-time battle against the enemies of the arena, deciding their actions with their behavior trees.
+
+    Parameters
+    ----------
+    character
+        The main character controlled by the player.
+
+    Returns
+    -------
+    str | None
+        The result of the battle ("Won", "Fled" or "Lost").
+    """
+    enemies = []
+    for name in ARENA_ENEMIES:
+        enemies.append(ENEMY_FACTORY[name]())
+        enemies[-1].behavior = load_behaviors().get(name)
+    return play_realtime(character, enemies)
+
+
 if __name__ == "__main__":
-    typewriter_effect("You are on a mission, Your goal is to retrieve something that is Yours. ")
-    typewriter_effect("You land in a forest, surrounded by silence.")
-    typewriter_effect("You look around and suddenly hear a strange noise. YOU HAVE TO FIGHT!")
-    typewriter_effect("YOUR ENEMY IS A BOAR")
-    box("TUTORIAL: Few options will show on your screen, choose one.")
-
-    main_character.backpack.add_item("Small Health Potion")
-    main_character.backpack.add_item("Big Attack Potion")
-
-    every_fight(Boar)
-
-    typewriter_effect("When you are walking, You notice on the floor a similar bracelet to Yours,")
-    typewriter_effect("'I know I'm close', You say to Yourself.")
-    typewriter_effect("While walking You find a Big Health Potion!")
-
-    main_character.backpack.add_item("Big Health Potion")
-
-    typewriter_effect("Suddenly, You hear a loud Growl. YOU HAVE TO FIGHT")
-    typewriter_effect("YOUR ENEMY IS A BEAR")
-
-    every_fight(Bear)
-
-    if main_character.violence == 2:
-        typewriter_effect("THE SILENCE IS OVERWHELMING. I WILL NOT STOP.")
-        time.sleep(2)
-
-    typewriter_effect("You notice a smoke not far from here.")
-    typewriter_effect("'He must be there'")
-    typewriter_effect("You walk towards it, but in your way you see someone, who NEEDS to be hurt.")
-    typewriter_effect("YOUR ENEMY IS A ZOMBIE")
-
-    every_fight(Zombie)
-
-    if main_character.violence == 3:
-        print("YOU CUT OF HIS LIMBS. NOW ONLY HEAD REMAINS. FINISH HIM.")
-        worst_fight(Zombie)
-
-    typewriter_effect("You finally arrived to the source of the smoke.")
-    typewriter_effect("It's a small house.")
-    typewriter_effect("As you go inside, You see something you never wished to.")
-    typewriter_effect("YOUR ENEMY IS A WEREWOLF")
-
-    every_fight(Werewolf)
-
-    if main_character.violence == 4:
-        typewriter_effect("THE WEREWOLF LOSES HIS POWER. HE TURNS INTO A HUMAN.")
-        time.sleep(4)
-        typewriter_effect("FINISH HIM, AS YOU DID THE REST.")
-        time.sleep(4)
-        worst_fight(Werewolf)
-        typewriter_effect("I HAVE KILLED THEM ALL.")
-        time.sleep(2)
-
-    typewriter_effect("You did It.")
-    time.sleep(2)
-    typewriter_effect("You finally managed to find Him.")
-    time.sleep(3)
-    typewriter_effect("As You look at Him, You know it's Your SON.")
-    time.sleep(3)
-
-    if main_character.violence == 4:
-        typewriter_effect("BUT. YOU DON'T. RECOGNIZE. YOURSELF.")
-        time.sleep(3)
-
-    typewriter_effect("As You walk forward to Hug him.")
-    time.sleep(3)
-
-    if main_character.violence == 4:
-        typewriter_effect("You feel a sting.")
-        time.sleep(2)
-        typewriter_effect("YOU. HAVE. JUST. BEEN. STABBED.", delay=0.2)
-        time.sleep(2)
-        typewriter_effect("BY. YOUR. OWN. SON.", delay=0.2)
-        time.sleep(2)
-        typewriter_effect("WAS. IT. WORTH. IT.")
-        time.sleep(3)
-        typewriter_effect("As You bleed out. Your Son says to you: ")
-        time.sleep(2)
-        typewriter_effect("I. HATE. YOU.")
-        time.sleep(2)
-        typewriter_effect("GAME. OVER.")
-        time.sleep(2)
-        typewriter_effect("BAD ENDING")
+    if "--practice" in sys.argv:
+        sys.argv.remove("--practice")
+        PRACTICE_MODE = True
+    realtime_mode = "--realtime" in sys.argv
+    if realtime_mode:
+        sys.argv.remove("--realtime")
+    survival_mode = "--survival" in sys.argv
+    if survival_mode:
+        sys.argv.remove("--survival")
+    if len(sys.argv) > 1:
+        set_provider(ScriptedInput(sys.argv[1]))
+    if get_provider().pauses:
+        PREDICTOR = WinPredictor()
+    # The console pauses after its messages: in real time, it runs in its own thread, so it never stalls the battle.
+    BUS.subscribe(ConsoleSubscriber(), queue_size=REALTIME_CONSOLE_QUEUE if realtime_mode else None)
+    main_character = create_main_character()
+    if realtime_mode:
+        play_arena(main_character)
+        BUS.join()
         sys.exit(0)
-
-    typewriter_effect("He hugs you back.")
-    time.sleep(1)
-    typewriter_effect("You were finally reunited.")
-    time.sleep(2)
-    typewriter_effect("It was worth it.")
-    time.sleep(4)
-    typewriter_effect("GOOD ENDING")
+    if survival_mode:
+        # The survival mode needs NumPy, which the story doesn't, so it is only imported here.
+        from waves import survival
+        print(f"You survived {survival(main_character)} waves.")
+        sys.exit(0)
+    profiles = ProfileStore()
+    RECORDER = RunRecorder(profiles, main_character)
+    BUS.subscribe(RECORDER, RunRecorder.EVENT_TYPES)
+    try:
+        RECORDER.end_run(play_story(main_character))
+    finally:
+        profiles.close()
@@ -0,0 +1,238 @@
+"""
+Module for a background estimator of the win chance of every action, computed while the player is choosing.
+
+While the game waits for the player's answer, a worker thread estimates, for every action the character can take,
+the probability of winning the fight and the expected number of rounds left. It plays random rollouts from the
+current `CombatState` with the pure rules of the `combatstate` module, so it never touches the live fight nor
+publishes any event. The estimates are kept in an LRU cache keyed by a compact key of the state, so coming back to an
+equivalent state answers at once.
+
+The prompt never waits for the estimator: `hint` returns the estimates if they are ready, and nothing otherwise.
+Only the latest request is kept, so the estimator never falls behind the fight.
+
+Imports:
+--------
+- `random`: Provides the generator of the rollouts, private to the worker thread.
+- `threading`: Runs the estimator in a daemon thread.
+- `collections`: Provides `OrderedDict`, used for the LRU cache.
+- `combatstate`: Provides the pure rules of the fight.
+
+Classes:
+--------
+- WinPredictor: Estimates the win chance of every action in a background thread.
+
+Functions:
+----------
+- state_key: Returns the compact key of a state.
+- rollout_policy: Chooses the actions of the rollouts.
+- estimate_action: Estimates the win chance and the rounds left after an action.
+
+Example:
+--------
+predictor = WinPredictor()
+predictor.request(CombatState.capture(character, enemy))
+print(predictor.hint(CombatState.capture(character, enemy)))
+"""
+
+import random
+import threading
+from collections import OrderedDict
+
+from combatstate import act, legal_actions, play_round
+
+
+def state_key(state) -> tuple:
+    """
+    Returns the compact key of a state: only what changes during a fight, rounded, plus the names identifying the
+    build and the behavior tree of the enemy.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state.
+
+    Returns
+    -------
+    tuple
+        The key.
+    """
+    character, enemy = state.character, state.enemy
+    return (
+        character.ability.name, round(character.max_hp), round(character.hp), round(character.damage, 1),
+        character.defence_points, character.cooldown_left, character.buff_stat,
+        character.buff_time if character.buff_stat else 0, tuple(sorted(character.items)),
+        round(enemy.hp), round(enemy.damage), enemy.defence_points, enemy.d_o_t_time, enemy.stun, enemy.guarding,
+        enemy.ability_cooldowns, enemy.behavior,
+    )
+
+
+def rollout_policy(state) -> tuple:
+    """
+    Chooses the actions of the rollouts, like `simulation.default_policy`: heal when low, use the ability when ready,
+    attack otherwise.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state before the action.
+
+    Returns
+    -------
+    tuple
+        The action and its argument.
+    """
+    character = state.character
+    if character.hp < character.max_hp * 0.35:
+        for name in character.items:
+            if name.endswith("Health Potion"):
+                return "Item", name
+    if character.cooldown_left <= 0:
+        return "Ability", None
+    return "Attack", None
+
+
+def estimate_action(state, action, rollouts=200, rng=None, max_rounds=200) -> tuple:
+    """
+    Estimates the win chance and the number of rounds left after an action, with random rollouts.
+
+    Parameters
+    ----------
+    state : CombatState
+        The state before the action, after the start of the round.
+    action : tuple
+        The action and its argument.
+    rollouts : int, optional
+        The number of rollouts (default is 200).
+    rng : random.Random, optional
+        The generator of the rolls (default is a new generator).
+    max_rounds : int, optional
+        The number of rounds after which a rollout counts as lost (default is 200).
+
+    Returns
+    -------
+    tuple
+        The win chance, an enemy running away counting as a win, and the mean number of rounds left, counting the
+        current one.
+    """
+    rng = rng or random.Random()
+    wins = rounds = 0
+    for _ in range(rollouts):
+        current = act(state, action, rng)
+        played = 1
+        while current.outcome not in ("Won", "Lost", "Fled") and played < max_rounds:
+            current = play_round(current, rollout_policy(current), rng)
+            played += 1
+        wins += current.outcome in ("Won", "Fled")
+        rounds += played
+    return wins / rollouts, rounds / rollouts
+
+
+class WinPredictor:
+    """
+    A class estimating the win chance of every action in a background thread.
+
+    Attributes
+    ----------
+    rollouts : int
+        The number of rollouts per action.
+    cache_size : int
+        The maximum number of states kept in the cache.
+    """
+
+    def __init__(self, rollouts=200, cache_size=256):
+        """
+        Initializes the predictor and starts its worker thread.
+
+        Parameters
+        ----------
+        rollouts : int, optional
+            The number of rollouts per action (default is 200).
+        cache_size : int, optional
+            The maximum number of states kept in the cache (default is 256).
+        """
+        self.rollouts = rollouts
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = None
+        self._rng = random.Random()
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def request(self, state) -> None:
+        """
+        Asks for the estimates of a state, without waiting. A request not started yet is replaced.
+
+        Parameters
+        ----------
+        state : CombatState
+            The state before the character's action.
+        """
+        key = state_key(state)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return
+            self._pending = (key, state)
+            self._wake.notify()
+
+    def estimates(self, state) -> dict | None:
+        """
+        Returns the estimates of a state, if they are ready.
+
+        Parameters
+        ----------
+        state : CombatState
+            The state.
+
+        Returns
+        -------
+        dict | None
+            The win chance and the rounds left of every action, or None if they are not ready.
+        """
+        key = state_key(state)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def hint(self, state) -> str:
+        """
+        Returns the estimates of a state as a line shown before the action prompt, if they are ready.
+
+        Parameters
+        ----------
+        state : CombatState
+            The state.
+
+        Returns
+        -------
+        str
+            The line, or an empty string if the estimates are not ready.
+        """
+        if not (estimates := self.estimates(state)):
+            return ""
+        parts = [
+            f"{name}{f' ({argument})' if argument else ''} {chance:.0%} (~{rounds:.0f} rounds)"
+            for (name, argument), (chance, rounds) in estimates.items()
+        ]
+        return "Win chance: " + ",  ".join(parts) + "\n"
+
+    def _work(self) -> None:
+        """
+        The loop of the worker thread: estimates the latest requested state, and caches the estimates.
+        """
+        while True:
+            with self._lock:
+                while self._pending is None:
+                    self._wake.wait()
+                key, state = self._pending
+                self._pending = None
+            estimates = {
+                action: estimate_action(state, action, self.rollouts, self._rng) for action in legal_actions(state)
+            }
+            with self._lock:
+                self._cache[key] = estimates
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
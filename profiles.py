@@ -0,0 +1,656 @@
+"""
+Module for saving the player profiles, their runs and the summary of every fight in a local SQLite database.
+
+The database runs in WAL mode, so the reads of the game never wait for a write and a write never waits for the reads.
+Its connections are kept in a small `ConnectionPool`, opened once and reused, instead of being opened for every query.
+
+Nothing is written on the game loop: saving a fight or a run only queues its rows, a constant-time operation, and a
+writer thread drains the queue in the background, writing everything queued so far in a single transaction. A batch
+is one commit, however many rows it holds, so the cost of a commit is shared by the rows written together.
+
+The leaderboards (the fastest werewolf kill, the fewest potions used in a won run, and the longest win streak, for
+every race and weapon) are never computed from the history of the runs. They are tables of their own, kept up to date
+in the transaction saving every run: a run only updates the entries of its own profile and build, which are indexed,
+so saving a run costs the same and a top-N query reads only N index entries, however many runs are stored. Only the
+best score of every profile is kept on each board, and the current win streak of every profile and build is kept
+with it in the `streaks` table.
+
+Imports:
+--------
+- `logging`: Reports the batches that could not be written.
+- `os`: Used to locate the default database next to this module.
+- `queue`: Provides the queue of pending writes and the idle connections of the pool.
+- `sqlite3`: The database.
+- `threading`: Runs the writer thread.
+- `time`: Timestamps the profiles and runs.
+- `uuid`: Provides the identifiers of the runs, known before their rows are written.
+- `contextlib`: Provides `contextmanager`, used to borrow the connections of the pool.
+- `events`: Provides the events counted by the run recorder.
+
+Classes:
+--------
+- ConnectionPool: Reusable connections to a database in WAL mode.
+- ProfileStore: Saves the profiles, runs and fights with batched write-behind, and reads them and the leaderboards
+  back.
+- RunRecorder: Records the fights and the ending of a run, subscribed to the event bus.
+
+Example:
+--------
+store = ProfileStore()
+recorder = RunRecorder(store, character)
+BUS.subscribe(recorder, RunRecorder.EVENT_TYPES)
+...
+store.close()
+print(store.endings(character.name))
+print(store.top("win_streak", race="Human", weapon="Sword"))
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from events import DotTick, Hit, ItemUsed
+
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.db")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS profiles (
+        name TEXT PRIMARY KEY,
+        race TEXT NOT NULL,
+        weapon TEXT NOT NULL,
+        violence INTEGER NOT NULL,
+        runs INTEGER NOT NULL,
+        updated REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY,
+        profile TEXT NOT NULL,
+        race TEXT NOT NULL,
+        weapon TEXT NOT NULL,
+        ending TEXT NOT NULL,
+        violence INTEGER NOT NULL,
+        fights INTEGER NOT NULL,
+        rounds INTEGER NOT NULL,
+        potions_used INTEGER NOT NULL,
+        finished REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS runs_by_profile ON runs (profile, finished)",
+    """CREATE TABLE IF NOT EXISTS streaks (
+        profile TEXT NOT NULL,
+        race TEXT NOT NULL,
+        weapon TEXT NOT NULL,
+        current INTEGER NOT NULL,
+        best INTEGER NOT NULL,
+        PRIMARY KEY (profile, race, weapon)
+    )""",
+    """CREATE TABLE IF NOT EXISTS leaderboards (
+        board TEXT NOT NULL,
+        race TEXT NOT NULL,
+        weapon TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        run TEXT NOT NULL,
+        achieved REAL NOT NULL,
+        PRIMARY KEY (board, race, weapon, profile)
+    )""",
+    "CREATE INDEX IF NOT EXISTS leaderboards_by_build ON leaderboards (board, race, weapon, score, achieved)",
+    "CREATE INDEX IF NOT EXISTS leaderboards_by_board ON leaderboards (board, score, achieved)",
+    """CREATE TABLE IF NOT EXISTS fights (
+        run TEXT NOT NULL,
+        number INTEGER NOT NULL,
+        enemy TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        rounds INTEGER NOT NULL,
+        damage_dealt REAL NOT NULL,
+        damage_taken REAL NOT NULL,
+        potions_used INTEGER NOT NULL,
+        PRIMARY KEY (run, number)
+    )""",
+)
+
+SAVE_PROFILE = """INSERT INTO profiles (name, race, weapon, violence, runs, updated) VALUES (?, ?, ?, ?, 1, ?)
+    ON CONFLICT (name) DO UPDATE SET
+        race = excluded.race, weapon = excluded.weapon, violence = excluded.violence, runs = runs + 1,
+        updated = excluded.updated"""
+SAVE_RUN = "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SAVE_FIGHT = "INSERT INTO fights VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+# The sign of the scores of every board, stored so that the lowest stored score is always the best.
+BOARDS = {"fastest_werewolf_kill": 1, "fewest_potions": 1, "win_streak": -1}
+
+# Keeps the best score of a profile on a board and build, and the run that reached it.
+_KEEP_BEST = """ON CONFLICT (board, race, weapon, profile) DO UPDATE SET
+        score = excluded.score, run = excluded.run, achieved = excluded.achieved
+    WHERE excluded.score < score"""
+RANK_SCORE = "INSERT INTO leaderboards VALUES (?, ?, ?, ?, ?, ?, ?) " + _KEEP_BEST
+RANK_FASTEST_KILL = """INSERT INTO leaderboards
+    SELECT 'fastest_werewolf_kill', ?2, ?3, ?4, MIN(rounds), ?1, ?5 FROM fights
+    WHERE run = ?1 AND enemy = 'werewolf' AND outcome = 'Won' GROUP BY run """ + _KEEP_BEST
+SAVE_STREAK = """INSERT INTO streaks VALUES (?1, ?2, ?3, ?4, ?4)
+    ON CONFLICT (profile, race, weapon) DO UPDATE SET
+        current = CASE WHEN excluded.current THEN current + 1 ELSE 0 END,
+        best = MAX(best, CASE WHEN excluded.current THEN current + 1 ELSE 0 END)"""
+RANK_STREAK = """INSERT INTO leaderboards
+    SELECT 'win_streak', race, weapon, profile, -best, ?4, ?5 FROM streaks
+    WHERE profile = ?1 AND race = ?2 AND weapon = ?3 AND current = best AND best > 0 """ + _KEEP_BEST
+
+# Queued to stop the writer thread.
+_STOP = None
+
+
+def _build(character) -> tuple:
+    """
+    Returns the names of the race and the weapon of a character ("Human", "Sword", ...).
+    """
+    return type(character.race).__name__, type(character.weapon).__name__
+
+
+def _rank_run(run, profile, race, weapon, ending, potions_used, finished) -> list:
+    """
+    Returns the statements updating the win streak and the leaderboards with a run, its fights being saved already.
+    """
+    won = ending != "Lost"
+    statements = [
+        (SAVE_STREAK, (profile, race, weapon, int(won))),
+        (RANK_STREAK, (profile, race, weapon, run, finished)),
+        (RANK_FASTEST_KILL, (run, race, weapon, profile, finished)),
+    ]
+    if won:
+        statements.append((RANK_SCORE, ("fewest_potions", race, weapon, profile, potions_used, run, finished)))
+    return statements
+
+
+class ConnectionPool:
+    """
+    A class keeping reusable connections to a SQLite database in WAL mode.
+
+    Connections are opened on demand, up to the size of the pool, and given back to the pool once used. When all of
+    them are in use, borrowing one waits until another is given back.
+
+    Attributes
+    ----------
+    path : str
+        The path of the database.
+    size : int
+        The maximum number of connections.
+    """
+
+    def __init__(self, path, size=4):
+        """
+        Initializes the pool, with no connection opened yet.
+
+        Parameters
+        ----------
+        path : str
+            The path of the database.
+        size : int, optional
+            The maximum number of connections (default is 4).
+        """
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Opens a connection, switching the database to WAL mode.
+        """
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode, a commit is durable once the log is synced at a checkpoint, which is safe against crashes.
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection from the pool, given back when the `with` block ends.
+
+        Yields
+        ------
+        sqlite3.Connection
+            The connection.
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                self._opened += can_open
+            connection = self._open() if can_open else self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """
+        Closes the idle connections of the pool.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+
+
+class ProfileStore:
+    """
+    A class saving the profiles, runs and fights in a SQLite database, written behind the game by a writer thread.
+
+    Attributes
+    ----------
+    pool : ConnectionPool
+        The connections to the database.
+    batch_size : int
+        The maximum number of records (a profile, a run or a fight) written in one transaction.
+    written : int
+        The number of records written.
+    batches : int
+        The number of transactions committed.
+    failed : int
+        The number of records lost because their batch could not be written.
+    """
+
+    def __init__(self, path=None, pool_size=4, batch_size=512):
+        """
+        Opens the database, creating its tables if needed, and starts the writer thread.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the database (default is `profiles.db` next to this module).
+        pool_size : int, optional
+            The maximum number of connections (default is 4).
+        batch_size : int, optional
+            The maximum number of records written in one transaction (default is 512).
+        """
+        self.pool = ConnectionPool(path or PROFILES_PATH, pool_size)
+        self.batch_size = batch_size
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        with self.pool.connection() as connection, connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_behind, daemon=True)
+        self._writer.start()
+
+    def save_profile(self, character) -> None:
+        """
+        Queues the profile of a character: their race, weapon and violence score, one more run being counted.
+
+        Parameters
+        ----------
+        character : Character
+            The character.
+        """
+        self._writes.put(((SAVE_PROFILE, (character.name, *_build(character), character.violence, time.time())),))
+
+    def save_run(self, run, character, ending, fights, rounds, potions_used) -> None:
+        """
+        Queues a completed run, updating the win streak of its profile and the leaderboards in the same transaction.
+
+        Parameters
+        ----------
+        run : str
+            The identifier of the run.
+        character : Character
+            The character of the run.
+        ending : str
+            The ending reached ("Good ending" or "Bad ending"), or "Lost" if the character was defeated.
+        fights : int
+            The number of fights.
+        rounds : int
+            The number of rounds of all the fights.
+        potions_used : int
+            The number of potions used during the fights.
+        """
+        profile, (race, weapon), finished = character.name, _build(character), time.time()
+        self._writes.put((
+            (SAVE_RUN, (
+                run, profile, race, weapon, ending, character.violence, fights, rounds, potions_used, finished
+            )),
+            *_rank_run(run, profile, race, weapon, ending, potions_used, finished),
+        ))
+
+    def save_fight(self, run, number, enemy, outcome, rounds, damage_dealt, damage_taken, potions_used) -> None:
+        """
+        Queues the summary of a fight.
+
+        Parameters
+        ----------
+        run : str
+            The identifier of the run.
+        number : int
+            The number of the fight in the run, from 1.
+        enemy : str
+            The type of the enemy, as found in `ENEMY_FACTORY`.
+        outcome : str
+            The result of the fight ("Won", "Lost" or "Fled").
+        rounds : int
+            The number of rounds.
+        damage_dealt : float
+            The damage dealt to the enemy, including the damage over time.
+        damage_taken : float
+            The damage taken from the enemy.
+        potions_used : int
+            The number of potions used.
+        """
+        self._writes.put(((SAVE_FIGHT, (
+            run, number, enemy, outcome, rounds, damage_dealt, damage_taken, potions_used
+        )),))
+
+    def _write_behind(self) -> None:
+        """
+        Writes the queued records, in the writer thread: every batch holds the records queued so far, up to
+        `batch_size`, and is written in one transaction.
+        """
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            try:
+                if records:
+                    with self.pool.connection() as connection, connection:
+                        for record in records:
+                            for statement, parameters in record:
+                                connection.execute(statement, parameters)
+                    self.written += len(records)
+                    self.batches += 1
+            except sqlite3.Error:
+                self.failed += len(records)
+                logging.getLogger("profiles").exception("Could not save %d records", len(records))
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def flush(self) -> None:
+        """
+        Waits until every queued record is written.
+        """
+        self._writes.join()
+
+    def close(self) -> None:
+        """
+        Writes every queued record, stops the writer thread and closes the connections.
+        """
+        if self._writer.is_alive():
+            self._writes.put(_STOP)
+            self._writer.join()
+        self.pool.close()
+
+    def rebuild_leaderboards(self) -> None:
+        """
+        Rebuilds the win streaks and the leaderboards from the history of the runs, replaying the runs in the order
+        they finished. Only needed for a database saved before the leaderboards existed.
+        """
+        self.flush()
+        with self.pool.connection() as connection, connection:
+            connection.execute("DELETE FROM streaks")
+            connection.execute("DELETE FROM leaderboards")
+            history = connection.execute(
+                "SELECT id, profile, race, weapon, ending, potions_used, finished FROM runs ORDER BY finished"
+            )
+            for run in history:
+                for statement, parameters in _rank_run(*run):
+                    connection.execute(statement, parameters)
+
+    def top(self, board, count=10, race=None, weapon=None) -> list:
+        """
+        Returns the best entries of a leaderboard, for a build or for every build.
+
+        Parameters
+        ----------
+        board : str
+            The leaderboard, one of `BOARDS`.
+        count : int, optional
+            The maximum number of entries returned (default is 10).
+        race : str, optional
+            The race of the build ("Human", ...), given with its weapon (default is every build).
+        weapon : str, optional
+            The weapon of the build ("Sword", ...), given with its race (default is every build).
+
+        Returns
+        -------
+        list
+            The `(profile, race, weapon, score, run)` rows, the best first, the earliest first among equal scores.
+
+        Raises
+        ------
+        ValueError
+            If the board is unknown, or only one of the race and the weapon is given.
+        """
+        if board not in BOARDS:
+            raise ValueError(f"Unknown leaderboard '{board}'")
+        if (race is None) != (weapon is None):
+            raise ValueError("A build needs both a race and a weapon")
+        build, parameters = ("AND race = ? AND weapon = ? ", (board, race, weapon)) if race else ("", (board,))
+        rows = self._query(
+            f"SELECT profile, race, weapon, score, run FROM leaderboards WHERE board = ? {build}"
+            "ORDER BY score, achieved LIMIT ?", (*parameters, count)
+        )
+        return [(*row[:3], row[3] * BOARDS[board], row[4]) for row in rows]
+
+    def _query(self, statement, parameters=()) -> list:
+        """
+        Runs a read query on a connection of the pool.
+        """
+        with self.pool.connection() as connection:
+            return connection.execute(statement, parameters).fetchall()
+
+    def profile(self, name) -> dict | None:
+        """
+        Returns a saved profile.
+
+        Parameters
+        ----------
+        name : str
+            The name of the character.
+
+        Returns
+        -------
+        dict | None
+            The race, weapon, violence score and number of runs of the profile, or None if it was never saved.
+        """
+        rows = self._query("SELECT race, weapon, violence, runs FROM profiles WHERE name = ?", (name,))
+        return dict(zip(("race", "weapon", "violence", "runs"), rows[0])) if rows else None
+
+    def endings(self, name) -> dict:
+        """
+        Returns the endings a profile reached.
+
+        Parameters
+        ----------
+        name : str
+            The name of the character.
+
+        Returns
+        -------
+        dict
+            The number of runs of the profile that reached every ending.
+        """
+        return dict(self._query("SELECT ending, COUNT(*) FROM runs WHERE profile = ? GROUP BY ending", (name,)))
+
+    def runs(self, name, limit=10) -> list:
+        """
+        Returns the last runs of a profile.
+
+        Parameters
+        ----------
+        name : str
+            The name of the character.
+        limit : int, optional
+            The maximum number of runs returned (default is 10).
+
+        Returns
+        -------
+        list
+            The `(run, ending, violence, fights, rounds, potions used)` rows, the last run first.
+        """
+        return self._query(
+            "SELECT id, ending, violence, fights, rounds, potions_used FROM runs WHERE profile = ? "
+            "ORDER BY finished DESC LIMIT ?", (name, limit)
+        )
+
+    def fights(self, run) -> list:
+        """
+        Returns the summaries of the fights of a run.
+
+        Parameters
+        ----------
+        run : str
+            The identifier of the run.
+
+        Returns
+        -------
+        list
+            The `(enemy, outcome, rounds, damage dealt, damage taken, potions used)` rows, in the order of the fights.
+        """
+        return self._query(
+            "SELECT enemy, outcome, rounds, damage_dealt, damage_taken, potions_used FROM fights WHERE run = ? "
+            "ORDER BY number", (run,)
+        )
+
+
+class RunRecorder:
+    """
+    A subscriber of the event bus recording a run: it sums the damage and potions of the current fight from the
+    events, and saves every fight and the ending of the run to a `ProfileStore`.
+
+    Attributes
+    ----------
+    EVENT_TYPES : tuple
+        The event types the recorder needs, to subscribe it with.
+    store : ProfileStore
+        The store the run is saved to.
+    character : Character
+        The character of the run.
+    run : str
+        The identifier of the run.
+    enemy : str | None
+        The type of the enemy fought, if any.
+    fights : int
+        The number of fights recorded.
+    rounds : int
+        The number of rounds of the fights recorded.
+    potions_used : int
+        The number of potions used during the fights recorded.
+    """
+
+    EVENT_TYPES = (Hit, DotTick, ItemUsed)
+
+    def __init__(self, store, character):
+        """
+        Starts recording a run.
+
+        Parameters
+        ----------
+        store : ProfileStore
+            The store the run is saved to.
+        character : Character
+            The character of the run.
+        """
+        self.store = store
+        self.character = character
+        self.run = uuid.uuid4().hex
+        self.enemy = None
+        self.fights = 0
+        self.rounds = 0
+        self.potions_used = 0
+        self._dealt = self._taken = 0.0
+        self._potions = 0
+
+    def __call__(self, batch) -> None:
+        """
+        Sums the damage and potions of a batch of events into the current fight.
+
+        Parameters
+        ----------
+        batch : list
+            The events of a round.
+        """
+        for event in batch:
+            match event:
+                case Hit(attacker="enemy"):
+                    self._taken += event.damage
+                case Hit() | DotTick():
+                    self._dealt += event.damage
+                case ItemUsed():
+                    self._potions += 1
+
+    def tally(self) -> tuple:
+        """
+        Returns the damage dealt and taken and the potions used so far in the current fight.
+        """
+        return self._dealt, self._taken, self._potions
+
+    def restore(self, tally) -> None:
+        """
+        Restores the damage and potions of the current fight to an earlier tally, when rounds are rewound.
+
+        Parameters
+        ----------
+        tally : tuple
+            The damage dealt and taken and the potions used, as returned by `tally`.
+        """
+        self._dealt, self._taken, self._potions = tally
+
+    def start_fight(self, enemy) -> None:
+        """
+        Starts recording a fight.
+
+        Parameters
+        ----------
+        enemy : str
+            The type of the enemy, as found in `ENEMY_FACTORY`.
+        """
+        self.enemy = enemy
+        self._dealt = self._taken = 0.0
+        self._potions = 0
+
+    def end_fight(self, outcome, rounds) -> None:
+        """
+        Saves the fight.
+
+        Parameters
+        ----------
+        outcome : str
+            The result of the fight ("Won", "Lost" or "Fled").
+        rounds : int
+            The number of rounds.
+        """
+        self.fights += 1
+        self.rounds += rounds
+        self.potions_used += self._potions
+        self.store.save_fight(
+            self.run, self.fights, self.enemy, outcome, rounds, self._dealt, self._taken, self._potions
+        )
+
+    def end_run(self, ending) -> None:
+        """
+        Saves the run and the profile of its character.
+
+        Parameters
+        ----------
+        ending : str
+            The ending reached, or "Lost" if the character was defeated.
+        """
+        self.store.save_run(self.run, self.character, ending, self.fights, self.rounds, self.potions_used)
+        self.store.save_profile(self.character)
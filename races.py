@@ -9,7 +9,7 @@ Classes:
 --------
 - Race: A base class representing common attributes for all races.
 - Ork: A subclass of `Race` representing the Ork race with specific stats.
-- Goblin: A subclass of `Race` representing the Goblin race with specific stats.
+- Goblin: A subclass of `Race` representing the Goblin race with specific stats and the Dirty Trick ability.
 - Elf: A subclass of `Race` representing the Elf race with specific stats.
 - Human: A subclass of `Race` representing the Human race with specific stats.
 
@@ -26,6 +26,9 @@ human = Human()
 print(human)
 """
 
+from abilities import DirtyTrick
+from fixedpoint import FixedPointStat
+
 
 class Race:
     """
@@ -45,6 +48,13 @@ class Race:
         The maximum defense of the character.
     defence : float
         The current defense of the character.
+    abilities : list
+        The abilities granted by this race, in addition to the weapon's ability.
+    speed : int
+        The initiative of the character, deciding who acts first in a round.
+
+    The defences are stored as integer hundredths (see `fixedpoint`), so potions and the Defend command bring them
+    back exactly to their base value.
 
     Methods
     -------
@@ -52,7 +62,10 @@ class Race:
         Returns a string representation of the race attributes, including HP, damage, and defense.
     """
 
-    def __init__(self, max_hp, hp, max_damage, damage, max_defence, defence):
+    max_defence = FixedPointStat()
+    defence = FixedPointStat()
+
+    def __init__(self, max_hp, hp, max_damage, damage, max_defence, defence, abilities=None, speed=10):
         """
         Initializes a race with specific attributes.
 
@@ -70,6 +83,10 @@ class Race:
             The maximum defense of the character.
         defence : float
             The current defense of the character.
+        abilities : list, optional
+            The abilities granted by this race (default is none).
+        speed : int, optional
+            The initiative of the character (default is 10).
         """
         self.max_hp = max_hp
         self.hp = hp
@@ -77,6 +94,8 @@ class Race:
         self.damage = damage
         self.max_defence = max_defence
         self.defence = defence
+        self.abilities = abilities or []
+        self.speed = speed
 
     def __str__(self) -> str:
         """
@@ -107,7 +126,8 @@ class Ork(Race):
         """
         Initializes the Ork race with predefined attributes.
 
-        The Ork has 2200 HP, 10 damage, 1.8 defense, and the same maximum values for damage and defense.
+        The Ork has 2200 HP, 10 damage, 1.8 defense, the same maximum values for damage and defense,
+        and a speed of 8.
         """
         super().__init__(
             max_hp=2200,
@@ -115,7 +135,8 @@ class Ork(Race):
             max_damage=10,
             damage=10,
             max_defence=1.8,
-            defence=1.8
+            defence=1.8,
+            speed=8
         )
 
 
@@ -123,7 +144,7 @@ class Goblin(Race):
     """
     A subclass of `Race` representing the Goblin race.
 
-    The Goblin race has lower HP but higher damage compared to other races.
+    The Goblin race has lower HP but higher damage compared to other races, and knows the Dirty Trick ability.
 
     Methods
     -------
@@ -135,7 +156,8 @@ class Goblin(Race):
         """
         Initializes the Goblin race with predefined attributes.
 
-        The Goblin has 170 HP, 15 damage, 1.3 defense, and the same maximum values for damage and defense.
+        The Goblin has 170 HP, 15 damage, 1.3 defense, the same maximum values for damage and defense,
+        the Dirty Trick ability, and a speed of 14.
         """
         super().__init__(
             max_hp=170,
@@ -143,7 +165,9 @@ class Goblin(Race):
             max_damage=15,
             damage=15,
             max_defence=1.3,
-            defence=1.3
+            defence=1.3,
+            abilities=[DirtyTrick()],
+            speed=14
         )
 
 
@@ -163,7 +187,8 @@ class Elf(Race):
         """
         Initializes the Elf race with predefined attributes.
 
-        The Elf has 190 HP, 13 damage, 1.4 defense, and the same maximum values for damage and defense.
+        The Elf has 190 HP, 13 damage, 1.4 defense, the same maximum values for damage and defense,
+        and a speed of 12.
         """
         super().__init__(
             max_hp=190,
@@ -171,7 +196,8 @@ class Elf(Race):
             max_damage=13,
             damage=13,
             max_defence=1.4,
-            defence=1.4
+            defence=1.4,
+            speed=12
         )
 
 
@@ -191,7 +217,8 @@ class Human(Race):
         """
         Initializes the Human race with predefined attributes.
 
-        The Human has 200 HP, 11 damage, 1.5 defense, and the same maximum values for damage and defense.
+        The Human has 200 HP, 11 damage, 1.5 defense, the same maximum values for damage and defense,
+        and a speed of 10.
         """
         super().__init__(
             max_hp=200,
@@ -199,5 +226,6 @@ class Human(Race):
             max_damage=11,
             damage=11,
             max_defence=1.5,
-            defence=1.5
+            defence=1.5,
+            speed=10
         )
@@ -0,0 +1,382 @@
+"""
+Module for the optional real-time mode of the combat, in the style of an active time battle.
+
+Instead of alternating turns, every combatant has an action gauge that fills at the rate of their speed. Enemies act
+as soon as their gauge is full, following the last decision of their behavior tree, evaluated every tick by a
+`behavior.Planner` within a time budget. The character acts when their gauge is full and the player has given a
+command. Commands arrive without blocking the battle (typed on the console in a separate thread, or submitted by
+code) and are applied on the next tick.
+
+The battle runs on an asyncio loop with a fixed timestep: the gauges always advance by the same amount of time per
+tick, whatever the speed of the rendering, and the loop keeps a steady tick rate by scheduling every tick from the
+start time rather than from the end of the previous one. The duration of every tick is recorded in `TickMetrics`.
+Combat events are published on the event bus like in the turn-based mode; subscribers that pause (like the console)
+should be registered with a queue, so they run in their own thread and don't stall the loop.
+
+Imports:
+--------
+- `asyncio`: Runs the fixed-timestep loop.
+- `collections`: Provides `deque`, used for the pending commands and the recent tick durations.
+- `threading`: Runs the console reader without blocking the loop.
+- `time`: Provides `perf_counter`, used to measure the tick durations.
+- `backpack`, `behavior`, `commands`, `encounters`, `events`, `fight`, `inputs`: The game functions reused by the
+  real-time mode.
+
+Classes:
+--------
+- TickMetrics: Records the durations of the ticks.
+- RealTimeBattle: A battle between a character and enemies, in real time.
+
+Functions:
+----------
+- play_realtime: Plays a real-time battle, with the commands typed on the console.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from backpack import Backpack
+from behavior import Planner
+from commands import CommandTable
+from encounters import TargetIndex
+from events import BUS, Defended, ItemUsed
+from fight import resolve_attack, enemy_act, use_ability, is_d_o_t_active, is_ability_cooldown, is_buff_over
+from inputs import ask
+
+
+GAUGE_FULL = 100
+GAUGE_RATE = 10
+
+
+class TickMetrics:
+    """
+    A class recording the durations of the ticks of a real-time battle.
+
+    Attributes
+    ----------
+    timestep : float
+        The duration of a tick, in seconds.
+    ticks : int
+        The number of ticks played.
+    total : float
+        The total time spent computing ticks, in seconds.
+    longest : float
+        The longest tick duration, in seconds.
+    overruns : int
+        The number of ticks that took longer than the timestep.
+    late : int
+        The number of ticks that started late because the previous ones were too long.
+    recent : deque
+        The durations of the most recent ticks.
+    """
+
+    def __init__(self, timestep, history=256):
+        """
+        Initializes the metrics.
+
+        Parameters
+        ----------
+        timestep : float
+            The duration of a tick, in seconds.
+        history : int, optional
+            The number of recent tick durations kept (default is 256).
+        """
+        self.timestep = timestep
+        self.ticks = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.overruns = 0
+        self.late = 0
+        self.recent = deque(maxlen=history)
+
+    def record(self, duration, lateness) -> None:
+        """
+        Records a tick.
+
+        Parameters
+        ----------
+        duration : float
+            The time spent computing the tick, in seconds.
+        lateness : float
+            How late the tick started compared to its schedule, in seconds.
+        """
+        self.ticks += 1
+        self.total += duration
+        self.longest = max(self.longest, duration)
+        self.overruns += duration > self.timestep
+        self.late += lateness > self.timestep
+        self.recent.append(duration)
+
+    def summary(self) -> dict:
+        """
+        Summarizes the recorded ticks.
+
+        Returns
+        -------
+        dict
+            The number of ticks, the mean and longest duration, the number of overruns and late ticks.
+        """
+        return {
+            "ticks": self.ticks,
+            "mean": self.total / self.ticks if self.ticks else 0.0,
+            "longest": self.longest,
+            "overruns": self.overruns,
+            "late": self.late,
+        }
+
+
+class RealTimeBattle:
+    """
+    A class representing a battle between a character and enemies, in real time.
+
+    Attributes
+    ----------
+    character
+        The character controlled by the player.
+    enemies : list
+        The enemies fighting the character.
+    gauges : dict
+        The action gauge of every combatant, from 0 to `GAUGE_FULL`.
+    pending : deque
+        The commands submitted since the last tick.
+    command : tuple | None
+        The command waiting for the character's gauge to be full, with its argument.
+    defending : bool
+        Whether the character's defence is doubled until their next action.
+    tick_rate : int
+        The number of ticks per second.
+    metrics : TickMetrics
+        The durations of the ticks.
+    planner : Planner
+        Evaluates the behavior trees of the enemies, within a time budget per tick.
+    """
+
+    def __init__(self, character, enemies, tick_rate=20, think_budget=0.002):
+        """
+        Initializes the battle.
+
+        Parameters
+        ----------
+        character
+            The character controlled by the player, already started.
+        enemies : list
+            The enemies fighting the character.
+        tick_rate : int, optional
+            The number of ticks per second (default is 20).
+        think_budget : float, optional
+            The time spent evaluating the enemies' behavior trees per tick, in seconds (default is 2 ms).
+        """
+        self.character = character
+        self.enemies = list(enemies)
+        self.targets = TargetIndex(self.enemies, "lowest_hp")
+        self.gauges = {combatant: 0.0 for combatant in [character, *self.enemies]}
+        self.pending = deque()
+        self.command = None
+        self.defending = False
+        self.tick_rate = tick_rate
+        self.metrics = TickMetrics(1 / tick_rate)
+        self.planner = Planner(think_budget)
+        self.actions = CommandTable({
+            "Attack": self.attack,
+            "Defend": self.defend,
+            "Ability": self.ability,
+            "Item": self.item
+        })
+
+    def submit(self, line) -> None:
+        """
+        Submits a command typed by the player, applied on the next tick. Safe to call from any thread.
+
+        Parameters
+        ----------
+        line : str
+            The command, optionally followed by its argument ("item small health potion").
+        """
+        self.pending.append(line)
+
+    def attack(self, target, argument) -> None:
+        """
+        The Attack command: a basic attack on the target.
+        """
+        resolve_attack(self.character, target)
+
+    def defend(self, target, argument) -> None:
+        """
+        The Defend command: the character's defence is doubled until their next action.
+        """
+        BUS.publish(Defended())
+        self.character.race.defence_points *= 2
+        self.defending = True
+
+    def ability(self, target, argument) -> None:
+        """
+        The Ability command: the named ability (the weapon's ability by default) is used on the target, unless it is
+        on cooldown.
+        """
+        abilities = CommandTable({ability.name: ability for ability in self.character.abilities})
+        ability = abilities.resolve(argument) if argument else self.character.weapon.ability
+        if ability is None:
+            print(f"{argument} - You don't have this ability!")
+            return
+        if not is_ability_cooldown(ability, self.character.cooldowns):
+            self.character.cooldowns.trigger(ability)
+            use_ability(ability, target)
+
+    def item(self, target, argument) -> None:
+        """
+        The Item command: the named item is used from the backpack.
+        """
+        items = CommandTable([item.name for item in self.character.backpack.items])
+        if item_name := items.resolve(argument):
+            Backpack.use_item(self.character, item_name)
+            Backpack.delete_item(self.character.backpack, item_name)
+            BUS.publish(ItemUsed(item_name))
+        else:
+            print(f"{argument} - You don't have this item!")
+
+    def step(self, dt) -> str | None:
+        """
+        Plays one tick of the battle.
+
+        Parameters
+        ----------
+        dt : float
+            The duration of the tick, in seconds.
+
+        Returns
+        -------
+        str | None
+            "Won" once no enemy is left and at least one was defeated, "Fled" if all of them ran away, "Lost" if the
+            character is defeated, or None if the battle goes on.
+        """
+        while self.pending:
+            words = self.pending.popleft().strip().split(maxsplit=1)
+            if words and (action := self.actions.resolve(words[0])):
+                self.command = (action, words[1] if len(words) > 1 else "")
+            else:
+                print("Wrong input, please input correctly one of the options.")
+        for combatant, gauge in self.gauges.items():
+            if gauge < GAUGE_FULL and combatant.hp > 0:
+                self.gauges[combatant] = min(GAUGE_FULL, gauge + combatant.speed * GAUGE_RATE * dt)
+        self.planner.think([enemy for enemy in self.enemies if enemy in self.targets.keys], self.character)
+        for enemy in self.enemies:
+            if self.gauges[enemy] >= GAUGE_FULL and enemy in self.targets.keys:
+                self.gauges[enemy] = 0.0
+                if self.enemy_action(enemy) == "Lost":
+                    return "Lost"
+        if self.targets and self.gauges[self.character] >= GAUGE_FULL and self.command:
+            self.gauges[self.character] = 0.0
+            self.character_action()
+        if self.targets:
+            return None
+        return "Won" if any(enemy.hp <= 0 for enemy in self.enemies) else "Fled"
+
+    def enemy_action(self, enemy) -> str | None:
+        """
+        Plays the action of an enemy whose gauge is full, as last decided by the planner.
+
+        Parameters
+        ----------
+        enemy
+            The enemy acting.
+
+        Returns
+        -------
+        str | None
+            "Lost" if the character is defeated, "Fled" if the enemy ran away, or None if the battle goes on.
+        """
+        is_d_o_t_active(enemy)
+        self.targets.update(enemy)
+        if enemy.hp <= 0:
+            return None
+        if enemy.stun > 0:
+            enemy.stun -= 1
+            return None
+        if (outcome := enemy_act(enemy, self.character, self.planner.decision(enemy))) == "Fled":
+            self.targets.remove(enemy)
+            self.planner.forget(enemy)
+        return outcome
+
+    def character_action(self) -> None:
+        """
+        Plays the command of the character, whose gauge is full. Like a round of the turn-based mode, every action
+        advances the cooldowns and the potion buff of the character.
+        """
+        if self.defending:
+            self.character.race.defence_points //= 2
+            self.defending = False
+        self.character.cooldowns.tick()
+        self.character.buff_time[0] -= 1
+        is_buff_over(self.character)
+        action, argument = self.command
+        self.command = None
+        target = self.targets.best()
+        action(target, argument)
+        self.targets.update(target)
+
+    async def run(self, max_ticks=None) -> str | None:
+        """
+        Runs the battle on the fixed-timestep loop until it is over.
+
+        Parameters
+        ----------
+        max_ticks : int, optional
+            The maximum number of ticks played (default is no limit).
+
+        Returns
+        -------
+        str | None
+            "Won", "Fled" or "Lost", or None if the battle was not over after `max_ticks` ticks.
+        """
+        loop = asyncio.get_running_loop()
+        dt = 1 / self.tick_rate
+        scheduled = loop.time()
+        outcome = None
+        while outcome is None and (max_ticks is None or self.metrics.ticks < max_ticks):
+            started = time.perf_counter()
+            lateness = loop.time() - scheduled
+            outcome = self.step(dt)
+            BUS.flush()
+            self.metrics.record(time.perf_counter() - started, lateness)
+            scheduled += dt
+            if loop.time() - scheduled > dt * self.tick_rate:
+                # More than a second behind: resynchronize instead of running a burst of catch-up ticks.
+                scheduled = loop.time()
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+        return outcome
+
+
+def play_realtime(character, enemies, tick_rate=20) -> str | None:
+    """
+    Plays a real-time battle, with the commands typed on the console.
+
+    The commands are read in a daemon thread through the active input provider and submitted to the battle,
+    so the battle never waits for the player.
+
+    Parameters
+    ----------
+    character
+        The character controlled by the player, already started.
+    enemies : list
+        The enemies fighting the character.
+    tick_rate : int, optional
+        The number of ticks per second (default is 20).
+
+    Returns
+    -------
+    str | None
+        "Won", "Fled" or "Lost".
+    """
+    battle = RealTimeBattle(character, enemies, tick_rate)
+
+    def read_commands() -> None:
+        while True:
+            try:
+                battle.submit(ask("Attack  /  Defend  /  Ability [name]  /  Item <name>\n"))
+            except EOFError:
+                return
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    return asyncio.run(battle.run())
@@ -0,0 +1,328 @@
+"""
+Module for storing the results of millions of simulated fights in columnar files, queried through memory maps.
+
+A store is a directory with one raw binary file per column of a fixed schema (race, weapon, enemy, won, turns, hp
+left, damage dealt, abilities used), and a `meta.json` file with the number of rows, the schema and the codes of the
+race, weapon and enemy names. Rows are appended in batches, each column file growing by a contiguous block of values.
+
+Queries open the columns with `numpy.memmap`, so no column is ever read into memory as a whole: group-by queries walk
+through the rows in chunks, accumulating per-group counts and sums with `numpy.bincount`, and the operating system
+pages the files in and out as needed. Memory stays bounded by the chunk size, whatever the number of rows.
+
+This module needs NumPy, which the rest of the game doesn't.
+
+Imports:
+--------
+- `json`: The format of the metadata file.
+- `pathlib`: Used for the files of the store.
+- `numpy`: Provides the typed arrays and the memory maps.
+- `characters`: Provides the names of the races and weapons.
+- `enemies`: Provides the names of the enemies.
+- `simulation`: Provides the headless simulator, used to record fights.
+
+Classes:
+--------
+- ResultWriter: Appends fight results to a store.
+- ResultStore: Reads and queries a store through memory maps.
+
+Functions:
+----------
+- record_fights: Simulates fights and appends their results to a store.
+
+Example:
+--------
+with ResultWriter("results") as writer:
+    writer.append("Human", "Sword", "bear", simulate_fight(build_character("Human", "Sword"), build_enemy("bear")))
+print(ResultStore("results").win_rate_by("race", "weapon"))
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from characters import MAPPING
+from enemies import ENEMY_FACTORY
+from simulation import build_character, build_enemy, simulate_fight
+
+
+SCHEMA = {
+    "race": "u1",
+    "weapon": "u1",
+    "enemy": "u1",
+    "won": "u1",
+    "turns": "<u2",
+    "hp_left": "<f4",
+    "damage_dealt": "<f4",
+    "abilities_used": "<u2",
+}
+CODES = {
+    "race": list(MAPPING["race"]),
+    "weapon": list(MAPPING["weapon"]),
+    "enemy": sorted(ENEMY_FACTORY),
+}
+
+
+class ResultWriter:
+    """
+    A class appending fight results to a store, in batches.
+
+    Attributes
+    ----------
+    path : Path
+        The directory of the store.
+    rows : int
+        The number of rows in the store, including the buffered ones.
+    batch_size : int
+        The number of rows buffered before they are written.
+    """
+
+    def __init__(self, path, batch_size=65536):
+        """
+        Opens a store for appending, creating it if needed.
+
+        Parameters
+        ----------
+        path : str | Path
+            The directory of the store.
+        batch_size : int, optional
+            The number of rows buffered before they are written (default is 65536).
+
+        Raises
+        ------
+        ValueError
+            If the existing store has another schema.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["schema"] != SCHEMA or meta["codes"] != CODES:
+                raise ValueError(f"The store {self.path} has another schema.")
+            self.rows = meta["rows"]
+        else:
+            self.rows = 0
+        for column, dtype in SCHEMA.items():
+            # Drops the values written after the last metadata update, by a writer that crashed in between.
+            with open(self.path / f"{column}.bin", "ab") as column_file:
+                column_file.truncate(self.rows * np.dtype(dtype).itemsize)
+        self.batch_size = batch_size
+        self._buffer = {column: np.empty(batch_size, dtype) for column, dtype in SCHEMA.items()}
+        self._buffered = 0
+        self._codes = {column: {name: code for code, name in enumerate(names)} for column, names in CODES.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, race, weapon, enemy, result) -> None:
+        """
+        Appends the result of a fight.
+
+        Parameters
+        ----------
+        race : str
+            The race of the character.
+        weapon : str
+            The weapon of the character.
+        enemy : str
+            The name of the enemy in `ENEMY_FACTORY`.
+        result : FightResult
+            The result of the fight.
+        """
+        row = self._buffered
+        buffer = self._buffer
+        buffer["race"][row] = self._codes["race"][race]
+        buffer["weapon"][row] = self._codes["weapon"][weapon]
+        buffer["enemy"][row] = self._codes["enemy"][enemy]
+        buffer["won"][row] = result.won
+        buffer["turns"][row] = result.turns
+        buffer["hp_left"][row] = result.hp_left
+        buffer["damage_dealt"][row] = result.damage_dealt
+        buffer["abilities_used"][row] = result.abilities_used
+        self._buffered += 1
+        self.rows += 1
+        if self._buffered == self.batch_size:
+            self.flush()
+
+    def append_columns(self, columns) -> None:
+        """
+        Appends a block of rows given as columns, already encoded.
+
+        Parameters
+        ----------
+        columns : dict
+            An array (or sequence) of values for every column of `SCHEMA`, all of the same length.
+        """
+        self.flush()
+        arrays = {column: np.asarray(columns[column], dtype) for column, dtype in SCHEMA.items()}
+        lengths = {len(array) for array in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("All the columns must have the same length.")
+        self._write(arrays)
+        self.rows += lengths.pop()
+        self._write_meta()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows, then the metadata, so readers never see rows that are not fully written.
+        """
+        if self._buffered:
+            self._write({column: values[:self._buffered] for column, values in self._buffer.items()})
+            self._buffered = 0
+        self._write_meta()
+
+    def close(self) -> None:
+        """
+        Writes the buffered rows and closes the writer.
+        """
+        self.flush()
+
+    def _write(self, arrays) -> None:
+        """
+        Appends arrays of values to the column files.
+        """
+        for column, values in arrays.items():
+            with open(self.path / f"{column}.bin", "ab") as column_file:
+                values.tofile(column_file)
+
+    def _write_meta(self) -> None:
+        """
+        Replaces the metadata file atomically.
+        """
+        temporary = self.path / "meta.json.tmp"
+        temporary.write_text(json.dumps({"rows": self.rows - self._buffered, "schema": SCHEMA, "codes": CODES}))
+        temporary.replace(self.path / "meta.json")
+
+
+class ResultStore:
+    """
+    A class reading and querying a store through memory maps.
+
+    Attributes
+    ----------
+    path : Path
+        The directory of the store.
+    rows : int
+        The number of rows in the store.
+    codes : dict
+        The names of the races, weapons and enemies, by code.
+    columns : dict
+        The memory-mapped columns, by name.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a store for reading.
+
+        Parameters
+        ----------
+        path : str | Path
+            The directory of the store.
+        """
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text())
+        self.rows = meta["rows"]
+        self.codes = meta["codes"]
+        self.columns = {
+            column: np.memmap(self.path / f"{column}.bin", dtype, mode="r", shape=(self.rows,))
+            if self.rows else np.empty(0, dtype)
+            for column, dtype in meta["schema"].items()
+        }
+
+    def __len__(self) -> int:
+        """
+        Returns the number of rows in the store.
+        """
+        return self.rows
+
+    def group_by(self, keys, value="won", chunk_rows=1 << 22) -> dict:
+        """
+        Groups the rows by the codes of some columns, and computes the number of rows and the mean of a value in
+        every group, reading the rows in chunks.
+
+        Parameters
+        ----------
+        keys : tuple
+            The columns grouped by, among "race", "weapon" and "enemy".
+        value : str, optional
+            The column averaged (default is "won", giving the win rate).
+        chunk_rows : int, optional
+            The number of rows read at once (default is 4 194 304).
+
+        Returns
+        -------
+        dict
+            The number of rows and the mean of the value of every non-empty group, by tuple of names.
+        """
+        sizes = [len(self.codes[key]) for key in keys]
+        groups = int(np.prod(sizes))
+        counts = np.zeros(groups, np.int64)
+        sums = np.zeros(groups, np.float64)
+        for start in range(0, self.rows, chunk_rows):
+            stop = min(start + chunk_rows, self.rows)
+            group = np.zeros(stop - start, np.int64)
+            for key, size in zip(keys, sizes):
+                group *= size
+                group += self.columns[key][start:stop]
+            counts += np.bincount(group, minlength=groups)
+            sums += np.bincount(group, weights=self.columns[value][start:stop], minlength=groups)
+        result = {}
+        for group, count in enumerate(counts):
+            if count:
+                names = []
+                remainder = group
+                for key, size in zip(reversed(keys), reversed(sizes)):
+                    remainder, code = divmod(remainder, size)
+                    names.append(self.codes[key][code])
+                result[tuple(reversed(names))] = (int(count), float(sums[group] / count))
+        return result
+
+    def win_rate_by(self, *keys) -> dict:
+        """
+        Returns the win rate of every group of rows.
+
+        Parameters
+        ----------
+        *keys : str
+            The columns grouped by, among "race", "weapon" and "enemy".
+
+        Returns
+        -------
+        dict
+            The win rate of every non-empty group, by tuple of names.
+        """
+        return {names: rate for names, (_, rate) in self.group_by(keys).items()}
+
+
+def record_fights(path, builds, enemies, simulations) -> int:
+    """
+    Simulates fights and appends their results to a store.
+
+    Parameters
+    ----------
+    path : str | Path
+        The directory of the store.
+    builds : iterable
+        The (race, weapon) pairs of the characters.
+    enemies : iterable
+        The names of the enemies.
+    simulations : int
+        The number of fights of every build against every enemy.
+
+    Returns
+    -------
+    int
+        The number of rows in the store.
+    """
+    enemies = list(enemies)
+    with ResultWriter(path) as writer:
+        for race, weapon in builds:
+            for enemy in enemies:
+                for _ in range(simulations):
+                    result = simulate_fight(build_character(race, weapon), build_enemy(enemy))
+                    writer.append(race, weapon, enemy, result)
+        return writer.rows
@@ -0,0 +1,321 @@
+"""
+Module that runs the narrative of the game from a data-driven scene graph.
+
+The story is described in a JSON file as a graph of scenes. Each scene is a list of steps (typewriter text, boxes,
+items, fights, ...) followed by a list of transitions to other scenes, guarded by conditions on the character's
+violence score or inventory. The graph is compiled once into an indexed transition table, so playing a scene never
+looks anything up by name. Long text blocks live in a separate text file and are only read when a scene showing them
+is visited.
+
+Imports:
+--------
+- `json`: Used to read the scene graph.
+- `os`: Used to locate the default campaign files next to this module.
+- `functools`: Provides `lru_cache`, used to keep recently visited text blocks in memory.
+
+Classes:
+--------
+- TextStore: Lazily loads named text blocks from a text file.
+- Campaign: A compiled scene graph that can be played with a character.
+
+Functions:
+----------
+- compile_campaign: Compiles scene graph data into a `Campaign`.
+- load_campaign: Loads and compiles a campaign from its files, once.
+
+Data format:
+------------
+The scene graph has a `start` scene id and a `scenes` mapping. Every scene has a list of `steps`, each naming its
+`op` and its arguments, and either an `ending` or a list of `next` transitions. A transition has a target scene `to`
+and an optional `if` condition, and the first transition whose condition holds is taken. A step with a `block`
+argument receives the text of that block, loaded from the text file, as its `text` argument.
+
+The text file is made of blocks, each starting with a `== block_id` header line followed by the lines of the block.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+
+CAMPAIGN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CONDITIONS = {
+    "violence": lambda value: lambda character: character.violence == value,
+    "min_violence": lambda value: lambda character: character.violence >= value,
+    "has_item": lambda name: lambda character: any(item.name == name for item in character.backpack.items),
+}
+
+
+class TextStore:
+    """
+    A class that lazily loads named text blocks from a text file.
+
+    Only the byte offset of every block is kept in memory. The text of a block is read from the file the first time
+    it is needed, and a bounded number of recently used blocks is cached.
+
+    Attributes
+    ----------
+    path : str
+        The path of the text file.
+    offsets : dict | None
+        The byte offsets of the blocks, indexed by block id, built on the first access.
+    """
+
+    def __init__(self, path, cache_size=32):
+        """
+        Initializes the text store, without reading the file yet.
+
+        Parameters
+        ----------
+        path : str
+            The path of the text file.
+        cache_size : int, optional
+            The number of text blocks kept in memory (default is 32).
+        """
+        self.path = path
+        self.offsets = None
+        self.get = lru_cache(maxsize=cache_size)(self._read_block)
+
+    def _index(self) -> dict:
+        """
+        Builds the index of the byte offsets of the blocks.
+
+        Returns
+        -------
+        dict
+            The offset of the first line of every block, indexed by block id.
+        """
+        offsets = {}
+        with open(self.path, "rb") as text_file:
+            offset = 0
+            for line in text_file:
+                offset += len(line)
+                if line.startswith(b"== "):
+                    offsets[line[3:].strip().decode("utf-8")] = offset
+        return offsets
+
+    def _read_block(self, block_id) -> tuple:
+        """
+        Reads a text block from the file.
+
+        Parameters
+        ----------
+        block_id : str
+            The id of the text block.
+
+        Returns
+        -------
+        tuple
+            The lines of the text block.
+        """
+        if self.offsets is None:
+            self.offsets = self._index()
+        lines = []
+        with open(self.path, "rb") as text_file:
+            text_file.seek(self.offsets[block_id])
+            for line in text_file:
+                if line.startswith(b"== "):
+                    break
+                lines.append(line.decode("utf-8").rstrip("\r\n"))
+        while lines and not lines[-1]:
+            lines.pop()
+        return tuple(lines)
+
+    def __contains__(self, block_id) -> bool:
+        """
+        Checks if the text file contains the given block.
+
+        Parameters
+        ----------
+        block_id : str
+            The id of the text block.
+
+        Returns
+        -------
+        bool
+            True if the block exists, False otherwise.
+        """
+        if self.offsets is None:
+            self.offsets = self._index()
+        return block_id in self.offsets
+
+
+class Campaign:
+    """
+    A class representing a compiled scene graph.
+
+    Scenes are identified by their index in the tables below, and transitions point directly to the index of their
+    target scene.
+
+    Attributes
+    ----------
+    index : dict
+        The index of every scene, by scene id.
+    start : int
+        The index of the first scene.
+    steps : list
+        For every scene, a tuple of (handler, arguments, block id) steps.
+    transitions : list
+        For every scene, a tuple of (condition, target index) transitions, the condition being None if it always holds.
+    endings : list
+        For every scene, the ending it reaches, or None if the story goes on.
+    texts : TextStore
+        The store from which the text blocks are loaded.
+    """
+
+    def __init__(self, index, start, steps, transitions, endings, texts):
+        """
+        Initializes the compiled campaign. Use `compile_campaign` to build one from scene graph data.
+        """
+        self.index = index
+        self.start = start
+        self.steps = steps
+        self.transitions = transitions
+        self.endings = endings
+        self.texts = texts
+
+    def play(self, character, start=None) -> str:
+        """
+        Plays the campaign with the given character until an ending is reached, or a step ends the story early by
+        returning its own ending (like a lost fight).
+
+        Parameters
+        ----------
+        character
+            The main character controlled by the player.
+        start : str, optional
+            The id of the scene to start from (default is the campaign's start scene).
+
+        Returns
+        -------
+        str
+            The ending that was reached.
+        """
+        scene = self.start if start is None else self.index[start]
+        while True:
+            for handler, arguments, block in self.steps[scene]:
+                if block is None:
+                    ending = handler(character, **arguments)
+                else:
+                    ending = handler(character, text=self.texts.get(block), **arguments)
+                if ending is not None:
+                    return ending
+            if (ending := self.endings[scene]) is not None:
+                return ending
+            for condition, target in self.transitions[scene]:
+                if condition is None or condition(character):
+                    scene = target
+                    break
+            else:
+                raise RuntimeError(f"No transition can be taken from the scene {scene}")
+
+
+def _compile_condition(condition):
+    """
+    Compiles a transition condition into a callable receiving the character.
+
+    Parameters
+    ----------
+    condition : dict | None
+        The condition, mapping condition names to their values. All of them must hold.
+
+    Returns
+    -------
+    callable | None
+        The compiled condition, or None if the transition always holds.
+    """
+    if not condition:
+        return None
+    for name in condition:
+        if name not in CONDITIONS:
+            raise ValueError(f"Unknown condition: {name}")
+    checks = tuple(CONDITIONS[name](value) for name, value in condition.items())
+    if len(checks) == 1:
+        return checks[0]
+    return lambda character: all(check(character) for check in checks)
+
+
+def compile_campaign(data, handlers, texts) -> Campaign:
+    """
+    Compiles scene graph data into a `Campaign`.
+
+    Parameters
+    ----------
+    data : dict
+        The scene graph, with its `start` scene id and its `scenes`.
+    handlers : dict
+        The step handlers, indexed by step op. A handler receives the character and the step arguments,
+        and returns None, or an ending that ends the story early.
+    texts : TextStore
+        The store from which the text blocks are loaded.
+
+    Returns
+    -------
+    Campaign
+        The compiled campaign.
+
+    Raises
+    ------
+    ValueError
+        If a step, a condition, a text block or a transition target is unknown, or a scene has no way out.
+    """
+    scenes = data["scenes"]
+    index = {scene_id: number for number, scene_id in enumerate(scenes)}
+    steps, transitions, endings = [], [], []
+    for scene_id, scene in scenes.items():
+        compiled_steps = []
+        for step in scene.get("steps", []):
+            arguments = dict(step)
+            operation = arguments.pop("op")
+            if operation not in handlers:
+                raise ValueError(f"Unknown step '{operation}' in the scene '{scene_id}'")
+            block = arguments.pop("block", None)
+            if block is not None and block not in texts:
+                raise ValueError(f"Unknown text block '{block}' in the scene '{scene_id}'")
+            compiled_steps.append((handlers[operation], arguments, block))
+        compiled_transitions = []
+        for transition in scene.get("next", []):
+            if transition["to"] not in index:
+                raise ValueError(f"Unknown scene '{transition['to']}' reached from the scene '{scene_id}'")
+            compiled_transitions.append((_compile_condition(transition.get("if")), index[transition["to"]]))
+        if "ending" not in scene and not compiled_transitions:
+            raise ValueError(f"The scene '{scene_id}' has neither an ending nor a transition")
+        steps.append(tuple(compiled_steps))
+        transitions.append(tuple(compiled_transitions))
+        endings.append(scene.get("ending"))
+    return Campaign(index, index[data["start"]], steps, transitions, endings, texts)
+
+
+def load_campaign(handlers, graph_path=None, text_path=None) -> Campaign:
+    """
+    Loads and compiles a campaign from its files.
+
+    The compiled campaign is cached, so it is only compiled once for the given handlers and files.
+
+    Parameters
+    ----------
+    handlers : dict
+        The step handlers, indexed by step op.
+    graph_path : str, optional
+        The path of the scene graph file (default is `story.json` next to this module).
+    text_path : str, optional
+        The path of the text file (default is `story.txt` next to this module).
+
+    Returns
+    -------
+    Campaign
+        The compiled campaign.
+    """
+    graph_path = graph_path or os.path.join(CAMPAIGN_DIR, "story.json")
+    text_path = text_path or os.path.join(CAMPAIGN_DIR, "story.txt")
+    key = (id(handlers), graph_path, text_path)
+    if key not in _CAMPAIGNS:
+        with open(graph_path, encoding="utf-8") as graph_file:
+            data = json.load(graph_file)
+        _CAMPAIGNS[key] = (handlers, compile_campaign(data, handlers, TextStore(text_path)))
+    return _CAMPAIGNS[key][1]
+
+
+# Compiled campaigns, kept with their handlers so the handlers' id stays unique while cached.
+_CAMPAIGNS = {}
@@ -0,0 +1,423 @@
+"""
+Module for parallel simulations that return their results through shared memory instead of pickling them.
+
+Returning every fight result as a Python object from a worker process means pickling it, sending it through a pipe and
+unpickling it in the parent. Instead, the parent preallocates one `multiprocessing.shared_memory` block per result
+column (won, turns, hp left, damage dealt, abilities used), every task writes its fights straight into its own slice
+of the columns, and only the number of fights written goes back through the pipe.
+
+The static content tables (the stats of the races, weapons with their abilities, and enemies) are packed the same way
+into a shared block by the parent, once, and the workers read them through a read-only view to build their
+characters and enemies, instead of every task carrying its own copy of the content.
+
+Imports:
+--------
+- `pickle`: Measures the cost of the pickling path in the benchmark.
+- `struct`: Provides the sizes of the typed values.
+- `sys`: Reads the options of the benchmark from the command line.
+- `time`: Provides `perf_counter`, used by the benchmark.
+- `multiprocessing`: Provides the pool of worker processes and the shared memory blocks.
+- `characters`: Provides the race and weapon factories.
+- `enemies`: Provides the enemy factory.
+- `simulation`: Provides the headless simulator.
+
+Classes:
+--------
+- SharedColumns: Typed result columns in shared memory blocks.
+- StaticTables: The stats of the races, weapons and enemies in a shared memory block.
+
+Functions:
+----------
+- simulate_shared: Simulates fights into the shared columns of the pool. Runs in a worker process.
+- simulate_pickled: Simulates fights and returns their results, to be pickled. Runs in a worker process.
+- run_shared: Runs fights on a pool of workers through shared memory.
+- run_pickled: Runs fights on a pool of workers, the results being pickled back.
+
+Example:
+--------
+columns = run_shared("Human", "Sword", "bear", simulations=100_000)
+print(sum(columns.view("won")) / len(columns))
+columns.release()
+"""
+
+import pickle
+import struct
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+from characters import RACE_FACTORY, WEAPON_FACTORY
+from enemies import ENEMY_FACTORY
+from simulation import build_character, build_enemy, simulate_fight
+
+
+RESULT_COLUMNS = {"won": "B", "turns": "H", "hp_left": "d", "damage_dealt": "d", "abilities_used": "H"}
+RACE_STATS = ("max_hp", "max_damage", "max_defence", "speed")
+WEAPON_STATS = ("attack", "critical")
+ABILITY_STATS = ("damage", "cooldown", "d_o_t", "d_o_t_time", "damage_reduction", "stun")
+ENEMY_STATS = ("hp", "damage", "defence", "critical", "dodge", "speed")
+
+
+class SharedColumns:
+    """
+    A class holding typed result columns, each in its own shared memory block.
+
+    Attributes
+    ----------
+    rows : int
+        The number of rows of every column.
+    blocks : dict
+        The shared memory block of every column.
+    owner : bool
+        Whether this process created the blocks, and must unlink them.
+    """
+
+    def __init__(self, rows, names=None):
+        """
+        Creates the columns, or attaches to existing ones.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of every column.
+        names : dict, optional
+            The names of the existing blocks, by column, to attach to them (default is to create new blocks).
+        """
+        self.rows = rows
+        self.owner = names is None
+        self.blocks = {
+            column: shared_memory.SharedMemory(create=True, size=max(1, rows * struct.calcsize(code)))
+            if self.owner else shared_memory.SharedMemory(names[column])
+            for column, code in RESULT_COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        """
+        Returns the number of rows of the columns.
+        """
+        return self.rows
+
+    @property
+    def names(self) -> dict:
+        """
+        The names of the blocks, by column, for the workers to attach to them.
+        """
+        return {column: block.name for column, block in self.blocks.items()}
+
+    def view(self, column) -> memoryview:
+        """
+        Returns a typed view of a column.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        memoryview
+            The values of the column.
+        """
+        code = RESULT_COLUMNS[column]
+        return self.blocks[column].buf[:self.rows * struct.calcsize(code)].cast(code)
+
+    def release(self) -> None:
+        """
+        Closes the blocks, and unlinks them if this process created them.
+        """
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+
+
+class StaticTables:
+    """
+    A class holding the stats of the races, weapons (with their abilities) and enemies in a shared memory block.
+
+    The stats are stored as doubles, one row per race, weapon and enemy, in the order of the factories.
+
+    Attributes
+    ----------
+    block : SharedMemory
+        The shared memory block.
+    owner : bool
+        Whether this process created the block, and must unlink it.
+    """
+
+    LAYOUT = (
+        ("race", RACE_FACTORY, RACE_STATS),
+        ("weapon", WEAPON_FACTORY, WEAPON_STATS + ABILITY_STATS),
+        ("enemy", ENEMY_FACTORY, ENEMY_STATS),
+    )
+
+    def __init__(self, name=None):
+        """
+        Packs the current stats of the content into a new block, or attaches to an existing one.
+
+        Parameters
+        ----------
+        name : str, optional
+            The name of an existing block, to attach to it (default is to create a new block).
+        """
+        self.owner = name is None
+        self.rows = {}
+        size = 0
+        for table, factory, stats in self.LAYOUT:
+            for key in factory:
+                self.rows[table, key] = (size, stats)
+                size += len(stats)
+        if self.owner:
+            self.block = shared_memory.SharedMemory(create=True, size=size * 8)
+            values = self.block.buf.cast("d")
+            for table, factory, stats in self.LAYOUT:
+                for key, cls in factory.items():
+                    content = cls()
+                    owners = [content] * len(stats)
+                    if table == "weapon":
+                        owners = [content] * len(WEAPON_STATS) + [content.ability] * len(ABILITY_STATS)
+                    start = self.rows[table, key][0]
+                    for offset, (owner, stat) in enumerate(zip(owners, stats)):
+                        values[start + offset] = getattr(owner, stat)
+            values.release()
+        else:
+            self.block = shared_memory.SharedMemory(name)
+        self.values = self.block.buf.cast("d").toreadonly()
+
+    def stats(self, table, key) -> dict:
+        """
+        Returns the stats of a race, weapon or enemy.
+
+        Parameters
+        ----------
+        table : str
+            "race", "weapon" or "enemy".
+        key : str
+            The key of the content in its factory ("human", "sword", "bear", ...).
+
+        Returns
+        -------
+        dict
+            The stats, by name.
+        """
+        start, stats = self.rows[table, key]
+        return {stat: self.values[start + offset] for offset, stat in enumerate(stats)}
+
+    def character(self, race, weapon):
+        """
+        Builds a character with the stats of the tables.
+
+        Parameters
+        ----------
+        race : str
+            The race of the character.
+        weapon : str
+            The weapon of the character.
+
+        Returns
+        -------
+        Character
+            The started character.
+        """
+        character = build_character(race, weapon)
+        for stat, value in self.stats("race", race.lower()).items():
+            setattr(character.race, stat, value)
+        character.race.hp = character.race.max_hp
+        character.race.damage = character.race.max_damage
+        character.race.defence_points = character.race.max_defence_points
+        weapon_stats = self.stats("weapon", weapon.lower())
+        for stat in WEAPON_STATS:
+            setattr(character.weapon, stat, int(weapon_stats[stat]))
+        for stat in ABILITY_STATS:
+            setattr(character.weapon.ability, stat, int(weapon_stats[stat]))
+        return character
+
+    def enemy(self, name):
+        """
+        Builds an enemy with its behavior tree and the stats of the tables.
+
+        Parameters
+        ----------
+        name : str
+            The name of the enemy in `ENEMY_FACTORY`.
+
+        Returns
+        -------
+        Enemies
+            The enemy.
+        """
+        enemy = build_enemy(name)
+        for stat, value in self.stats("enemy", name).items():
+            setattr(enemy, stat, value if stat == "defence" else int(value))
+        return enemy
+
+    def release(self) -> None:
+        """
+        Closes the block, and unlinks it if this process created it.
+        """
+        self.values.release()
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+_worker = {}
+
+
+def _attach(rows, column_names, table_name) -> None:
+    """
+    Attaches a worker process to the shared tables of the pool, and to its shared columns if it has some.
+    """
+    if column_names:
+        _worker["columns"] = SharedColumns(rows, column_names)
+        _worker["views"] = {column: _worker["columns"].view(column) for column in RESULT_COLUMNS}
+    _worker["tables"] = StaticTables(table_name)
+
+
+def simulate_shared(task) -> int:
+    """
+    Simulates fights into the shared columns of the pool. Runs in a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The race and weapon of the character, the name of the enemy, and the first and last (excluded) rows written.
+
+    Returns
+    -------
+    int
+        The number of rows written.
+    """
+    race, weapon, enemy, start, stop = task
+    tables, views = _worker["tables"], _worker["views"]
+    won, turns, hp_left = views["won"], views["turns"], views["hp_left"]
+    damage_dealt, abilities_used = views["damage_dealt"], views["abilities_used"]
+    for row in range(start, stop):
+        result = simulate_fight(tables.character(race, weapon), tables.enemy(enemy))
+        won[row] = result.won
+        turns[row] = result.turns
+        hp_left[row] = result.hp_left
+        damage_dealt[row] = result.damage_dealt
+        abilities_used[row] = result.abilities_used
+    return stop - start
+
+
+def simulate_pickled(task) -> list:
+    """
+    Simulates fights and returns their results, to be pickled back to the parent. Runs in a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The race and weapon of the character, the name of the enemy, and the number of fights.
+
+    Returns
+    -------
+    list
+        The results of the fights.
+    """
+    race, weapon, enemy, simulations = task
+    tables = _worker["tables"]
+    return [simulate_fight(tables.character(race, weapon), tables.enemy(enemy)) for _ in range(simulations)]
+
+
+def _slices(simulations, tasks) -> list:
+    """
+    Splits the rows into contiguous slices, one per task.
+    """
+    bounds = [simulations * index // tasks for index in range(tasks + 1)]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def run_shared(race, weapon, enemy, simulations=100_000, workers=None, tasks=64) -> SharedColumns:
+    """
+    Runs fights on a pool of workers, every task writing its results into its slice of shared columns.
+
+    Parameters
+    ----------
+    race : str
+        The race of the character.
+    weapon : str
+        The weapon of the character.
+    enemy : str
+        The name of the enemy.
+    simulations : int, optional
+        The number of fights (default is 100 000).
+    workers : int, optional
+        The number of worker processes (default is the number of CPUs).
+    tasks : int, optional
+        The number of slices the fights are split into (default is 64).
+
+    Returns
+    -------
+    SharedColumns
+        The results, to be released by the caller.
+    """
+    columns = SharedColumns(simulations)
+    tables = StaticTables()
+    try:
+        with Pool(workers, _attach, (simulations, columns.names, tables.block.name)) as pool:
+            tasks = [(race, weapon, enemy, start, stop) for start, stop in _slices(simulations, tasks)]
+            for _ in pool.imap_unordered(simulate_shared, tasks):
+                pass
+    finally:
+        tables.release()
+    return columns
+
+
+def run_pickled(race, weapon, enemy, simulations=100_000, workers=None, tasks=64) -> list:
+    """
+    Runs fights on a pool of workers, the results being pickled back to the parent.
+
+    Parameters
+    ----------
+    race : str
+        The race of the character.
+    weapon : str
+        The weapon of the character.
+    enemy : str
+        The name of the enemy.
+    simulations : int, optional
+        The number of fights (default is 100 000).
+    workers : int, optional
+        The number of worker processes (default is the number of CPUs).
+    tasks : int, optional
+        The number of tasks the fights are split into (default is 64).
+
+    Returns
+    -------
+    list
+        The results of the fights.
+    """
+    tables = StaticTables()
+    results = []
+    try:
+        with Pool(workers, _attach, (0, None, tables.block.name)) as pool:
+            tasks = [(race, weapon, enemy, stop - start) for start, stop in _slices(simulations, tasks)]
+            for chunk in pool.imap_unordered(simulate_pickled, tasks):
+                results.extend(chunk)
+    finally:
+        tables.release()
+    return results
+
+
+if __name__ == "__main__":
+    # Benchmark: the same fights simulated through both paths, and the cost of pickling the results alone.
+    fights = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    started = time.perf_counter()
+    shared = run_shared("Human", "Sword", "bear", fights)
+    shared_time = time.perf_counter() - started
+    shared_wins = sum(shared.view("won"))
+    shared.release()
+    started = time.perf_counter()
+    pickled = run_pickled("Human", "Sword", "bear", fights)
+    pickled_time = time.perf_counter() - started
+    started = time.perf_counter()
+    payload = pickle.dumps(pickled, pickle.HIGHEST_PROTOCOL)
+    pickle.loads(payload)
+    pickling_time = time.perf_counter() - started
+    print(f"{fights} fights")
+    print(f"  shared memory: {shared_time:.2f}s, {shared_wins / fights:.1%} won, "
+          f"{fights * struct.calcsize(''.join(RESULT_COLUMNS.values()))} bytes of columns")
+    print(f"  pickling:      {pickled_time:.2f}s, {sum(result.won for result in pickled) / fights:.1%} won, "
+          f"{len(payload)} bytes pickled, {pickling_time:.2f}s to pickle and unpickle them")
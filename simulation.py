@@ -0,0 +1,287 @@
+"""
+Module for fast, headless simulations of the fights of the game.
+
+The simulator plays the same rounds as `main.fighting_sequence`, with the same combat functions from `fight`, but the
+player's decisions come from a policy instead of prompts, and nothing is shown: with no subscriber on the event bus,
+publishing the combat events costs next to nothing. The enemies decide with the behavior trees of the story, unless
+they are built without them, so the tools built on the simulator measure the game the player plays. It is the
+building block of the balancing tools (tuning, build optimization, sweeps, ...).
+
+Imports:
+--------
+- `typing`: Provides `NamedTuple`, used for the results of the simulations.
+- `characters`: Provides the `Character` class.
+- `enemies`: Provides the enemy templates and the `Enemies` class.
+- `backpack`: Provides the `Backpack` class and the item `MAPPING`, used to carry and drink potions.
+- `behavior`: Provides `load_behaviors`, the behavior trees of the enemies.
+- `fight`: Provides the combat functions.
+
+Classes:
+--------
+- FightResult: The result of a simulated fight.
+- CampaignResult: The result of a simulated campaign.
+
+Functions:
+----------
+- build_character: Creates and starts a character without any prompt.
+- enemy_stats: Returns the stats of an enemy template.
+- build_enemy: Creates an enemy from a template, with some of its stats replaced.
+- default_policy: Uses the ability when ready, heals when low, attacks otherwise.
+- simulate_fight: Simulates a fight between a character and an enemy.
+- simulate_campaign: Simulates the four fights of the story with a build.
+
+Example:
+--------
+result = simulate_campaign("Human", "Sword")
+print(result.won, result.turns)
+"""
+
+from typing import NamedTuple
+
+from backpack import Backpack, MAPPING
+from behavior import load_behaviors
+from characters import Character
+from enemies import Enemies, ENEMY_FACTORY
+from fight import (
+    attack_command, defend_command, use_ability, enemy_attack, is_d_o_t_active, is_buff_over
+)
+
+
+CAMPAIGN = ("boar", "bear", "zombie", "werewolf")
+ENEMY_STATS = ("hp", "damage", "defence", "critical", "dodge", "speed")
+
+# The potions found before every fight of the story.
+CAMPAIGN_LOOT = {
+    "boar": ("Small Health Potion", "Big Attack Potion"),
+    "bear": ("Big Health Potion",),
+}
+
+
+class FightResult(NamedTuple):
+    """The result of a simulated fight, won when the enemy is defeated or runs away, as the story then goes on."""
+    won: bool
+    turns: int
+    hp_left: float
+    damage_dealt: float
+    abilities_used: int
+    potions_used: int
+
+
+class CampaignResult(NamedTuple):
+    """The result of a simulated campaign: the fights played, until the first one lost."""
+    won: bool
+    turns: int
+    hp_left: float
+    damage_dealt: float
+    abilities_used: int
+    potions_used: int
+    fights: tuple
+
+
+def build_character(race, weapon, items=(), name="Simulated", gender="M") -> Character:
+    """
+    Creates and starts a character without any prompt.
+
+    Parameters
+    ----------
+    race : str
+        The race of the character (Ork, Goblin, Elf, Human).
+    weapon : str
+        The weapon of the character (Sword, Bow, Axe, Slingshot).
+    items : iterable, optional
+        The names of the items put in the character's backpack.
+    name : str, optional
+        The name of the character.
+    gender : str, optional
+        The gender of the character.
+
+    Returns
+    -------
+    Character
+        The started character.
+    """
+    character = Character(name, gender, race, weapon)
+    character.start()
+    character.backpack.items.extend(MAPPING[item_name] for item_name in items)
+    return character
+
+
+def enemy_stats(name) -> dict:
+    """
+    Returns the stats of an enemy template.
+
+    Parameters
+    ----------
+    name : str
+        The name of the template in `ENEMY_FACTORY`.
+
+    Returns
+    -------
+    dict
+        The stats of the template, by name.
+    """
+    template = ENEMY_FACTORY[name]()
+    return {stat: getattr(template, stat) for stat in ENEMY_STATS}
+
+
+def build_enemy(name, behavior=True, **stats) -> Enemies:
+    """
+    Creates an enemy from a template, with its behavior tree and some of its stats replaced.
+
+    Parameters
+    ----------
+    name : str
+        The name of the template in `ENEMY_FACTORY`.
+    behavior : bool, optional
+        Whether the enemy decides with its behavior tree, like in the story, or always attacks (default is True).
+    **stats
+        The stats replaced (hp, damage, defence, critical, dodge, speed).
+
+    Returns
+    -------
+    Enemies
+        The enemy.
+    """
+    enemy = ENEMY_FACTORY[name]()
+    if behavior:
+        enemy.behavior = load_behaviors().get(name)
+    for stat, value in stats.items():
+        setattr(enemy, stat, value)
+    return enemy
+
+
+def default_policy(character, enemy) -> tuple:
+    """
+    Chooses the action of the character: heal when low, use the weapon's ability when ready, attack otherwise.
+
+    Parameters
+    ----------
+    character
+        The simulated character.
+    enemy
+        The enemy fought.
+
+    Returns
+    -------
+    tuple
+        The action ("Attack", "Defend", "Ability" or "Item") and its argument (the item name, or None).
+    """
+    if character.race.hp < character.race.max_hp * 0.35:
+        for item in character.backpack.items:
+            if item.group == "Health Potions":
+                return "Item", item.name
+    if character.cooldowns.is_ready(character.weapon.ability):
+        return "Ability", None
+    return "Attack", None
+
+
+def simulate_fight(character, enemy, policy=default_policy, max_turns=500) -> FightResult:
+    """
+    Simulates a fight between a character and an enemy, like `main.every_fight` without the prompts.
+
+    Parameters
+    ----------
+    character
+        The character, already started.
+    enemy
+        The enemy fought.
+    policy : callable, optional
+        Chooses the character's action every turn (default is `default_policy`).
+    max_turns : int, optional
+        The number of turns after which the fight counts as lost (default is 500).
+
+    Returns
+    -------
+    FightResult
+        The result of the fight.
+    """
+    start_hp = enemy.hp
+    ability = character.weapon.ability
+    abilities_used = potions_used = 0
+    outcome = None
+    turns = 0
+    while outcome not in ("Won", "Lost", "Fled") and turns < max_turns:
+        turns += 1
+        character.cooldowns.tick()
+        character.buff_time[0] -= 1
+        if outcome := is_d_o_t_active(enemy):
+            break
+        is_buff_over(character)
+        action, argument = policy(character, enemy)
+        if action == "Ability" and character.cooldowns.is_ready(ability):
+            abilities_used += 1
+            character.cooldowns.trigger(ability)
+            outcome = use_ability(ability, enemy) or enemy_attack(character, enemy)
+        elif action == "Item" and argument is not None:
+            potions_used += 1
+            Backpack.apply_item(character, argument)
+            Backpack.delete_item(character.backpack, argument)
+            outcome = enemy_attack(character, enemy)
+        elif action == "Defend":
+            outcome = defend_command(character, enemy, ability)
+        else:
+            outcome = attack_command(character, enemy, ability)
+    return FightResult(
+        outcome in ("Won", "Fled"), turns, character.race.hp, start_hp - enemy.hp, abilities_used, potions_used
+    )
+
+
+def simulate_campaign(race, weapon, items=(), policy=default_policy, enemies=CAMPAIGN, loot=None,
+                      setup=None, drops=None, behavior=True) -> CampaignResult:
+    """
+    Simulates the fights of the story with a build, the character's hp carrying over from one fight to the next.
+
+    Parameters
+    ----------
+    race : str
+        The race of the character.
+    weapon : str
+        The weapon of the character.
+    items : iterable, optional
+        The names of the items the character starts with.
+    policy : callable, optional
+        Chooses the character's action every turn (default is `default_policy`).
+    enemies : iterable, optional
+        The enemies fought, as names in `ENEMY_FACTORY` or as enemy instances (default is the story's four enemies).
+    loot : dict, optional
+        The items found before the fight against every enemy name (default is the story's potions).
+    setup : callable, optional
+        Called with the character once built, to change its stats before the campaign.
+    drops : dict, optional
+        The loot table (an `AliasTable` of item names) drawn from after killing every enemy name (default is none).
+    behavior : bool, optional
+        Whether the enemies given by name decide with their behavior trees (default is True).
+
+    Returns
+    -------
+    CampaignResult
+        The result of the campaign.
+    """
+    loot = CAMPAIGN_LOOT if loot is None else loot
+    character = build_character(race, weapon, items)
+    if setup:
+        setup(character)
+    enemies = list(enemies)
+    fights = []
+    for enemy in enemies:
+        name = enemy
+        if isinstance(enemy, str):
+            for item_name in loot.get(enemy, ()):
+                if len(character.backpack.items) < 5:
+                    character.backpack.items.append(MAPPING[item_name])
+            enemy = build_enemy(enemy, behavior)
+        fights.append(simulate_fight(character, enemy, policy))
+        if not fights[-1].won:
+            break
+        item_name = drops[name].draw() if drops and name in drops and enemy.hp <= 0 else None
+        if item_name and len(character.backpack.items) < 5:
+            character.backpack.items.append(MAPPING[item_name])
+    return CampaignResult(
+        len(fights) == len(enemies) and all(fight.won for fight in fights),
+        sum(fight.turns for fight in fights),
+        character.race.hp,
+        sum(fight.damage_dealt for fight in fights),
+        sum(fight.abilities_used for fight in fights),
+        sum(fight.potions_used for fight in fights),
+        tuple(fights),
+    )
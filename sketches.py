@@ -0,0 +1,440 @@
+"""
+Module for streaming, mergeable summaries of simulation metrics: quantile sketches and fixed-bin histograms.
+
+Keeping every sample to compute percentiles doesn't scale to large parallel runs. Instead, every worker updates small
+sketches as it simulates, and the sketches of all the workers are merged at the end, so the memory and the data sent
+back by the workers don't grow with the number of samples.
+
+`QuantileSketch` follows the DDSketch algorithm: a positive value `x` is counted in the bucket
+`ceil(log(x) / log(gamma))`, with `gamma = (1 + alpha) / (1 - alpha)`. Every value of a bucket is within a relative
+error `alpha` of the bucket's representative value, so any quantile is returned with a relative error of at most
+`alpha` (1% by default): the true p99 of 300 is reported between 297 and 303. Zeros are counted apart. The number of
+buckets grows with the logarithm of the range of the values (about 1 000 buckets cover 1e-4 to 1e4 with 1% accuracy),
+and it is capped at `max_buckets`: beyond it, the lowest buckets are collapsed together, so the guarantee is kept for
+the high quantiles (the ones usually reported) and only lost for the lowest values. Merging two sketches with the
+same `alpha` adds their bucket counts, and the result is the same as if all the values had been added to one sketch.
+
+`Histogram` counts values in fixed bins between two bounds (plus an underflow and an overflow bin), for the shape of a
+distribution. Merging histograms with the same bins adds their counts.
+
+Imports:
+--------
+- `math`: Provides `log` and `ceil`, used to find the buckets.
+- `sys`: Reads the options of the example run from the command line.
+- `multiprocessing`: Provides the pool of worker processes of the example run.
+- `simulation`: Provides the headless simulator.
+
+Classes:
+--------
+- QuantileSketch: A mergeable quantile sketch with a relative accuracy guarantee.
+- Histogram: A mergeable histogram with fixed bins.
+- FightMetrics: The sketches and histograms of the metrics of simulated fights.
+
+Functions:
+----------
+- simulate_metrics: Simulates fights and summarizes their metrics. Runs in a worker process.
+- parallel_metrics: Simulates fights on a pool of workers and merges their summaries.
+
+Example:
+--------
+metrics = parallel_metrics("Human", "Sword", "bear", simulations=100_000)
+print(metrics.report())
+"""
+
+import math
+import sys
+from multiprocessing import Pool
+
+from simulation import build_character, build_enemy, simulate_fight
+
+
+class QuantileSketch:
+    """
+    A class summarizing a stream of non-negative values, to answer quantile queries with a relative accuracy.
+
+    Attributes
+    ----------
+    alpha : float
+        The relative accuracy of the quantiles.
+    max_buckets : int
+        The maximum number of buckets kept.
+    count : int
+        The number of values added.
+    zeros : int
+        The number of values equal to zero.
+    buckets : dict
+        The number of values of every bucket, by bucket index.
+    minimum : float
+        The smallest value added.
+    maximum : float
+        The largest value added.
+    """
+
+    def __init__(self, alpha=0.01, max_buckets=2048):
+        """
+        Initializes an empty sketch.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            The relative accuracy of the quantiles (default is 0.01).
+        max_buckets : int, optional
+            The maximum number of buckets kept (default is 2048).
+        """
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zeros = 0
+        self.buckets = {}
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value, count=1) -> None:
+        """
+        Adds a value to the sketch.
+
+        Parameters
+        ----------
+        value : float
+            The value, zero or positive.
+        count : int, optional
+            The number of times the value is added (default is 1).
+
+        Raises
+        ------
+        ValueError
+            If the value is negative.
+        """
+        if value < 0:
+            raise ValueError(f"A quantile sketch only holds non-negative values, not {value}.")
+        self.count += count
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if value == 0:
+            self.zeros += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """
+        Collapses the lowest buckets into one, to keep at most `max_buckets` buckets.
+        """
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets + 1
+        collapsed = sum(self.buckets.pop(index) for index in indexes[:excess])
+        self.buckets[indexes[excess]] += collapsed
+
+    def merge(self, other) -> "QuantileSketch":
+        """
+        Adds the values of another sketch to this one.
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            A sketch with the same accuracy.
+
+        Returns
+        -------
+        QuantileSketch
+            This sketch, for chaining.
+
+        Raises
+        ------
+        ValueError
+            If the sketches don't have the same accuracy.
+        """
+        if other.alpha != self.alpha:
+            raise ValueError("Only sketches with the same accuracy can be merged.")
+        self.count += other.count
+        self.zeros += other.zeros
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def quantile(self, q) -> float:
+        """
+        Returns a quantile of the values added, within the relative accuracy of the sketch.
+
+        Parameters
+        ----------
+        q : float
+            The quantile, between 0 and 1 (0.5 for the median, 0.99 for p99).
+
+        Returns
+        -------
+        float
+            The estimated quantile, or NaN if the sketch is empty.
+        """
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+
+class Histogram:
+    """
+    A class counting values in fixed bins.
+
+    Attributes
+    ----------
+    low : float
+        The lower bound of the first bin.
+    high : float
+        The upper bound of the last bin.
+    counts : list
+        The number of values in every bin.
+    underflow : int
+        The number of values below `low`.
+    overflow : int
+        The number of values at or above `high`.
+    """
+
+    def __init__(self, low, high, bins=20):
+        """
+        Initializes an empty histogram.
+
+        Parameters
+        ----------
+        low : float
+            The lower bound of the first bin.
+        high : float
+            The upper bound of the last bin.
+        bins : int, optional
+            The number of bins, all of the same width (default is 20).
+        """
+        self.low = low
+        self.high = high
+        self.width = (high - low) / bins
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value, count=1) -> None:
+        """
+        Adds a value to the histogram.
+
+        Parameters
+        ----------
+        value : float
+            The value.
+        count : int, optional
+            The number of times the value is added (default is 1).
+        """
+        if value < self.low:
+            self.underflow += count
+        elif value >= self.high:
+            self.overflow += count
+        else:
+            self.counts[int((value - self.low) / self.width)] += count
+
+    def merge(self, other) -> "Histogram":
+        """
+        Adds the counts of another histogram to this one.
+
+        Parameters
+        ----------
+        other : Histogram
+            A histogram with the same bins.
+
+        Returns
+        -------
+        Histogram
+            This histogram, for chaining.
+
+        Raises
+        ------
+        ValueError
+            If the histograms don't have the same bins.
+        """
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError("Only histograms with the same bins can be merged.")
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def bins(self) -> list:
+        """
+        Returns the bins with their counts.
+
+        Returns
+        -------
+        list
+            The (lower bound, upper bound, count) of every bin.
+        """
+        return [
+            (self.low + index * self.width, self.low + (index + 1) * self.width, count)
+            for index, count in enumerate(self.counts)
+        ]
+
+
+class FightMetrics:
+    """
+    A class summarizing the metrics of simulated fights: the number of turns, the damage taken and the damage dealt,
+    each with a quantile sketch and a histogram.
+
+    Attributes
+    ----------
+    fights : int
+        The number of fights summarized.
+    wins : int
+        The number of fights won.
+    sketches : dict
+        The quantile sketch of every metric.
+    histograms : dict
+        The histogram of every metric.
+    """
+
+    METRICS = {"turns": (0, 100), "damage_taken": (0, 300), "damage_dealt": (0, 300)}
+
+    def __init__(self, alpha=0.01, bins=20):
+        """
+        Initializes empty summaries.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            The relative accuracy of the quantile sketches (default is 0.01).
+        bins : int, optional
+            The number of bins of the histograms (default is 20).
+        """
+        self.fights = 0
+        self.wins = 0
+        self.sketches = {metric: QuantileSketch(alpha) for metric in self.METRICS}
+        self.histograms = {metric: Histogram(low, high, bins) for metric, (low, high) in self.METRICS.items()}
+
+    def add(self, result, start_hp) -> None:
+        """
+        Adds the metrics of a fight.
+
+        Parameters
+        ----------
+        result : FightResult
+            The result of the fight.
+        start_hp : float
+            The hp of the character at the start of the fight.
+        """
+        self.fights += 1
+        self.wins += result.won
+        for metric, value in (
+            ("turns", result.turns), ("damage_taken", start_hp - result.hp_left), ("damage_dealt", result.damage_dealt)
+        ):
+            self.sketches[metric].add(max(0, value))
+            self.histograms[metric].add(value)
+
+    def merge(self, other) -> "FightMetrics":
+        """
+        Adds the summaries of another `FightMetrics` to this one.
+
+        Parameters
+        ----------
+        other : FightMetrics
+            The summaries to add.
+
+        Returns
+        -------
+        FightMetrics
+            These summaries, for chaining.
+        """
+        self.fights += other.fights
+        self.wins += other.wins
+        for metric in self.METRICS:
+            self.sketches[metric].merge(other.sketches[metric])
+            self.histograms[metric].merge(other.histograms[metric])
+        return self
+
+    def report(self, quantiles=(0.5, 0.95, 0.99)) -> str:
+        """
+        Returns a readable report of the percentiles of every metric.
+
+        Parameters
+        ----------
+        quantiles : tuple, optional
+            The quantiles reported (default is p50, p95 and p99).
+
+        Returns
+        -------
+        str
+            The report.
+        """
+        lines = [f"{self.fights} fights, {self.wins / self.fights if self.fights else 0:.1%} won"]
+        for metric, sketch in self.sketches.items():
+            percentiles = ", ".join(f"p{round(q * 100)} {sketch.quantile(q):.1f}" for q in quantiles)
+            lines.append(f"  {metric:<13} {percentiles}, max {sketch.maximum:.1f}")
+        return "\n".join(lines)
+
+
+def simulate_metrics(task) -> FightMetrics:
+    """
+    Simulates fights and summarizes their metrics. Runs in a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The race and weapon of the character, the name of the enemy and the number of fights.
+
+    Returns
+    -------
+    FightMetrics
+        The summaries of the fights.
+    """
+    race, weapon, enemy, simulations = task
+    metrics = FightMetrics()
+    for _ in range(simulations):
+        character = build_character(race, weapon)
+        start_hp = character.race.hp
+        metrics.add(simulate_fight(character, build_enemy(enemy)), start_hp)
+    return metrics
+
+
+def parallel_metrics(race, weapon, enemy, simulations=10_000, workers=None, tasks=16) -> FightMetrics:
+    """
+    Simulates fights on a pool of workers, each summarizing its own fights, and merges their summaries.
+
+    Parameters
+    ----------
+    race : str
+        The race of the character.
+    weapon : str
+        The weapon of the character.
+    enemy : str
+        The name of the enemy.
+    simulations : int, optional
+        The total number of fights (default is 10 000).
+    workers : int, optional
+        The number of worker processes (default is the number of CPUs).
+    tasks : int, optional
+        The number of tasks the fights are split into (default is 16).
+
+    Returns
+    -------
+    FightMetrics
+        The merged summaries.
+    """
+    sizes = [simulations // tasks + (index < simulations % tasks) for index in range(tasks)]
+    metrics = FightMetrics()
+    with Pool(workers) as pool:
+        for summary in pool.imap_unordered(simulate_metrics, [(race, weapon, enemy, size) for size in sizes if size]):
+            metrics.merge(summary)
+    return metrics
+
+
+if __name__ == "__main__":
+    print(parallel_metrics(*(sys.argv[1:4] if len(sys.argv) > 3 else ("Human", "Sword", "bear"))).report())
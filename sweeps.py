@@ -0,0 +1,295 @@
+"""
+Module for large, resumable parameter sweeps over the stats of the races, weapons and abilities.
+
+A sweep simulates the campaign of the story for every point of a grid of stats. The grid is split into chunks of
+points, and the chunks are handed to a pool of worker processes. Every completed chunk is appended to a checkpoint
+file, as a single JSON line written with one `os.write` call on a file opened in append mode and flushed to disk, so a
+crash never leaves a chunk half written (a truncated last line is ignored when the file is read back). When a sweep is
+restarted with the same grid and checkpoint file, only the chunks missing from the file are simulated. Progress is
+reported after every chunk, with an estimated time of arrival.
+
+Every point is simulated with its own seeded roll streams, so the results of a point are the same whichever worker
+simulates it, and whether the sweep was interrupted or not.
+
+Imports:
+--------
+- `hashlib`: Fingerprints the sweep, so a checkpoint file is never resumed with a different grid.
+- `itertools`: Provides `product`, used to enumerate the grid.
+- `json`: The format of the checkpoint file.
+- `os`: Provides the low-level appends to the checkpoint file.
+- `random`: Provides the seeded roll streams.
+- `sys`: Reads the checkpoint path from the command line.
+- `time`: Provides `perf_counter`, used for the ETA.
+- `multiprocessing`: Provides the pool of worker processes.
+- `fight`: Provides `set_rng`, used to install the roll streams.
+- `simulation`: Provides the headless simulator of the campaign.
+
+Functions:
+----------
+- grid_points: Enumerates the points of a grid.
+- apply_stats: Applies the stats of a point to a character.
+- simulate_point: Simulates the campaigns of a point.
+- run_chunk: Simulates the points of a chunk, in a worker process.
+- fingerprint: Returns the fingerprint of a sweep.
+- load_checkpoint: Reads the completed chunks of a checkpoint file.
+- append_chunk: Appends a completed chunk to a checkpoint file.
+- run_sweep: Runs a sweep, resuming from its checkpoint file.
+
+Example:
+--------
+grid = {"weapon": ["Sword", "Axe"], "weapon.attack": [10, 15, 20], "ability.cooldown": [2, 3, 4]}
+results = run_sweep(grid, "sweep.jsonl", simulations=200, chunk_size=4)
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from itertools import product
+from multiprocessing import Pool
+
+from fight import set_rng
+from simulation import simulate_campaign
+
+
+# The build used for the dimensions of a grid that don't name the race or the weapon.
+DEFAULT_BUILD = {"race": "Human", "weapon": "Sword"}
+
+# Stats that also have a maximum, set to the same value.
+MAXIMUMS = {"hp": "max_hp", "damage": "max_damage", "defence": "max_defence"}
+
+
+def grid_points(grid) -> list:
+    """
+    Enumerates the points of a grid, in a fixed order.
+
+    Parameters
+    ----------
+    grid : dict
+        The values of every dimension. "race" and "weapon" choose the build; the other dimensions are stats, named
+        "race.<stat>", "weapon.<stat>" or "ability.<stat>" (the ability of the weapon).
+
+    Returns
+    -------
+    list
+        The points, as dicts mapping every dimension to a value.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def apply_stats(character, point) -> None:
+    """
+    Applies the stats of a point to a character.
+
+    Parameters
+    ----------
+    character
+        The character, already started.
+    point : dict
+        The point of the grid. Its "race" and "weapon" dimensions are ignored.
+    """
+    owners = {"race": character.race, "weapon": character.weapon, "ability": character.weapon.ability}
+    for dimension, value in point.items():
+        if "." not in dimension:
+            continue
+        owner, stat = dimension.split(".", 1)
+        setattr(owners[owner], stat, value)
+        if owner == "race" and stat in MAXIMUMS:
+            setattr(owners[owner], MAXIMUMS[stat], value)
+
+
+def simulate_point(point, simulations, seed) -> dict:
+    """
+    Simulates the campaigns of a point, with seeded roll streams.
+
+    Parameters
+    ----------
+    point : dict
+        The point of the grid.
+    simulations : int
+        The number of campaigns simulated.
+    seed : int
+        The seed of the roll streams of the point.
+
+    Returns
+    -------
+    dict
+        The point, its win rate, and the mean turns and hp left over the campaigns.
+    """
+    build = {**DEFAULT_BUILD, **{key: point[key] for key in DEFAULT_BUILD if key in point}}
+    previous = set_rng(random.Random(2 * seed), random.Random(2 * seed + 1))
+    try:
+        results = [
+            simulate_campaign(build["race"], build["weapon"], setup=lambda character: apply_stats(character, point))
+            for _ in range(simulations)
+        ]
+    finally:
+        set_rng(*previous)
+    return {
+        "point": point,
+        "win_rate": sum(result.won for result in results) / simulations,
+        "turns": sum(result.turns for result in results) / simulations,
+        "hp_left": sum(result.hp_left for result in results) / simulations,
+    }
+
+
+def run_chunk(task) -> tuple:
+    """
+    Simulates the points of a chunk. Runs in a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The index of the chunk, the index of its first point, its points and the number of campaigns per point.
+
+    Returns
+    -------
+    tuple
+        The index of the chunk and the results of its points.
+    """
+    index, first, points, simulations = task
+    return index, [simulate_point(point, simulations, first + offset) for offset, point in enumerate(points)]
+
+
+def fingerprint(grid, simulations, chunk_size) -> str:
+    """
+    Returns the fingerprint of a sweep, which changes with anything that changes its chunks or their results.
+
+    Parameters
+    ----------
+    grid : dict
+        The grid of the sweep.
+    simulations : int
+        The number of campaigns per point.
+    chunk_size : int
+        The number of points per chunk.
+
+    Returns
+    -------
+    str
+        The fingerprint.
+    """
+    description = json.dumps([grid, simulations, chunk_size], sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+def load_checkpoint(path, sweep) -> dict:
+    """
+    Reads the completed chunks of a checkpoint file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the checkpoint file.
+    sweep : str
+        The fingerprint of the sweep being resumed.
+
+    Returns
+    -------
+    dict
+        The results of every completed chunk, by chunk index. Empty if the file doesn't exist.
+
+    Raises
+    ------
+    ValueError
+        If the checkpoint file belongs to another sweep.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as checkpoint:
+        for line in checkpoint:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash, never acknowledged: its chunk is simulated again.
+                continue
+            if record["sweep"] != sweep:
+                raise ValueError(f"The checkpoint {path} belongs to another sweep.")
+            done[record["chunk"]] = record["results"]
+    return done
+
+
+def append_chunk(path, sweep, index, results) -> None:
+    """
+    Appends a completed chunk to a checkpoint file, in a single write flushed to disk.
+
+    Parameters
+    ----------
+    path : str
+        The path of the checkpoint file.
+    sweep : str
+        The fingerprint of the sweep.
+    index : int
+        The index of the chunk.
+    results : list
+        The results of the points of the chunk.
+    """
+    line = "\n" + json.dumps({"sweep": sweep, "chunk": index, "results": results}) + "\n"
+    descriptor = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        # The leading newline ends any line cut short by an earlier crash, so this chunk is always read back.
+        os.write(descriptor, line.encode())
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def run_sweep(grid, path, simulations=100, chunk_size=8, workers=None, progress=print) -> list:
+    """
+    Runs a sweep, resuming from its checkpoint file, with the chunks simulated by a pool of worker processes.
+
+    Parameters
+    ----------
+    grid : dict
+        The values of every dimension (see `grid_points`).
+    path : str
+        The path of the checkpoint file.
+    simulations : int, optional
+        The number of campaigns per point (default is 100).
+    chunk_size : int, optional
+        The number of points per chunk (default is 8).
+    workers : int, optional
+        The number of worker processes (default is the number of CPUs).
+    progress : callable, optional
+        Called with a progress message after every chunk (default is `print`), or None for no progress.
+
+    Returns
+    -------
+    list
+        The results of all the points, in the order of `grid_points`.
+    """
+    sweep = fingerprint(grid, simulations, chunk_size)
+    points = grid_points(grid)
+    chunks = [points[first:first + chunk_size] for first in range(0, len(points), chunk_size)]
+    done = load_checkpoint(path, sweep)
+    pending = [
+        (index, index * chunk_size, chunk, simulations) for index, chunk in enumerate(chunks) if index not in done
+    ]
+    if progress and done:
+        progress(f"Resuming: {len(done)}/{len(chunks)} chunks already done")
+    started = time.perf_counter()
+    if pending:
+        with Pool(workers) as pool:
+            for completed, (index, results) in enumerate(pool.imap_unordered(run_chunk, pending), 1):
+                append_chunk(path, sweep, index, results)
+                done[index] = results
+                if progress:
+                    elapsed = time.perf_counter() - started
+                    eta = elapsed / completed * (len(pending) - completed)
+                    progress(f"{len(done)}/{len(chunks)} chunks done, {elapsed:.1f}s elapsed, ETA {eta:.1f}s")
+    return [result for index in range(len(chunks)) for result in done[index]]
+
+
+if __name__ == "__main__":
+    SWEEP = {
+        "weapon": ["Sword", "Bow", "Axe", "Slingshot"],
+        "weapon.attack": [8, 12, 16, 20],
+        "ability.damage": [20, 30, 40],
+        "ability.cooldown": [2, 4, 6],
+    }
+    for row in run_sweep(SWEEP, sys.argv[1] if len(sys.argv) > 1 else "sweep.jsonl")[:10]:
+        print(row)
@@ -0,0 +1,285 @@
+"""
+Module for the automatic tuning of the enemy stats, so that every enemy is won with a target probability.
+
+Every enemy is given a band of target win rates against a reference build. The tuner scales the hp and damage of the
+enemy by a difficulty factor, the win rate going down as the factor goes up, and searches the factor by bisection
+(on a logarithmic scale) over the headless simulator of the `simulation` module. Every factor is evaluated with
+batches of simulated fights, and the evaluation stops early as soon as the Wilson confidence interval of the win rate
+is tight enough, or lies entirely on one side of the band, so that clearly wrong factors cost only a batch or two.
+
+Imports:
+--------
+- `json`: Used to write the tuned stats.
+- `math`: Provides `sqrt`, used by the confidence intervals.
+- `random`: Seeded, so that a tuning run is reproducible.
+- `sys`: Reads the output directory from the command line.
+- `typing`: Provides `NamedTuple`, used for the results of the tuning.
+- `pathlib`: Used for the output files.
+- `simulation`: Provides the headless simulator.
+
+Classes:
+--------
+- Estimate: The estimated win rate of a fight, with its confidence interval.
+- TuningResult: The tuned stats of an enemy.
+
+Functions:
+----------
+- wilson_interval: Returns the Wilson confidence interval of a win rate.
+- scaled_stats: Returns the stats of an enemy scaled by a difficulty factor.
+- estimate_win_rate: Estimates the win rate of the reference build against an enemy, stopping early.
+- tune_enemy: Searches the difficulty factor of an enemy by bisection.
+- tune_enemies: Tunes several enemies.
+- write_results: Writes the tuned stats as JSON and a readable report.
+
+Example:
+--------
+results = tune_enemies({"boar": (0.85, 0.95)}, build=("Human", "Sword"))
+write_results(results, "tuning")
+"""
+
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+from simulation import build_character, build_enemy, enemy_stats, simulate_fight
+
+
+# The band of target win rates of the reference build against every enemy of the story.
+DEFAULT_TARGETS = {
+    "boar": (0.85, 0.95),
+    "bear": (0.70, 0.85),
+    "zombie": (0.60, 0.75),
+    "werewolf": (0.45, 0.60),
+}
+REFERENCE_BUILD = ("Human", "Sword")
+SCALED_STATS = ("hp", "damage")
+
+
+class Estimate(NamedTuple):
+    """The estimated win rate of a fight, with its confidence interval and the number of fights simulated."""
+    win_rate: float
+    low: float
+    high: float
+    simulations: int
+
+
+class TuningResult(NamedTuple):
+    """The tuned stats of an enemy, with the estimated win rate of the reference build against them."""
+    enemy: str
+    band: tuple
+    factor: float
+    stats: dict
+    estimate: Estimate
+    simulations: int
+    iterations: int
+    converged: bool
+
+
+def wilson_interval(wins, total, z=1.96) -> tuple:
+    """
+    Returns the Wilson confidence interval of a win rate, which stays reliable for rates close to 0 or 1.
+
+    Parameters
+    ----------
+    wins : int
+        The number of fights won.
+    total : int
+        The number of fights simulated.
+    z : float, optional
+        The quantile of the normal distribution for the confidence level (default is 1.96, for 95%).
+
+    Returns
+    -------
+    tuple
+        The lower and upper bounds of the interval.
+    """
+    if not total:
+        return 0.0, 1.0
+    rate = wins / total
+    denominator = 1 + z * z / total
+    centre = (rate + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def scaled_stats(name, factor) -> dict:
+    """
+    Returns the stats of an enemy template, with its hp and damage scaled by a difficulty factor.
+
+    Parameters
+    ----------
+    name : str
+        The name of the enemy template.
+    factor : float
+        The difficulty factor, 1 keeping the stats of the template.
+
+    Returns
+    -------
+    dict
+        The scaled stats, by name.
+    """
+    stats = enemy_stats(name)
+    for stat in SCALED_STATS:
+        stats[stat] = max(1, round(stats[stat] * factor))
+    return stats
+
+
+def estimate_win_rate(name, stats, build=REFERENCE_BUILD, band=None, half_width=0.03, batch=100,
+                      max_simulations=4000) -> Estimate:
+    """
+    Estimates the win rate of a build against an enemy, simulating batches of fights until the estimate is precise
+    enough.
+
+    Parameters
+    ----------
+    name : str
+        The name of the enemy template.
+    stats : dict
+        The stats of the enemy.
+    build : tuple, optional
+        The race and weapon of the character (default is `REFERENCE_BUILD`).
+    band : tuple, optional
+        A band of win rates: the simulation also stops once the confidence interval lies entirely outside of it.
+    half_width : float, optional
+        The half width of the confidence interval at which the simulation stops (default is 0.03).
+    batch : int, optional
+        The number of fights simulated between two checks (default is 100).
+    max_simulations : int, optional
+        The maximum number of fights simulated (default is 4000).
+
+    Returns
+    -------
+    Estimate
+        The estimated win rate.
+    """
+    race, weapon = build
+    wins = total = 0
+    low, high = 0.0, 1.0
+    while total < max_simulations:
+        for _ in range(batch):
+            wins += simulate_fight(build_character(race, weapon), build_enemy(name, **stats)).won
+        total += batch
+        low, high = wilson_interval(wins, total)
+        if high - low <= 2 * half_width or (band and (high < band[0] or low > band[1])):
+            break
+    return Estimate(wins / total, low, high, total)
+
+
+def tune_enemy(name, band, build=REFERENCE_BUILD, bounds=(0.25, 8.0), max_iterations=16, seed=0,
+               **estimate_options) -> TuningResult:
+    """
+    Searches the difficulty factor of an enemy by bisection, until the win rate falls within the target band.
+
+    Parameters
+    ----------
+    name : str
+        The name of the enemy template.
+    band : tuple
+        The lowest and highest target win rates.
+    build : tuple, optional
+        The race and weapon of the reference character (default is `REFERENCE_BUILD`).
+    bounds : tuple, optional
+        The smallest and largest difficulty factors searched (default is 0.25 and 8).
+    max_iterations : int, optional
+        The maximum number of factors evaluated (default is 16).
+    seed : int, optional
+        The seed of the random rolls, for a reproducible tuning (default is 0).
+    **estimate_options
+        Passed to `estimate_win_rate` (half_width, batch, max_simulations).
+
+    Returns
+    -------
+    TuningResult
+        The tuned stats. `converged` is False if no factor within the bounds reached the band.
+    """
+    random.seed(seed)
+    easiest, hardest = bounds
+    simulations = 0
+    best = None
+    for iteration in range(1, max_iterations + 1):
+        factor = math.sqrt(easiest * hardest)
+        stats = scaled_stats(name, factor)
+        estimate = estimate_win_rate(name, stats, build, band, **estimate_options)
+        simulations += estimate.simulations
+        distance = max(band[0] - estimate.win_rate, estimate.win_rate - band[1], 0)
+        if best is None or distance < best[0]:
+            best = (distance, factor, stats, estimate)
+        if not distance:
+            return TuningResult(name, band, factor, stats, estimate, simulations, iteration, True)
+        if estimate.win_rate > band[1]:
+            easiest = factor
+        else:
+            hardest = factor
+    _, factor, stats, estimate = best
+    return TuningResult(name, band, factor, stats, estimate, simulations, max_iterations, False)
+
+
+def tune_enemies(targets=None, build=REFERENCE_BUILD, seed=0, **options) -> list:
+    """
+    Tunes several enemies.
+
+    Parameters
+    ----------
+    targets : dict, optional
+        The band of target win rates of every enemy, by name (default is `DEFAULT_TARGETS`).
+    build : tuple, optional
+        The race and weapon of the reference character (default is `REFERENCE_BUILD`).
+    seed : int, optional
+        The seed of the random rolls (default is 0).
+    **options
+        Passed to `tune_enemy`.
+
+    Returns
+    -------
+    list
+        The `TuningResult` of every enemy.
+    """
+    targets = DEFAULT_TARGETS if targets is None else targets
+    return [tune_enemy(name, band, build, seed=seed, **options) for name, band in targets.items()]
+
+
+def write_results(results, directory=".", build=REFERENCE_BUILD) -> tuple:
+    """
+    Writes the tuned stats as JSON, and a readable report of the tuning.
+
+    Parameters
+    ----------
+    results : list
+        The results of the tuning.
+    directory : str | Path, optional
+        The directory of the output files (default is the current directory).
+    build : tuple, optional
+        The reference build the enemies were tuned against, shown in the report.
+
+    Returns
+    -------
+    tuple
+        The paths of the stats file and of the report.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stats_path = directory / "tuned_enemies.json"
+    report_path = directory / "tuning_report.txt"
+    stats_path.write_text(json.dumps({result.enemy: result.stats for result in results}, indent=4) + "\n")
+    lines = [f"Enemy tuning against {' with a '.join(build)}", ""]
+    for result in results:
+        estimate = result.estimate
+        lines += [
+            f"{result.enemy}: {'converged' if result.converged else 'NOT CONVERGED'}",
+            f"  target win rate   {result.band[0]:.0%} - {result.band[1]:.0%}",
+            f"  win rate          {estimate.win_rate:.1%} (95% CI {estimate.low:.1%} - {estimate.high:.1%})",
+            f"  difficulty factor {result.factor:.3f}",
+            f"  stats             {', '.join(f'{stat}={value}' for stat, value in result.stats.items())}",
+            f"  simulations       {result.simulations} in {result.iterations} iterations",
+            "",
+        ]
+    report_path.write_text("\n".join(lines))
+    return stats_path, report_path
+
+
+if __name__ == "__main__":
+    for path in write_results(tune_enemies(), sys.argv[1] if len(sys.argv) > 1 else "."):
+        print(f"Written {path}")
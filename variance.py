@@ -0,0 +1,221 @@
+"""
+Module for variance-reduced Monte Carlo comparisons of builds and enemy variants.
+
+The dodge and critical rolls make every fight very noisy, so comparing two variants with independent simulations needs
+a huge number of fights to see a small difference. Three techniques reduce the noise:
+
+- Common random numbers: both variants of a pair play with the same roll streams (a `random.Random` with the same
+  seed for the player's attacks, and another one for the enemies' attacks, installed with `fight.set_rng`), so the
+  n-th attack of each side gets the same rolls in both variants, and the luck of the rolls cancels out in their
+  difference.
+- Antithetic pairs: every seed is also played with the mirrored roll stream of `AntitheticRandom`, where a lucky roll
+  becomes an unlucky one, and the two outcomes are averaged.
+- Confidence-targeted stopping: pairs are simulated in batches until the confidence interval of the difference is as
+  narrow as requested.
+
+Imports:
+--------
+- `math`: Provides `sqrt`, used by the confidence intervals.
+- `random`: Provides `Random`, the seeded roll streams.
+- `sys`: Reads the options of the benchmark from the command line.
+- `time`: Provides `perf_counter`, used by the benchmark.
+- `typing`: Provides `NamedTuple`, used for the results.
+- `fight`: Provides `set_rng`, used to install the roll streams.
+- `simulation`: Provides the headless simulator, used by the benchmark.
+
+Classes:
+--------
+- AntitheticRandom: A random number generator mirroring the rolls of `random.Random` with the same seed.
+- Comparison: The estimated difference between two variants.
+
+Functions:
+----------
+- play: Plays a variant with given roll streams.
+- sample_difference: Plays one sample of the difference between two variants.
+- compare: Estimates the difference between two variants, until the confidence interval is narrow enough.
+
+Example:
+--------
+def hp_left():
+    return simulate_fight(build_character("Human", "Sword"), build_enemy("bear")).hp_left
+
+def hp_left_stronger_bear():
+    return simulate_fight(build_character("Human", "Sword"), build_enemy("bear", damage=24)).hp_left
+
+print(compare(hp_left, hp_left_stronger_bear, half_width=1))
+"""
+
+import math
+import random
+import sys
+import time
+from typing import NamedTuple
+
+from fight import set_rng
+from simulation import build_character, build_enemy, simulate_fight
+
+
+class AntitheticRandom(random.Random):
+    """
+    A random number generator mirroring the rolls of `random.Random` with the same seed: every integer roll `x` in
+    [a, b] becomes `a + b - x`, and every float roll `u` becomes `1 - u`.
+    """
+
+    def random(self) -> float:
+        """
+        Returns the mirrored float roll, in (0, 1].
+        """
+        return 1.0 - super().random()
+
+    def randint(self, a, b) -> int:
+        """
+        Returns the mirrored integer roll, in [a, b].
+        """
+        return a + b - super().randint(a, b)
+
+
+class Comparison(NamedTuple):
+    """The estimated difference between two variants (first minus second), with its confidence interval."""
+    difference: float
+    low: float
+    high: float
+    first: float
+    second: float
+    samples: int
+    simulations: int
+
+
+def play(variant, seed, stream=random.Random) -> float:
+    """
+    Plays a variant with given roll streams.
+
+    Parameters
+    ----------
+    variant : callable
+        Simulates the variant and returns its outcome, as a number (a bool for a win counts as 0 or 1).
+    seed : int
+        The seed of the roll streams, the enemies' attacks using the stream seeded with the next number.
+    stream : type, optional
+        The class of the roll streams, `random.Random` or `AntitheticRandom` (default is `random.Random`).
+
+    Returns
+    -------
+    float
+        The outcome of the variant.
+    """
+    previous = set_rng(stream(2 * seed), stream(2 * seed + 1))
+    try:
+        return float(variant())
+    finally:
+        set_rng(*previous)
+
+
+def sample_difference(first, second, seed, common=True, antithetic=True) -> tuple:
+    """
+    Plays one sample of the difference between two variants.
+
+    Parameters
+    ----------
+    first : callable
+        The first variant.
+    second : callable
+        The second variant.
+    seed : int
+        The seed of the sample.
+    common : bool, optional
+        Whether both variants play with the same roll streams (default is True).
+    antithetic : bool, optional
+        Whether the sample also plays the mirrored roll streams and averages the outcomes (default is True).
+
+    Returns
+    -------
+    tuple
+        The outcomes of the first and of the second variant.
+    """
+    seeds = (seed, seed) if common else (2 * seed, 2 * seed + 1)
+    streams = [random.Random] + ([AntitheticRandom] if antithetic else [])
+    outcomes = [
+        sum(play(variant, variant_seed, stream) for stream in streams) / len(streams)
+        for variant, variant_seed in zip((first, second), seeds)
+    ]
+    return outcomes[0], outcomes[1]
+
+
+def compare(first, second, half_width=0.02, common=True, antithetic=True, batch=50, max_samples=100_000, z=1.96,
+            seed=0) -> Comparison:
+    """
+    Estimates the mean difference between the outcomes of two variants, simulating batches of samples until the
+    confidence interval of the difference is narrow enough.
+
+    Parameters
+    ----------
+    first : callable
+        The first variant, returning its outcome as a number.
+    second : callable
+        The second variant, returning its outcome as a number.
+    half_width : float, optional
+        The half width of the confidence interval at which the simulation stops (default is 0.02).
+    common : bool, optional
+        Whether both variants of a sample play with the same roll streams (default is True).
+    antithetic : bool, optional
+        Whether every sample also plays the mirrored roll streams (default is True).
+    batch : int, optional
+        The number of samples simulated between two checks (default is 50).
+    max_samples : int, optional
+        The maximum number of samples (default is 100 000).
+    z : float, optional
+        The quantile of the normal distribution for the confidence level (default is 1.96, for 95%).
+    seed : int, optional
+        The seed of the first sample, the following ones using the next seeds (default is 0).
+
+    Returns
+    -------
+    Comparison
+        The estimated difference. `simulations` counts the variants played, two or four per sample.
+    """
+    samples = 0
+    total_first = total_second = total = total_squares = 0.0
+    margin = math.inf
+    while samples < max_samples:
+        for _ in range(batch):
+            outcome_first, outcome_second = sample_difference(first, second, seed + samples, common, antithetic)
+            difference = outcome_first - outcome_second
+            samples += 1
+            total_first += outcome_first
+            total_second += outcome_second
+            total += difference
+            total_squares += difference * difference
+        mean = total / samples
+        variance = max(0.0, (total_squares - total * mean) / (samples - 1))
+        margin = z * math.sqrt(variance / samples)
+        if margin <= half_width:
+            break
+    mean = total / samples
+    return Comparison(
+        mean, mean - margin, mean + margin, total_first / samples, total_second / samples, samples,
+        samples * 2 * (2 if antithetic else 1)
+    )
+
+
+if __name__ == "__main__":
+    # Benchmark: the number of fights needed to measure the hp left by a Human with a Sword against two variants of the
+    # bear, and by a Human with a Sword or with an Axe, with independent simulations and with the variance reductions.
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+
+    def hp_left(weapon, **bear_stats):
+        return lambda: simulate_fight(build_character("Human", weapon), build_enemy("bear", **bear_stats)).hp_left
+
+    for title, variants in [
+        ("bear with 22 damage - bear with 24 damage", (hp_left("Sword"), hp_left("Sword", damage=24))),
+        ("Sword - Axe against the bear", (hp_left("Sword"), hp_left("Axe"))),
+    ]:
+        print(title)
+        for label, options in [
+            ("independent", {"common": False, "antithetic": False}),
+            ("common random numbers", {"common": True, "antithetic": False}),
+            ("common + antithetic", {"common": True, "antithetic": True}),
+        ]:
+            started = time.perf_counter()
+            result = compare(*variants, half_width=target, **options)
+            print(f"  {label:<24} {result.difference:+.2f} hp [{result.low:+.2f}, {result.high:+.2f}] "
+                  f"after {result.simulations} fights in {time.perf_counter() - started:.2f}s")
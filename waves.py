@@ -0,0 +1,195 @@
+"""
+Module for the endless survival mode, in which the character fights wave after wave of ever stronger enemies.
+
+The waves are produced lazily by a generator, from the four enemy templates of the `enemies` module. The stats of
+the templates are read once, and the stats of every archetype (template and tier, the tiers stopping at `MAX_TIER`)
+are scaled in a single vectorized NumPy pass, the first time a wave is built: a templates x tiers x stats array of
+the stats multiplied by the growth factors of every tier. Every stat is an integer, the defence being read in
+hundredths (see `fixedpoint`), so the whole table is rounded to integers at once. The table is small and built once,
+so building the enemies of a wave only copies precomputed stats. Each wave is generated from its own seed, its size
+is capped, and nothing is kept from one wave to the next, so memory stays constant however many waves are played.
+
+This module needs NumPy, which the story doesn't: `main.py` only imports it for the survival mode.
+
+Imports:
+--------
+- `random`: Used to pick the enemies of every wave.
+- `functools`: Provides `lru_cache`, used to read the template stats and scale the archetypes once.
+- `itertools`: Provides `count`, used to number the waves.
+- `numpy`: Scales the stats of all the archetypes at once.
+- `enemies`: Provides the enemy templates and the `Enemies` class.
+- `fixedpoint`: Provides `from_points`, converting the scaled defences back from hundredths.
+- `encounters`: Provides `Encounter`, used to fight the waves.
+
+Functions:
+----------
+- template_stats: Returns the stats of an enemy template.
+- archetype_table: Scales the stats of every template for every tier, in one vectorized pass.
+- archetype: Returns the scaled stats of a template for a given tier.
+- spawn: Creates an enemy from a template and a tier.
+- endless_waves: Lazily generates the waves of the endless mode.
+- survival: Plays the endless mode with a character until they are defeated.
+
+Example:
+--------
+for wave in itertools.islice(endless_waves(seed=42), 1000):
+    ...
+"""
+
+import random
+from functools import lru_cache
+from itertools import count
+
+import numpy as np
+
+from enemies import Enemies, ENEMY_FACTORY
+from encounters import Encounter
+from fixedpoint import from_points
+
+
+STAT_FIELDS = ("hp", "damage", "defence_points", "critical", "dodge", "speed")
+GROWTH = (1.12, 1.08, 1.03, 1.02, 1.02, 1.02)
+CAPS = (None, None, None, 75, 50, 40)
+WAVES_PER_TIER = 5
+MAX_TIER = 100
+MAX_WAVE_SIZE = 12
+
+
+@lru_cache(maxsize=None)
+def template_stats(name) -> tuple:
+    """
+    Returns the stats of an enemy template, read once.
+
+    Parameters
+    ----------
+    name : str
+        The name of the template in `ENEMY_FACTORY`.
+
+    Returns
+    -------
+    tuple
+        The stats of the template, in the order of `STAT_FIELDS`, and its noises.
+    """
+    template = ENEMY_FACTORY[name]()
+    return tuple(getattr(template, field) for field in STAT_FIELDS), tuple(template.noises)
+
+
+@lru_cache(maxsize=None)
+def archetype_table() -> dict:
+    """
+    Scales the stats of every template for every tier, in one vectorized pass. The stats grow by `GROWTH` with every
+    tier, the defence being rounded to the nearest hundredth, the other stats truncated, and some capped by `CAPS`.
+
+    Returns
+    -------
+    dict
+        For every template name, the scaled stats of every tier from 0 to `MAX_TIER`, in the order of `STAT_FIELDS`.
+    """
+    names = sorted(ENEMY_FACTORY)
+    stats = np.array([template_stats(name)[0] for name in names], dtype=np.float64)
+    factors = np.array(GROWTH) ** np.arange(MAX_TIER + 1)[:, np.newaxis]
+    scaled = stats[:, np.newaxis, :] * factors[np.newaxis, :, :]
+    defence = STAT_FIELDS.index("defence_points")
+    integers = np.trunc(scaled)
+    integers[..., defence] = np.rint(scaled[..., defence])
+    capped = np.minimum(integers, [np.inf if cap is None else cap for cap in CAPS]).astype(np.int64)
+    return {name: tuple(map(tuple, rows)) for name, rows in zip(names, capped.tolist())}
+
+
+def archetype(name, tier) -> tuple:
+    """
+    Returns the stats of a template scaled for a tier.
+
+    Parameters
+    ----------
+    name : str
+        The name of the template in `ENEMY_FACTORY`.
+    tier : int
+        The tier of the archetype, at most `MAX_TIER`.
+
+    Returns
+    -------
+    tuple
+        The scaled stats, in the order of `STAT_FIELDS`, the defence in hundredths.
+    """
+    return archetype_table()[name][tier]
+
+
+def spawn(name, tier) -> Enemies:
+    """
+    Creates an enemy from a template and a tier.
+
+    Parameters
+    ----------
+    name : str
+        The name of the template in `ENEMY_FACTORY`.
+    tier : int
+        The tier of the enemy.
+
+    Returns
+    -------
+    Enemies
+        The enemy.
+    """
+    hp, damage, defence_points, critical, dodge, speed = archetype(name, tier)
+    _, noises = template_stats(name)
+    return Enemies(hp, damage, from_points(defence_points), critical, dodge, 0, 0, list(noises), speed)
+
+
+def endless_waves(seed=0, start=1, base_size=1, size_step=10):
+    """
+    Lazily generates the waves of the endless mode.
+
+    Parameters
+    ----------
+    seed : int, optional
+        The seed of the waves, the same seed always giving the same waves (default is 0).
+    start : int, optional
+        The number of the first wave (default is 1).
+    base_size : int, optional
+        The number of enemies of the first waves (default is 1).
+    size_step : int, optional
+        One more enemy every `size_step` waves, up to `MAX_WAVE_SIZE` (default is 10).
+
+    Yields
+    ------
+    list
+        The enemies of the next wave.
+    """
+    names = sorted(ENEMY_FACTORY)
+    for wave in count(start):
+        rng = random.Random(seed * 1_000_003 + wave)
+        tier = min((wave - 1) // WAVES_PER_TIER, MAX_TIER)
+        size = min(base_size + (wave - 1) // size_step, MAX_WAVE_SIZE)
+        yield [spawn(rng.choice(names), tier) for _ in range(size)]
+
+
+def survival(character, seed=0, max_waves=None, heal=0.25) -> int:
+    """
+    Plays the endless mode with a character until they are defeated.
+
+    Parameters
+    ----------
+    character
+        The character, already started.
+    seed : int, optional
+        The seed of the waves (default is 0).
+    max_waves : int, optional
+        The maximum number of waves played (default is no limit).
+    heal : float, optional
+        The share of their maximum hp the character recovers between waves (default is 0.25).
+
+    Returns
+    -------
+    int
+        The number of waves survived.
+    """
+    survived = 0
+    for wave in endless_waves(seed):
+        if max_waves is not None and survived >= max_waves:
+            break
+        if Encounter([character], wave).fight() not in ("Won", "Fled"):
+            break
+        survived += 1
+        character.race.hp = min(character.race.max_hp, character.race.hp + character.race.max_hp * heal)
+    return survived